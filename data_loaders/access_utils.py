@@ -0,0 +1,92 @@
+import os
+from functools import lru_cache
+from sqlalchemy import create_engine, inspect
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+DATABASE_URL = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@" \
+               f"{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+
+# Columns holding the Sales Rep a row belongs to, in order of preference.
+# harmonised_table uses "Sales Rep", the master tables use "Sales Rep Name".
+REP_COLUMNS = ["Sales Rep", "Sales Rep Name"]
+
+def get_db_connection():
+    """Create a database connection."""
+    engine = create_engine(DATABASE_URL)
+    return engine
+
+def get_rep_restriction(session_state):
+    """
+    Return the Sales Rep name the current session is restricted to.
+    Simple "user" accounts only see their own rows; admins are unrestricted (None).
+    """
+    permission = session_state.get("user_permission")
+    if permission and permission.lower() == "user":
+        return session_state.get("user_name")
+    return None
+
+@lru_cache(maxsize=64)
+def get_table_columns(table_name: str) -> tuple:
+    """Return the column names of a table. Cached per process since the schema rarely changes."""
+    engine = get_db_connection()
+    try:
+        return tuple(c["name"] for c in inspect(engine).get_columns(table_name))
+    finally:
+        engine.dispose()
+
+def get_rep_column(table_name: str):
+    """Return the Sales Rep column used by a table, or None if it has none."""
+    columns = get_table_columns(table_name)
+    for col in REP_COLUMNS:
+        if col in columns:
+            return col
+    return None
+
+def build_rep_filter(table_name: str, rep_name, param_name: str = "rls_sales_rep"):
+    """
+    Build the row-level restriction for a table.
+
+    Returns a tuple (condition, params). The condition is None when no restriction applies.
+    A restricted session on a table without a Sales Rep column gets a condition matching nothing,
+    so rows are never leaked to the wrong user.
+    """
+    if rep_name is None:
+        return None, {}
+    rep_column = get_rep_column(table_name)
+    if rep_column is None:
+        return "1 = 0", {}
+    return f'"{rep_column}" = :{param_name}', {param_name: rep_name}
+
+def build_select_query(table_name: str, rep_name=None, columns="*", where_conditions=None,
+                       params=None, order_by=None):
+    """
+    Build a SELECT statement with the row-level restriction pushed into the WHERE clause.
+
+    Args:
+        table_name: Table to read from.
+        rep_name: Sales Rep the session is restricted to (None for unrestricted sessions).
+        columns: Column list for the SELECT clause.
+        where_conditions: Additional SQL conditions combined with AND.
+        params: Bind parameters used by where_conditions.
+        order_by: Optional ORDER BY expression.
+
+    Returns:
+        Tuple (query, params) ready for sqlalchemy.text().
+    """
+    conditions = list(where_conditions or [])
+    params = dict(params or {})
+
+    rep_condition, rep_params = build_rep_filter(table_name, rep_name)
+    if rep_condition:
+        conditions.append(rep_condition)
+        params.update(rep_params)
+
+    query = f"SELECT {columns} FROM {table_name}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    if order_by:
+        query += f" ORDER BY {order_by}"
+    return query, params
@@ -4,6 +4,7 @@ import pandas as pd
 from sqlalchemy import create_engine, text, inspect
 from sqlalchemy.exc import SQLAlchemyError
 from dotenv import load_dotenv
+from data_loaders.parsing_utils import amount_text
 
 # Load environment variables
 load_dotenv()
@@ -19,7 +20,10 @@ def get_db_connection():
 def generate_row_hash(row: pd.Series) -> str:
     """Generate a hash for identifying unique rows."""
     columns_to_hash = ["Source ID", "Account Number", "Part #", "Revenue Recognition Date", "Commission Date", "Sales Total"]
-    row_data = ''.join([str(row[col]) for col in columns_to_hash if col in row]).encode('utf-8')
+    # Amounts are hashed as two-decimal text, so hashes match rows saved when they were stored as text
+    row_data = ''.join([
+        amount_text(row[col]) if col == "Sales Total" else str(row[col]) for col in columns_to_hash if col in row
+    ]).encode('utf-8')
     return hashlib.sha256(row_data).hexdigest()
 
 def map_chemence_to_harmonised():
@@ -204,15 +208,6 @@ def save_dataframe_to_db(df: pd.DataFrame, table_name: str = "master_chemence_sa
             df.to_sql(table_name, con=engine, if_exists="append", index=False)
             debug_messages.append(f"✅ {len(df)} new records successfully added to '{table_name}'.")
 
-        # If the table is 'master_chemence_sales', update the harmonised table
-        if table_name == "master_chemence_sales":
-            harmonised_messages = update_harmonised_table("master_chemence_sales")
-            debug_messages.extend(harmonised_messages)
-            
-            # Now, after updating the harmonised table, update Commission tier 2 date.
-            commission_tier_2_messages = update_commission_tier_2_date()
-            debug_messages.extend(commission_tier_2_messages)
-
     except SQLAlchemyError as e:
         error_message = str(e)
         print(f"❌ Error saving data to '{table_name}': {error_message}")
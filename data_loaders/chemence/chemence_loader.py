@@ -1,8 +1,13 @@
 import os
+import numpy as np
 import pandas as pd
 from sqlalchemy import create_engine
 from dotenv import load_dotenv
 from data_loaders.validation_utils import validate_file_format
+from data_loaders.excel_utils import read_vendor_excel
+from data_loaders.parsing_utils import parse_amount, canonical_id, date_parts
+from data_loaders.sales_rep_utils import resolve_sales_reps
+from data_loaders.reference_cache_utils import load_reference_table
 
 # Load environment variables
 load_dotenv()
@@ -22,38 +27,28 @@ def load_master_sales_rep() -> pd.DataFrame:
     Load the master_sales_rep table (filtered to Source='Chemence')
     and parse its date columns.
     """
-    query = """
-        SELECT
-            "Source",
-            "Customer field",
-            "Data field value",
-            "Sales Rep name",
-            "Valid from",
-            "Valid until"
-        FROM master_sales_rep
-        WHERE "Source" = 'Chemence'
-    """
-    engine = get_db_connection()
     try:
-        with engine.connect() as conn:
-            master_df = pd.read_sql_query(query, conn)
+        # Cached per process and re-read only when master_sales_rep is edited
+        master_df = load_reference_table("master_sales_rep")
+        master_df = master_df.loc[
+            master_df["Source"] == "Chemence",
+            ["Source", "Customer field", "Data field value", "Sales Rep name", "Valid from", "Valid until"]
+        ].reset_index(drop=True)
         master_df["Valid from"] = pd.to_datetime(master_df["Valid from"], errors="coerce")
         master_df["Valid until"] = pd.to_datetime(master_df["Valid until"], errors="coerce")
         return master_df
     except Exception as e:
         raise RuntimeError(f"Error loading master_sales_rep: {e}")
-    finally:
-        engine.dispose()
 
 def load_excel_file_chemence(filepath: str) -> pd.DataFrame:
     """
     Load and transform a Chemence Excel file into a pandas DataFrame.
-    Ensures all numeric columns are shown with two decimals (e.g. 0.00, 2.30, 0.10).
+    Amounts are rounded to two decimals and kept as numbers; they are formatted when displayed.
     
     Commission Date columns will be populated by sales_data_upload.py from user input.
     """
     # 1. Read & validate
-    df = pd.read_excel(filepath, header=3)
+    df = read_vendor_excel(filepath, header=3)
     is_valid, missing = validate_file_format(df, "Chemence")
     if not is_valid:
         raise ValueError(f"Raw file format invalid. Missing columns: {', '.join(missing)}")
@@ -72,8 +67,9 @@ def load_excel_file_chemence(filepath: str) -> pd.DataFrame:
         # Extract year and month parts
         if pd.api.types.is_datetime64_any_dtype(df["Invoice Date"]):
             # If it's already a datetime
-            df["Revenue Recognition Date YYYY"] = df["Invoice Date"].dt.year.astype(str)
-            df["Revenue Recognition Date MM"] = df["Invoice Date"].dt.month.apply(lambda m: f"{m:02d}")
+            _, year_text, month_text = date_parts(df["Invoice Date"])
+            df["Revenue Recognition Date YYYY"] = year_text.fillna("")
+            df["Revenue Recognition Date MM"] = month_text.fillna("")
         else:
             # If it's a string, extract the parts
             df["Revenue Recognition Date YYYY"] = df["Revenue Recognition Date"].str[:4]
@@ -86,24 +82,19 @@ def load_excel_file_chemence(filepath: str) -> pd.DataFrame:
     numeric_columns = ["Qty Shipped", "Sales Price", "Sales Total", "Commission", "Unit Price"]
     for col in numeric_columns:
         if col in df.columns:
-            df[col] = (
-                df[col].astype(str)
-                        .str.replace(r"[\$,]", "", regex=True)
-                        .pipe(pd.to_numeric, errors="coerce")
-                        .fillna(0.0)
-                        .round(2)
-            )
+            df[col] = parse_amount(df[col]).fillna(0.0).round(2)
 
-    # 5. Compute Comm %
+    # 5. Compute Comm % (0 where Sales Total is 0: NUMERIC(15,2) cannot store ±inf)
     if {"Commission", "Sales Total"}.issubset(df.columns):
         df["Comm %"] = (
             df["Commission"].div(df["Sales Total"])
+                         .replace([np.inf, -np.inf], np.nan)
                          .fillna(0)
                          .round(2)
         )
 
-    # 6. Force two-decimal formatting on all floats (turns them into strings)
-    float_cols = df.select_dtypes(include="float").columns
+    # 6. Amounts stay numeric; other float columns (e.g. codes read as numbers) keep their two-decimal text
+    float_cols = df.select_dtypes(include="float").columns.difference(numeric_columns + ["Comm %"])
     df[float_cols] = df[float_cols].applymap(lambda x: f"{x:.2f}")
 
     # 7. Format revenue recognition date if it's a datetime
@@ -118,31 +109,19 @@ def load_excel_file_chemence(filepath: str) -> pd.DataFrame:
     for col in text_columns:
         if col in df.columns:
             if col in {"Source ID", "Account Number"}:
-                df[col] = (
-                    df[col]
-                    .apply(lambda x: str(int(float(x))) if pd.notnull(x)
-                                           and isinstance(x, (int, float, str))
-                                           and str(x).replace('.','',1).isdigit()
-                           else str(x))
-                    .replace("nan", "")
-                    .str.strip()
-                )
+                df[col] = canonical_id(df[col]).replace("nan", "").str.strip()
             else:
                 df[col] = df[col].astype(str).replace("nan", "").str.strip()
 
     # 9. Enrich with Sales Rep Name lookup
     try:
         master_df = load_master_sales_rep()
-        def lookup_sales_rep(source_id):
-            if pd.isna(source_id) or source_id == "":
-                return ""
-            matches = master_df[
-                (master_df["Customer field"] == "Source ID") &
-                (master_df["Data field value"] == str(source_id))
-            ]
-            return matches.iloc[0]["Sales Rep name"] if not matches.empty else ""
         if "Source ID" in df.columns:
-            df["Sales Rep Name"] = df["Source ID"].apply(lookup_sales_rep)
+            df["Sales Rep Name"], unmatched = resolve_sales_reps(
+                master_df, df["Source ID"], customer_field="Source ID", skip_blank=True, default=""
+            )
+            if unmatched:
+                print(f"⚠️ No Sales Rep found for {len(unmatched)} Chemence Source IDs: {', '.join(unmatched[:10])}")
         else:
             df["Sales Rep Name"] = ""
     except Exception as e:
@@ -3,6 +3,10 @@ from sqlalchemy import create_engine
 from dotenv import load_dotenv
 import os
 from data_loaders.validation_utils import validate_file_format
+from data_loaders.excel_utils import read_vendor_excel
+from data_loaders.parsing_utils import parse_amount, parse_percent, number_to_text, parse_dates, date_parts
+from data_loaders.sales_rep_utils import resolve_sales_reps
+from data_loaders.reference_cache_utils import load_reference_table
 
 # Load environment variables
 load_dotenv()
@@ -16,27 +20,23 @@ def get_db_connection():
 
 def load_master_sales_rep():
     """Load the master_sales_rep table from the database."""
-    query = """
-        SELECT "Source", "Customer field", "Data field value", "Sales Rep name", "Valid from", "Valid until"
-        FROM master_sales_rep
-        WHERE "Source" = 'Cygnus'
-    """
-    engine = get_db_connection()
     try:
-        with engine.connect() as conn:
-            master_df = pd.read_sql_query(query, conn)
+        # Cached per process and re-read only when master_sales_rep is edited
+        master_df = load_reference_table("master_sales_rep")
+        master_df = master_df.loc[
+            master_df["Source"] == "Cygnus",
+            ["Source", "Customer field", "Data field value", "Sales Rep name", "Valid from", "Valid until"]
+        ].reset_index(drop=True)
         # Convert date columns to datetime
         master_df["Valid from"] = pd.to_datetime(master_df["Valid from"], errors='coerce')
         master_df["Valid until"] = pd.to_datetime(master_df["Valid until"], errors='coerce')
         return master_df
     except Exception as e:
         raise RuntimeError(f"Error loading master_sales_rep table: {e}")
-    finally:
-        engine.dispose()
 
 def load_excel_file_cygnus(filepath: str) -> pd.DataFrame:
     # Read the Excel file starting from the correct header row
-    raw_df = pd.read_excel(filepath, header=3)
+    raw_df = read_vendor_excel(filepath, header=3)
     # Run validation on the raw DataFrame
     is_valid, missing = validate_file_format(raw_df, "Cygnus")
     if not is_valid:
@@ -58,23 +58,22 @@ def load_excel_file_cygnus(filepath: str) -> pd.DataFrame:
     
     # Convert Rep % from strings like "7,0%" to floats like 0.07
     if "Rep %" in df.columns:
-        df["Rep %"] = df["Rep %"].astype(str).str.replace("%", "", regex=False).str.replace(",", ".", regex=False)
-        df["Rep %"] = pd.to_numeric(df["Rep %"], errors='coerce')
+        df["Rep %"] = parse_percent(df["Rep %"], decimal_comma=True)
     
     # Handle the ClosedDate column - now renamed to Revenue Recognition Date
     date_columns = ["Inv Date", "Due Date", "ClosedDate"]
     for date_col in date_columns:
         if date_col in df.columns:
-            df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
+            date_text, year_text, month_text = date_parts(parse_dates(df[date_col]))
             if date_col == "ClosedDate":
                 # Rename to Revenue Recognition Date
-                df["Revenue Recognition Date"] = df[date_col].dt.strftime('%Y-%m-%d')
-                df["Revenue Recognition Date YYYY"] = df[date_col].dt.year.astype("Int64").astype(str).str.replace(",", "")
-                df["Revenue Recognition Date MM"] = df[date_col].dt.month.astype("Int64").astype(str).str.zfill(2)
+                df["Revenue Recognition Date"] = date_text
+                df["Revenue Recognition Date YYYY"] = year_text.fillna("<NA>")
+                df["Revenue Recognition Date MM"] = month_text.fillna("<NA>")
                 # Drop the original column
                 df = df.drop(columns=[date_col])
             else:
-                df[date_col] = df[date_col].dt.strftime('%Y-%m-%d')
+                df[date_col] = date_text
 
     # Reorder columns to place Revenue Recognition Date fields together
     if "Revenue Recognition Date" in df.columns and "Revenue Recognition Date YYYY" in df.columns and "Revenue Recognition Date MM" in df.columns:
@@ -94,25 +93,15 @@ def load_excel_file_cygnus(filepath: str) -> pd.DataFrame:
             cols.extend(["Revenue Recognition Date", "Revenue Recognition Date YYYY", "Revenue Recognition Date MM"])
         df = df[cols]
 
-    # Convert numeric columns and ensure proper formatting
+    # Convert numeric columns, rounded to two decimals (kept as numbers, formatted when displayed)
     for numeric_col in ["Invoice Total", "Total Rep Due"]:
         if numeric_col in df.columns:
-            df[numeric_col] = (
-                df[numeric_col]
-                .astype(str)
-                .str.replace(",", "", regex=False)
-                .str.replace("$", "", regex=False)
-                .str.strip()
-            )
-            df[numeric_col] = pd.to_numeric(df[numeric_col], errors='coerce')
-            df[numeric_col] = df[numeric_col].map(lambda x: f"{x:.2f}" if pd.notnull(x) else "")
+            df[numeric_col] = parse_amount(df[numeric_col]).round(2)
 
     # Ensure "Invoice" column is treated as a string without numeric interpretation
     if "Invoice" in df.columns:
         df["Invoice"] = df["Invoice"].ffill()
-        df["Invoice"] = df["Invoice"].apply(
-            lambda x: str(int(x)) if pd.notnull(x) and isinstance(x, float) else str(x)
-        )
+        df["Invoice"] = number_to_text(df["Invoice"])
         df["Invoice"] = df["Invoice"].str.strip()
         df = df[df["Invoice"] != ""]
         
@@ -129,17 +118,10 @@ def load_excel_file_cygnus(filepath: str) -> pd.DataFrame:
     # Enrich the DataFrame with Sales Rep Name from master_sales_rep
     master_df = load_master_sales_rep()
 
-    def enrich_sales_rep(name):
-        match = master_df[
-            (master_df["Source"] == "Cygnus") & 
-            (master_df["Data field value"].str.strip() == str(name).strip())
-        ]
-        if not match.empty:
-            return match.iloc[0]["Sales Rep name"]
-        return None
-
     if "Name" in df.columns:
-        df["Sales Rep Name"] = df["Name"].apply(enrich_sales_rep)
+        df["Sales Rep Name"], unmatched = resolve_sales_reps(master_df, df["Name"], source="Cygnus", strip=True)
+        if unmatched:
+            print(f"⚠️ No Sales Rep found for {len(unmatched)} Cygnus names: {', '.join(unmatched[:10])}")
 
     # Move the "Sales Rep Name" column right after "Sales Rep"
     if "Sales Rep" in df.columns and "Sales Rep Name" in df.columns:
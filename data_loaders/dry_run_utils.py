@@ -0,0 +1,169 @@
+import os
+import io
+import pandas as pd
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+from data_loaders.access_utils import get_table_columns
+from data_loaders.ingest_utils import DB_UTILS, MASTER_TABLES
+
+# Load environment variables
+load_dotenv()
+
+DATABASE_URL = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@" \
+               f"{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+
+# Master table columns mapped to "Sales Actual" and "Rev Actual" in harmonised_table.
+AMOUNT_COLUMNS = {
+    "Cygnus": ("Invoice Total", "Total Rep Due"),
+    "Logiquip": ("Doc Amt", "Comm Amt"),
+    "Summit Medical": ("Net Sales Amount", "Comm $"),
+    "QuickBooks": ("Amount line", "Margin"),
+    "InspeKtor": ("Total", "Formula"),
+    "Sunoptic": ("Line Amount", "Commission $"),
+    "Ternio": ("Invoiced", "Paid"),
+    "Novo": ("Extension", "Commission Amount"),
+    "Chemence": ("Sales Total", "Commission"),
+}
+
+PERIOD_YEAR_COLUMNS = ["Revenue Recognition Date YYYY", "Revenue Recognition YYYY"]
+PERIOD_MONTH_COLUMNS = ["Revenue Recognition Date MM", "Revenue Recognition MM"]
+
+DRY_RUN_TABLE = "dry_run_upload"
+
+def get_db_connection():
+    """Create a database connection."""
+    engine = create_engine(DATABASE_URL)
+    return engine
+
+def _find_column(columns, candidates):
+    for col in candidates:
+        if col in columns:
+            return col
+    return None
+
+def _numeric_expr(column: str) -> str:
+    """SQL expression casting a master table amount column to NUMERIC (NULL when not a number)."""
+    value = f'REPLACE(REPLACE(TRIM(CAST(m."{column}" AS TEXT)), \'$\', \'\'), \',\', \'\')'
+    return f"CASE WHEN {value} ~ '^-?[0-9]*\\.?[0-9]+$' THEN CAST({value} AS NUMERIC) END"
+
+def _load_upload_frame(conn, upload: pd.DataFrame):
+    """Create the session temp table and COPY the upload's comparison columns into it."""
+    conn.execute(text(f"""
+        CREATE TEMP TABLE {DRY_RUN_TABLE} (
+            row_hash   TEXT,
+            yyyy       TEXT,
+            mm         TEXT,
+            sales_rep  TEXT,
+            sales      NUMERIC,
+            rev        NUMERIC
+        ) ON COMMIT DROP
+    """))
+    buffer = io.StringIO()
+    upload.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {DRY_RUN_TABLE} FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+    conn.execute(text(f"ANALYZE {DRY_RUN_TABLE}"))
+
+def dry_run_diff(df: pd.DataFrame, file_type: str):
+    """
+    Compare a parsed upload with the live master table without writing anything.
+
+    The rows of the upload are copied into a temporary table and compared in SQL with the master
+    rows of the same Revenue Recognition periods (the rows a save would replace), by row_hash.
+
+    Returns:
+        Tuple (periods, reps):
+        - periods: DataFrame with Period, Added, Removed, Unchanged row counts.
+        - reps: DataFrame with the live and new Sales Actual / Comm Amount tier 1 per Sales Rep
+          and their net change.
+    """
+    if file_type not in DB_UTILS:
+        raise ValueError(f"No save function defined for file type: {file_type}")
+    table_name = MASTER_TABLES[file_type]
+    sales_col, rev_col = AMOUNT_COLUMNS[file_type]
+
+    year_col = _find_column(df.columns, PERIOD_YEAR_COLUMNS)
+    month_col = _find_column(df.columns, PERIOD_MONTH_COLUMNS)
+    table_columns = get_table_columns(table_name)
+    table_year_col = _find_column(table_columns, PERIOD_YEAR_COLUMNS)
+    table_month_col = _find_column(table_columns, PERIOD_MONTH_COLUMNS)
+    if not (year_col and month_col and table_year_col and table_month_col):
+        raise ValueError(f"Could not find Revenue Recognition year/month columns for {file_type}.")
+
+    # Same row_hash as save_dataframe_to_db would store, computed on a copy.
+    upload = pd.DataFrame({
+        "row_hash": df.apply(DB_UTILS[file_type].generate_row_hash, axis=1),
+        "yyyy": df[year_col].astype(str),
+        "mm": df[month_col].astype(str),
+        "sales_rep": df["Sales Rep Name"] if "Sales Rep Name" in df.columns else None,
+        "sales": pd.to_numeric(df[sales_col], errors="coerce") if sales_col in df.columns else None,
+        "rev": pd.to_numeric(df[rev_col], errors="coerce") if rev_col in df.columns else None,
+    })
+
+    live_rows = f"""
+        SELECT m.row_hash, m."{table_year_col}" AS yyyy, m."{table_month_col}" AS mm,
+               m."Sales Rep Name" AS sales_rep,
+               {_numeric_expr(sales_col) if sales_col in table_columns else "CAST(NULL AS NUMERIC)"} AS sales,
+               {_numeric_expr(rev_col) if rev_col in table_columns else "CAST(NULL AS NUMERIC)"} AS rev
+        FROM {table_name} AS m
+        WHERE (m."{table_year_col}", m."{table_month_col}") IN (SELECT DISTINCT yyyy, mm FROM {DRY_RUN_TABLE})
+    """
+
+    periods_query = f"""
+        WITH live AS ({live_rows}),
+        upload_counts AS (
+            SELECT yyyy, mm, row_hash, COUNT(*) AS n FROM {DRY_RUN_TABLE} GROUP BY yyyy, mm, row_hash
+        ),
+        live_counts AS (
+            SELECT yyyy, mm, row_hash, COUNT(*) AS n FROM live GROUP BY yyyy, mm, row_hash
+        )
+        SELECT yyyy || '-' || mm AS "Period",
+               SUM(GREATEST(COALESCE(u.n, 0) - COALESCE(l.n, 0), 0)) AS "Added",
+               SUM(GREATEST(COALESCE(l.n, 0) - COALESCE(u.n, 0), 0)) AS "Removed",
+               SUM(LEAST(COALESCE(u.n, 0), COALESCE(l.n, 0))) AS "Unchanged"
+        FROM upload_counts AS u
+        FULL OUTER JOIN live_counts AS l USING (yyyy, mm, row_hash)
+        GROUP BY yyyy, mm
+        ORDER BY yyyy, mm
+    """
+
+    reps_query = f"""
+        WITH live AS ({live_rows}),
+        rates AS (
+            SELECT DISTINCT ON ("Sales Rep Name") "Sales Rep Name", "Commission tier 1 rate"
+            FROM sales_rep_commission_tier
+            ORDER BY "Sales Rep Name"
+        ),
+        live_totals AS (
+            SELECT sales_rep, SUM(sales) AS sales, SUM(rev) AS rev FROM live GROUP BY sales_rep
+        ),
+        upload_totals AS (
+            SELECT sales_rep, SUM(sales) AS sales, SUM(rev) AS rev FROM {DRY_RUN_TABLE} GROUP BY sales_rep
+        )
+        SELECT sales_rep AS "Sales Rep",
+               COALESCE(l.sales, 0) AS "Live Sales Actual",
+               COALESCE(u.sales, 0) AS "New Sales Actual",
+               COALESCE(u.sales, 0) - COALESCE(l.sales, 0) AS "Net Sales Actual",
+               CAST(COALESCE(l.rev, 0) * COALESCE(r."Commission tier 1 rate", 0) AS NUMERIC(15,2)) AS "Live Commission",
+               CAST(COALESCE(u.rev, 0) * COALESCE(r."Commission tier 1 rate", 0) AS NUMERIC(15,2)) AS "New Commission",
+               CAST((COALESCE(u.rev, 0) - COALESCE(l.rev, 0)) * COALESCE(r."Commission tier 1 rate", 0) AS NUMERIC(15,2)) AS "Net Commission"
+        FROM upload_totals AS u
+        FULL OUTER JOIN live_totals AS l USING (sales_rep)
+        LEFT JOIN rates AS r ON r."Sales Rep Name" = sales_rep
+        ORDER BY sales_rep
+    """
+
+    engine = get_db_connection()
+    try:
+        # The temp table lives in this transaction only and is dropped at commit.
+        with engine.begin() as conn:
+            _load_upload_frame(conn, upload)
+            periods = pd.read_sql_query(text(periods_query), conn)
+            reps = pd.read_sql_query(text(reps_query), conn)
+        return periods, reps
+    finally:
+        engine.dispose()
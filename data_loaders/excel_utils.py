@@ -0,0 +1,37 @@
+import os
+import importlib.util
+import pandas as pd
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Engine used to read vendor workbooks. python-calamine (Rust) reads large sheets several times
+# faster than openpyxl and is used when installed; EXCEL_ENGINE=openpyxl forces the old reader.
+CALAMINE_AVAILABLE = importlib.util.find_spec("python_calamine") is not None
+EXCEL_ENGINE = os.getenv("EXCEL_ENGINE", "calamine" if CALAMINE_AVAILABLE else "openpyxl")
+
+def read_vendor_excel(source, engine: str = None, **read_kwargs) -> pd.DataFrame:
+    """
+    Read a vendor workbook with the fastest available engine.
+
+    Takes the same arguments as pd.read_excel (header, skiprows, usecols, dtype, converters,
+    nrows, sheet_name, ...), so loaders only change the function they call. If calamine cannot
+    read a file, it is read again with openpyxl.
+
+    Args:
+        source: File path, or a file-like object holding the workbook bytes.
+        engine: Engine to try first (defaults to EXCEL_ENGINE).
+    """
+    engine = engine or EXCEL_ENGINE
+    if engine != "calamine":
+        return pd.read_excel(source, engine=engine, **read_kwargs)
+
+    try:
+        return pd.read_excel(source, engine="calamine", **read_kwargs)
+    except Exception as e:
+        # A file neither engine can read still fails, with openpyxl's error.
+        print(f"⚠️ calamine could not read the workbook ({e}); using openpyxl.")
+        if hasattr(source, "seek"):
+            source.seek(0)
+        return pd.read_excel(source, engine="openpyxl", **read_kwargs)
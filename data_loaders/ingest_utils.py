@@ -0,0 +1,396 @@
+import os
+import io
+import re
+import zipfile
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import pandas as pd
+from dotenv import load_dotenv
+
+# Import all the loaders
+from data_loaders.cygnus.cygnus_loader import load_excel_file_cygnus
+from data_loaders.logiquip.logiquip_loader import load_excel_file_logiquip
+from data_loaders.summit_medical.summit_medical_loader import load_pdf_file_summit_medical, load_excel_file_summit_medical
+from data_loaders.quickbooks.quickbooks_loader import load_excel_file_quickbooks, iter_quickbooks_chunks
+from data_loaders.inspektor.inspektor_loader import load_excel_file_inspektor
+from data_loaders.sunoptic.sunoptic_loader import load_excel_file_sunoptic
+from data_loaders.ternio.ternio_loader import load_excel_file_ternio
+from data_loaders.novo.novo_loader import load_excel_file_novo
+from data_loaders.chemence.chemence_loader import load_excel_file_chemence
+
+# Import all the DB utils
+from data_loaders.cygnus import cygnus_db_utils
+from data_loaders.logiquip import logiquip_db_utils
+from data_loaders.summit_medical import summit_medical_db_utils
+from data_loaders.quickbooks import quickbooks_db_utils
+from data_loaders.inspektor import inspektor_db_utils
+from data_loaders.sunoptic import sunoptic_db_utils
+from data_loaders.ternio import ternio_db_utils
+from data_loaders.novo import novo_db_utils
+from data_loaders.chemence import chemence_db_utils
+
+from data_loaders.parse_cache_utils import make_parse_cache_key, load_cached_frame, save_cached_frame
+from data_loaders.refresh_utils import refresh_derived_data
+from data_loaders.excel_utils import read_vendor_excel
+
+# Load environment variables
+load_dotenv()
+
+# Upper bound for parallel parses and saves in batch mode.
+INGEST_MAX_WORKERS = int(os.getenv("INGEST_MAX_WORKERS", str(min(9, os.cpu_count() or 1))))
+
+MASTER_TABLES = {
+    "Cygnus": "master_cygnus_sales",
+    "Logiquip": "master_logiquip_sales",
+    "Summit Medical": "master_summit_medical_sales",
+    "QuickBooks": "master_quickbooks_sales",
+    "InspeKtor": "master_inspektor_sales",
+    "Sunoptic": "master_sunoptic_sales",
+    "Ternio": "master_ternio_sales",
+    "Novo": "master_novo_sales",
+    "Chemence": "master_chemence_sales",
+}
+
+# DB utils module of each product line. Each one provides save_dataframe_to_db (master table only),
+# update_harmonised_table and update_commission_tier_2_date; see harmonise_product_line.
+DB_UTILS = {
+    "Cygnus": cygnus_db_utils,
+    "Logiquip": logiquip_db_utils,
+    "Summit Medical": summit_medical_db_utils,
+    "QuickBooks": quickbooks_db_utils,
+    "InspeKtor": inspektor_db_utils,
+    "Sunoptic": sunoptic_db_utils,
+    "Ternio": ternio_db_utils,
+    "Novo": novo_db_utils,
+    "Chemence": chemence_db_utils,
+}
+
+SAVE_FUNCTIONS = {file_type: module.save_dataframe_to_db for file_type, module in DB_UTILS.items()}
+
+# Product lines whose large exports can be streamed chunk by chunk into a staging table
+# (see stream_upload_to_staging): file type -> (chunk iterator, staging save function).
+STREAMING_LOADERS = {
+    "QuickBooks": (iter_quickbooks_chunks, quickbooks_db_utils.save_staged_quickbooks),
+}
+
+# Uploads of a streaming product line at least this large skip the in-memory preview.
+STREAM_THRESHOLD_MB = int(os.getenv("STREAM_THRESHOLD_MB", "20"))
+
+# Dictionary specifying if a file type's loader already handles commission dates internally
+# This will be used to skip date column addition for loaders that already handle it
+LOADERS_WITH_DATE_HANDLING = {
+    # File types that already fully handle commission dates in their loaders
+    "Chemence": False,
+    # File types that need us to add Commission Date columns
+    "Cygnus": False,
+    "Logiquip": False,
+    "Summit Medical": False,
+    "QuickBooks": False,
+    "InspeKtor": False,
+    "Sunoptic": False,
+    "Ternio": False,
+    "Novo": False
+}
+
+def load_file(filepath: str, file_type: str, year: str = None, month: str = None,
+              rev_year: str = None, rev_month: str = None, progress_callback=None) -> pd.DataFrame:
+    """
+    Generic dispatcher to the correct loader function, with standardized parameters.
+    All loaders receive year and month where applicable; rev_year/rev_month are only used by
+    Summit Medical Excel files, progress_callback (pages done, total pages) by Summit Medical PDFs.
+    """
+    if file_type == "Cygnus":
+        return load_excel_file_cygnus(filepath)
+    elif file_type == "Logiquip":
+        return load_excel_file_logiquip(filepath)
+    elif file_type == "Summit Medical":
+        # For Summit Medical, check if the file is PDF or Excel
+        if filepath.lower().endswith('.xlsx') or filepath.lower().endswith('.xls'):
+            return load_excel_file_summit_medical(
+                filepath,
+                year=year,
+                month=month,
+                rev_year=rev_year,
+                rev_month=rev_month
+            )
+        else:
+            # For PDF files, use the PDF loader
+            return load_pdf_file_summit_medical(filepath, progress_callback=progress_callback)
+    elif file_type == "QuickBooks":
+        return load_excel_file_quickbooks(filepath)
+    elif file_type == "InspeKtor":
+        return load_excel_file_inspektor(filepath)
+    elif file_type == "Sunoptic":
+        return load_excel_file_sunoptic(filepath)
+    elif file_type == "Ternio":
+        return load_excel_file_ternio(filepath)
+    elif file_type == "Novo":
+        return load_excel_file_novo(filepath, year=year, month=month)
+    elif file_type == "Chemence":
+        return load_excel_file_chemence(filepath)
+    else:
+        return read_vendor_excel(filepath)
+
+def add_commission_date_columns(df: pd.DataFrame, year: str, month: str, month_num: int) -> pd.DataFrame:
+    """
+    Add standardized Commission Date columns to a DataFrame.
+    For Summit Medical files, preserves existing Revenue Recognition Date values.
+
+    Returns the updated DataFrame with the following columns added or updated:
+    - Commission Date YYYY
+    - Commission Date MM
+    - Commission Date
+    """
+    # Format the Commission Date columns properly
+    df["Commission Date YYYY"] = str(year)
+    df["Commission Date MM"] = f"{month_num:02d}"
+
+    # Create the Commission Date string directly with the formatted year and month
+    df["Commission Date"] = f"{year}-{month_num:02d}"
+
+    return df
+
+def parse_upload(file_bytes: bytes, file_name: str, file_type: str, year, month: str, month_num: int,
+                 rev_year=None, rev_month=None, progress_callback=None) -> pd.DataFrame:
+    """
+    Parse one uploaded file into its enriched DataFrame (loader + Commission Date columns).
+
+    This function does not touch Streamlit state, so it can run in a worker process.
+    The result is cached on disk by file content and selected dates.
+    """
+    cache_key = make_parse_cache_key(file_bytes, file_type, file_name.lower().rsplit(".", 1)[-1],
+                                     year, month, rev_year, rev_month)
+    df = load_cached_frame(cache_key)
+    if df is not None:
+        return df
+
+    extension = os.path.splitext(file_name)[1].lower() or ".xlsx"
+    # The directory and the file in it are removed when the block exits, even if the loader fails.
+    with tempfile.TemporaryDirectory(prefix="upload_") as tmp_dir:
+        tmp_file_path = os.path.join(tmp_dir, f"upload{extension}")
+        with open(tmp_file_path, "wb") as tmp_file:
+            tmp_file.write(file_bytes)
+        # Pass year and month to all loaders
+        df = load_file(
+            tmp_file_path,
+            file_type,
+            year=str(year),
+            month=month,
+            rev_year=str(rev_year) if rev_year is not None else None,
+            rev_month=rev_month,
+            progress_callback=progress_callback
+        )
+
+    # Add Commission Date columns for file types that don't already handle it
+    if not LOADERS_WITH_DATE_HANDLING.get(file_type, False):
+        df = add_commission_date_columns(df, year, month, month_num)
+
+    save_cached_frame(cache_key, df)
+    return df
+
+def stream_upload_to_staging(file_bytes: bytes, file_name: str, file_type: str, year, month: str,
+                             month_num: int, progress_callback=None, chunk_callback=None):
+    """
+    Parse a large upload chunk by chunk (same cleaning rules and Commission Date columns as
+    parse_upload) and write each finished chunk to a new staging table, so memory does not grow
+    with the file. Save it with the product line's staging save function (STREAMING_LOADERS).
+    chunk_callback, if given, is called with each finished chunk before it is staged (e.g. to
+    validate it).
+
+    Returns:
+        Tuple (staging table name, rows written, DataFrame sample of the first rows).
+    """
+    if file_type not in STREAMING_LOADERS:
+        raise ValueError(f"{file_type} uploads cannot be streamed.")
+    iter_chunks = STREAMING_LOADERS[file_type][0]
+
+    extension = os.path.splitext(file_name)[1].lower() or ".xlsx"
+    with tempfile.TemporaryDirectory(prefix="upload_") as tmp_dir:
+        tmp_file_path = os.path.join(tmp_dir, f"upload{extension}")
+        with open(tmp_file_path, "wb") as tmp_file:
+            tmp_file.write(file_bytes)
+
+        def chunks():
+            for df in iter_chunks(tmp_file_path):
+                if not LOADERS_WITH_DATE_HANDLING.get(file_type, False):
+                    df = add_commission_date_columns(df, year, month, month_num)
+                if chunk_callback:
+                    chunk_callback(df)
+                yield df
+
+        return DB_UTILS[file_type].stream_to_staging(
+            chunks(), MASTER_TABLES[file_type], progress_callback=progress_callback
+        )
+
+def parse_uploads_parallel(jobs: dict, max_workers: int = None):
+    """
+    Parse several uploaded files concurrently in a process pool.
+
+    Args:
+        jobs: Dictionary keyed by file name with the keyword arguments of parse_upload as values.
+        max_workers: Size of the pool (defaults to INGEST_MAX_WORKERS).
+
+    Yields:
+        Tuples (file_name, DataFrame or None, error message or None) as each file finishes.
+    """
+    max_workers = max_workers or INGEST_MAX_WORKERS
+    with ProcessPoolExecutor(max_workers=min(max_workers, max(len(jobs), 1))) as executor:
+        futures = {executor.submit(parse_upload, **kwargs): file_name for file_name, kwargs in jobs.items()}
+        for future in as_completed(futures):
+            file_name = futures[future]
+            try:
+                yield file_name, future.result(), None
+            except Exception as e:
+                yield file_name, None, str(e)
+
+# Words in a file name that identify the product line (matched against the lower-cased name's words).
+FILE_NAME_KEYWORDS = {
+    "Cygnus": ["cygnus"],
+    "Logiquip": ["logiquip"],
+    "Summit Medical": ["summit"],
+    "QuickBooks": ["quickbooks", "qb"],
+    "InspeKtor": ["inspektor"],
+    "Sunoptic": ["sunoptic"],
+    "Ternio": ["ternio"],
+    "Novo": ["novo"],
+    "Chemence": ["chemence"],
+}
+
+UPLOAD_EXTENSIONS = (".xlsx", ".xls", ".pdf")
+
+def detect_file_type_from_name(file_name: str):
+    """Return the product line named in a file name, or None if it names none or several."""
+    words = set(re.split(r"[^a-z0-9]+", os.path.basename(file_name).lower()))
+    matches = [file_type for file_type, keywords in FILE_NAME_KEYWORDS.items() if words & set(keywords)]
+    return matches[0] if len(matches) == 1 else None
+
+def expand_uploads(files: list) -> list:
+    """
+    Expand uploaded files into the list of files to process.
+    .zip archives are opened and their .xlsx/.pdf members added (folders, hidden and
+    macOS metadata files are skipped).
+
+    Args:
+        files: List of (file name, bytes) tuples.
+
+    Returns:
+        List of (file name, bytes) tuples.
+    """
+    expanded = []
+    for file_name, file_bytes in files:
+        if not file_name.lower().endswith(".zip"):
+            expanded.append((file_name, file_bytes))
+            continue
+        with zipfile.ZipFile(io.BytesIO(file_bytes)) as archive:
+            for member in archive.infolist():
+                member_name = os.path.basename(member.filename)
+                if (
+                    member.is_dir()
+                    or member.filename.startswith("__MACOSX/")
+                    or member_name.startswith((".", "~$"))
+                    or not member_name.lower().endswith(UPLOAD_EXTENSIONS)
+                ):
+                    continue
+                expanded.append((member_name, archive.read(member)))
+    return expanded
+
+def harmonise_product_line(file_type: str):
+    """
+    Rebuild the harmonised_table partition, tier 2 dates and derived data of one product line.
+    Every save path (single upload, batch, streamed QuickBooks, job queue) runs these steps after
+    writing the master table. Return debug messages as a list.
+    """
+    db_utils = DB_UTILS[file_type]
+    table_name = MASTER_TABLES[file_type]
+    debug_messages = []
+    debug_messages.extend(db_utils.update_harmonised_table(table_name))
+    debug_messages.extend(db_utils.update_commission_tier_2_date())
+    debug_messages.extend(refresh_derived_data(table_name))
+    return debug_messages
+
+def has_failed_messages(messages) -> bool:
+    """Return True if any debug message reports a failure (❌)."""
+    return any("❌" in str(message) for message in messages or [])
+
+def save_upload(file_type: str, df: pd.DataFrame):
+    """
+    Save one parsed upload to its master table, then harmonise the product line unless the
+    save failed. Return debug messages as a list.
+    """
+    debug_messages = SAVE_FUNCTIONS[file_type](df, MASTER_TABLES[file_type])
+    if not has_failed_messages(debug_messages):
+        debug_messages.extend(harmonise_product_line(file_type))
+    return debug_messages
+
+def _save_product_line(file_type: str, items: list):
+    """
+    Save every file of one product line in order, then harmonise the product line once.
+    Harmonisation is skipped when any of its files failed to save (raised or reported ❌).
+    Returns a list of (file_name, messages, error); the harmonisation pass is reported under
+    the name "<product line> harmonisation".
+    """
+    results = []
+    saved_any = False
+    failed_any = False
+    for file_name, df in items:
+        try:
+            messages = SAVE_FUNCTIONS[file_type](df, MASTER_TABLES[file_type])
+        except Exception as e:
+            results.append((file_name, [], str(e)))
+            failed_any = True
+            continue
+        if has_failed_messages(messages):
+            results.append((file_name, messages, "The save reported errors, see the debug log."))
+            failed_any = True
+        else:
+            results.append((file_name, messages, None))
+            saved_any = True
+
+    if failed_any and saved_any:
+        results.append((
+            f"{file_type} harmonisation", [],
+            f"Skipped because a {file_type} file failed to save; harmonise {file_type} again once it is saved."
+        ))
+    elif saved_any:
+        try:
+            messages = harmonise_product_line(file_type)
+            error = "Harmonisation reported errors, see the debug log." if has_failed_messages(messages) else None
+            results.append((f"{file_type} harmonisation", messages, error))
+        except Exception as e:
+            results.append((f"{file_type} harmonisation", [], str(e)))
+    return results
+
+def save_uploads_parallel(dataframes: dict, max_workers: int = None):
+    """
+    Save parsed files concurrently, one thread per product line.
+    Files of the same product line are saved one after the other since they rewrite the same
+    master table, and the product line is harmonised once after its last file.
+
+    Args:
+        dataframes: Dictionary keyed by file name with (DataFrame, file type) tuples as values.
+        max_workers: Size of the pool (defaults to INGEST_MAX_WORKERS).
+
+    Yields:
+        Tuples (file_name, file type, debug messages, error message or None) as each product line
+        finishes.
+    """
+    by_product_line = {}
+    for file_name, (df, file_type) in dataframes.items():
+        if file_type not in SAVE_FUNCTIONS:
+            yield file_name, file_type, [], f"No save function defined for file type: {file_type}"
+            continue
+        by_product_line.setdefault(file_type, []).append((file_name, df))
+
+    if not by_product_line:
+        return
+
+    max_workers = max_workers or INGEST_MAX_WORKERS
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(by_product_line))) as executor:
+        futures = {
+            executor.submit(_save_product_line, file_type, items): file_type
+            for file_type, items in by_product_line.items()
+        }
+        for future in as_completed(futures):
+            file_type = futures[future]
+            for file_name, messages, error in future.result():
+                yield file_name, file_type, messages, error
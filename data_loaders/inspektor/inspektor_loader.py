@@ -3,6 +3,8 @@ from sqlalchemy import create_engine
 from dotenv import load_dotenv
 import os
 from data_loaders.validation_utils import validate_file_format
+from data_loaders.excel_utils import read_vendor_excel
+from data_loaders.parsing_utils import parse_amount, parse_percent, parse_dates, date_parts
 
 # Load environment variables
 load_dotenv()
@@ -30,7 +32,7 @@ def load_excel_file_inspektor(filepath: str) -> pd.DataFrame:
       9. Rename "Name" column to "Sales Rep Name".
     """
     # Read the Excel file starting from the correct header row
-    raw_df = pd.read_excel(filepath, header=0)
+    raw_df = read_vendor_excel(filepath, header=0)
     # Run validation on the raw DataFrame
     is_valid, missing = validate_file_format(raw_df, "InspeKtor")
     if not is_valid:
@@ -49,14 +51,15 @@ def load_excel_file_inspektor(filepath: str) -> pd.DataFrame:
     df = df[df["Name"].astype(str).str.strip() != ""]
     
     # 3. Convert "Date" to YYYY-MM-DD format and rename to "Revenue Recognition Date"
-    df["Date"] = pd.to_datetime(df["Date"], format="%m/%d/%Y").dt.strftime("%Y-%m-%d")
-    df["Revenue Recognition Date"] = df["Date"]
+    date_text, year_text, month_text = date_parts(parse_dates(df["Date"], format="%m/%d/%Y", errors="raise"))
+    df["Date"] = date_text
+    df["Revenue Recognition Date"] = date_text
     
-    # 4. Add "Revenue Recognition Date YYYY": first 4 characters from "Revenue Recognition Date" (the year).
-    df["Revenue Recognition Date YYYY"] = df["Revenue Recognition Date"].str[:4]
+    # 4. Add "Revenue Recognition Date YYYY" (the year).
+    df["Revenue Recognition Date YYYY"] = year_text
     
-    # 5. Add "Revenue Recognition Date MM": 6th and 7th characters from "Revenue Recognition Date" (the month).
-    df["Revenue Recognition Date MM"] = df["Revenue Recognition Date"].str[5:7]
+    # 5. Add "Revenue Recognition Date MM" (the month).
+    df["Revenue Recognition Date MM"] = month_text
     
     # Reorder columns: Move Revenue Recognition Date fields together
     cols = df.columns.tolist()
@@ -80,13 +83,11 @@ def load_excel_file_inspektor(filepath: str) -> pd.DataFrame:
     for col in ["Total", "Formula"]:
         if col in df.columns:
             # Remove dollar signs and thousand separators (commas)
-            df[col] = df[col].astype(str).str.replace("$", "", regex=False).str.replace(",", "", regex=False)
-            df[col] = pd.to_numeric(df[col], errors="coerce").round(2)
+            df[col] = parse_amount(df[col]).round(2)
     
     # 8. Convert "Commission %" from percentage to a factor (e.g., "7.0%" -> 0.07).
     if "Commission %" in df.columns:
-        df["Commission %"] = df["Commission %"].astype(str).str.replace("%", "", regex=False)
-        df["Commission %"] = pd.to_numeric(df["Commission %"], errors="coerce") / 100
+        df["Commission %"] = parse_percent(df["Commission %"], fraction=True)
     
     # 9. Rename "Name" column to "Sales Rep Name".
     df = df.rename(columns={"Name": "Sales Rep Name"})
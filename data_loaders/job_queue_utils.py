@@ -0,0 +1,320 @@
+import os
+import socket
+import threading
+from contextlib import contextmanager
+import pandas as pd
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
+from dotenv import load_dotenv
+from data_loaders.parse_cache_utils import frame_to_bytes, frame_from_bytes
+
+# Load environment variables
+load_dotenv()
+
+DATABASE_URL = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@" \
+               f"{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+
+UPLOAD_JOBS_TABLE = "upload_jobs"
+UPLOAD_JOB_STAGES_TABLE = "upload_job_stages"
+
+# Pipeline run by the worker for each upload job, in order.
+JOB_STAGES = ["save", "harmonise", "tier_2", "refresh"]
+
+# A running job's worker updates its heartbeat this often; jobs whose heartbeat is older than
+# UPLOAD_JOB_STALE_SECONDS belong to a worker that stopped and are marked failed.
+UPLOAD_JOB_HEARTBEAT_SECONDS = float(os.getenv("UPLOAD_JOB_HEARTBEAT_SECONDS", "30"))
+UPLOAD_JOB_STALE_SECONDS = float(os.getenv("UPLOAD_JOB_STALE_SECONDS", "300"))
+
+# Identifies this worker process in upload_jobs.worker_id.
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+def get_db_connection():
+    """Create a database connection."""
+    engine = create_engine(DATABASE_URL)
+    return engine
+
+def ensure_job_tables(conn):
+    """Create the upload job tables if they do not exist yet."""
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {UPLOAD_JOBS_TABLE} (
+            id              BIGSERIAL PRIMARY KEY,
+            file_name       TEXT NOT NULL,
+            file_type       TEXT NOT NULL,
+            payload_format  TEXT NOT NULL,
+            payload         BYTEA,
+            status          TEXT NOT NULL DEFAULT 'queued',
+            created_by      TEXT,
+            created_at      TIMESTAMP NOT NULL DEFAULT NOW(),
+            started_at      TIMESTAMP,
+            finished_at     TIMESTAMP,
+            error           TEXT,
+            worker_id       TEXT,
+            heartbeat_at    TIMESTAMP
+        )
+    """))
+    # Tables created before heartbeats were tracked
+    conn.execute(text(f"""
+        ALTER TABLE {UPLOAD_JOBS_TABLE}
+        ADD COLUMN IF NOT EXISTS worker_id TEXT,
+        ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP
+    """))
+    conn.execute(text(f"""
+        CREATE INDEX IF NOT EXISTS idx_{UPLOAD_JOBS_TABLE}_status
+        ON {UPLOAD_JOBS_TABLE} (status, id)
+    """))
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {UPLOAD_JOB_STAGES_TABLE} (
+            job_id       BIGINT NOT NULL REFERENCES {UPLOAD_JOBS_TABLE} (id) ON DELETE CASCADE,
+            stage        TEXT NOT NULL,
+            status       TEXT NOT NULL,
+            started_at   TIMESTAMP,
+            finished_at  TIMESTAMP,
+            log          TEXT,
+            PRIMARY KEY (job_id, stage)
+        )
+    """))
+
+def enqueue_upload_job(df: pd.DataFrame, file_name: str, file_type: str, created_by: str = None) -> int:
+    """Queue a parsed upload for the background worker and return the job id."""
+    payload_format, payload = frame_to_bytes(df)
+    engine = get_db_connection()
+    try:
+        with engine.begin() as conn:
+            ensure_job_tables(conn)
+            job_id = conn.execute(text(f"""
+                INSERT INTO {UPLOAD_JOBS_TABLE} (file_name, file_type, payload_format, payload, created_by)
+                VALUES (:file_name, :file_type, :payload_format, :payload, :created_by)
+                RETURNING id
+            """), {
+                "file_name": file_name,
+                "file_type": file_type,
+                "payload_format": payload_format,
+                "payload": payload,
+                "created_by": created_by,
+            }).scalar()
+            conn.execute(text(f"""
+                INSERT INTO {UPLOAD_JOB_STAGES_TABLE} (job_id, stage, status)
+                SELECT :job_id, stage, 'pending' FROM UNNEST(CAST(:stages AS TEXT[])) AS stage
+            """), {"job_id": job_id, "stages": JOB_STAGES})
+        return job_id
+    finally:
+        engine.dispose()
+
+def claim_next_job():
+    """
+    Mark the oldest queued job as running by this worker and return it as a dict (None if the
+    queue is empty). FOR UPDATE SKIP LOCKED lets several workers poll the same table without
+    taking the same job. Jobs of a product line that already has a live running job are left
+    queued, so another worker picks up a different product line instead of waiting on
+    product_line_lock. The job tables are created by fail_interrupted_jobs at worker start.
+    """
+    engine = get_db_connection()
+    try:
+        with engine.begin() as conn:
+            row = conn.execute(text(f"""
+                UPDATE {UPLOAD_JOBS_TABLE}
+                SET status = 'running', started_at = NOW(), worker_id = :worker_id, heartbeat_at = NOW()
+                WHERE id = (
+                    SELECT queued.id FROM {UPLOAD_JOBS_TABLE} AS queued
+                    WHERE queued.status = 'queued'
+                      AND NOT EXISTS (
+                          SELECT 1 FROM {UPLOAD_JOBS_TABLE} AS running
+                          WHERE running.status = 'running'
+                            AND running.file_type = queued.file_type
+                            AND COALESCE(running.heartbeat_at, running.started_at)
+                                >= NOW() - MAKE_INTERVAL(secs => :stale_seconds)
+                      )
+                    ORDER BY queued.id
+                    FOR UPDATE OF queued SKIP LOCKED
+                    LIMIT 1
+                )
+                RETURNING id, file_name, file_type, payload_format, payload
+            """), {"worker_id": WORKER_ID, "stale_seconds": UPLOAD_JOB_STALE_SECONDS}).mappings().first()
+            return dict(row) if row else None
+    finally:
+        engine.dispose()
+
+@contextmanager
+def product_line_lock(file_type: str):
+    """
+    Hold a Postgres advisory lock for one product line while the block runs, so two jobs of the
+    same product line never interleave their save, harmonise (delete + insert), tier 2 and
+    refresh stages, even when claimed by different workers at the same moment. The lock is held
+    by a dedicated connection and is released with it if the worker dies.
+    """
+    params = {"lock_key": f"{UPLOAD_JOBS_TABLE}:{file_type}"}
+    engine = get_db_connection()
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(hashtext(:lock_key))"), params)
+            conn.commit()
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(hashtext(:lock_key))"), params)
+                conn.commit()
+    finally:
+        engine.dispose()
+
+def _update_stage(job_id: int, stage: str, status: str, log: str = None):
+    engine = get_db_connection()
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f"""
+                UPDATE {UPLOAD_JOB_STAGES_TABLE}
+                SET status = :status,
+                    log = COALESCE(:log, log),
+                    started_at = CASE WHEN :status = 'running' THEN NOW() ELSE started_at END,
+                    finished_at = CASE WHEN :status IN ('succeeded', 'failed') THEN NOW() ELSE finished_at END
+                WHERE job_id = :job_id AND stage = :stage
+            """), {"job_id": job_id, "stage": stage, "status": status, "log": log})
+    finally:
+        engine.dispose()
+
+def _finish_job(job_id: int, status: str, error: str = None):
+    engine = get_db_connection()
+    try:
+        with engine.begin() as conn:
+            # The payload is no longer needed once the job has run.
+            conn.execute(text(f"""
+                UPDATE {UPLOAD_JOBS_TABLE}
+                SET status = :status, finished_at = NOW(), error = :error, payload = NULL
+                WHERE id = :job_id
+            """), {"job_id": job_id, "status": status, "error": error})
+    finally:
+        engine.dispose()
+
+def _send_heartbeats(job_id: int, stop: threading.Event):
+    """Update the job's heartbeat until stop is set, so other workers know it is still running."""
+    while not stop.wait(UPLOAD_JOB_HEARTBEAT_SECONDS):
+        engine = get_db_connection()
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(f"""
+                    UPDATE {UPLOAD_JOBS_TABLE} SET heartbeat_at = NOW()
+                    WHERE id = :job_id AND status = 'running'
+                """), {"job_id": job_id})
+        except SQLAlchemyError as e:
+            print(f"⚠️ Could not update the heartbeat of upload job {job_id}: {e}")
+        finally:
+            engine.dispose()
+
+def _run_stages(job: dict):
+    # Imported here so the page can queue jobs without loading every vendor loader.
+    from data_loaders.ingest_utils import DB_UTILS, MASTER_TABLES, has_failed_messages
+    from data_loaders.refresh_utils import refresh_derived_data
+
+    job_id = job["id"]
+    file_type = job["file_type"]
+    if file_type not in DB_UTILS:
+        _finish_job(job_id, "failed", f"No save function defined for file type: {file_type}")
+        return "failed"
+
+    db_utils = DB_UTILS[file_type]
+    table_name = MASTER_TABLES[file_type]
+    df = frame_from_bytes(job["payload_format"], bytes(job["payload"]))
+    stage_functions = {
+        "save": lambda: db_utils.save_dataframe_to_db(df, table_name),
+        "harmonise": lambda: db_utils.update_harmonised_table(table_name),
+        "tier_2": db_utils.update_commission_tier_2_date,
+        "refresh": lambda: refresh_derived_data(table_name),
+    }
+
+    with product_line_lock(file_type):
+        for stage in JOB_STAGES:
+            _update_stage(job_id, stage, "running")
+            try:
+                messages = stage_functions[stage]() or []
+            except Exception as e:
+                messages = [f"❌ {stage} failed: {e}"]
+            failed = has_failed_messages(messages)
+            _update_stage(job_id, stage, "failed" if failed else "succeeded", "\n".join(map(str, messages)))
+            if failed:
+                _finish_job(job_id, "failed", f"Stage '{stage}' failed.")
+                return "failed"
+
+    _finish_job(job_id, "succeeded")
+    return "succeeded"
+
+def run_job(job: dict):
+    """
+    Run the save -> harmonise -> tier 2 -> refresh pipeline for a claimed job under its product
+    line's lock (see product_line_lock), recording the status and debug messages of every stage.
+    A stage fails when it raises or reports a ❌ message; later stages are then skipped.
+    Anything else that goes wrong (unreadable payload, lost database connection) fails the job
+    instead of leaving it 'running'. Returns the final job status.
+    """
+    stop_heartbeats = threading.Event()
+    heartbeats = threading.Thread(target=_send_heartbeats, args=(job["id"], stop_heartbeats), daemon=True)
+    heartbeats.start()
+    try:
+        return _run_stages(job)
+    except Exception as e:
+        print(f"❌ Upload job {job['id']} failed: {e}")
+        try:
+            _finish_job(job["id"], "failed", str(e))
+        except Exception as finish_error:
+            # Left 'running'; fail_interrupted_jobs fails it once its heartbeat is stale.
+            print(f"❌ Could not mark upload job {job['id']} as failed: {finish_error}")
+        return "failed"
+    finally:
+        stop_heartbeats.set()
+
+def run_once() -> bool:
+    """Claim and run one queued job. Returns False when the queue was empty."""
+    job = claim_next_job()
+    if job is None:
+        return False
+    print(f"Running upload job {job['id']} ({job['file_type']}: {job['file_name']})")
+    status = run_job(job)
+    print(f"Upload job {job['id']} {status}.")
+    return True
+
+def fail_interrupted_jobs():
+    """
+    Mark jobs left 'running' by a worker that stopped (crash, restart) as failed so they are
+    visible on the page instead of hanging. A job only counts as interrupted once its heartbeat
+    is older than UPLOAD_JOB_STALE_SECONDS, so jobs of other live workers are left alone.
+    Also creates the job tables. Called when a worker starts and while it is idle.
+    """
+    engine = get_db_connection()
+    try:
+        with engine.begin() as conn:
+            ensure_job_tables(conn)
+            conn.execute(text(f"""
+                UPDATE {UPLOAD_JOBS_TABLE}
+                SET status = 'failed', finished_at = NOW(), error = 'Interrupted: the worker stopped while running this job.'
+                WHERE status = 'running'
+                  AND COALESCE(heartbeat_at, started_at) < NOW() - MAKE_INTERVAL(secs => :stale_seconds)
+            """), {"stale_seconds": UPLOAD_JOB_STALE_SECONDS})
+    except SQLAlchemyError as e:
+        print(f"❌ Error marking interrupted upload jobs: {e}")
+    finally:
+        engine.dispose()
+
+def get_jobs_status(job_ids: list):
+    """
+    Return the status of the given jobs.
+
+    Returns:
+        Tuple of DataFrames (jobs, stages) ordered by job id and pipeline stage.
+    """
+    engine = get_db_connection()
+    try:
+        with engine.begin() as conn:
+            ensure_job_tables(conn)
+            jobs = pd.read_sql_query(text(f"""
+                SELECT id, file_name, file_type, status, created_at, started_at, finished_at, error
+                FROM {UPLOAD_JOBS_TABLE}
+                WHERE id = ANY(:job_ids)
+                ORDER BY id
+            """), conn, params={"job_ids": list(job_ids)})
+            stages = pd.read_sql_query(text(f"""
+                SELECT job_id, stage, status, started_at, finished_at, log
+                FROM {UPLOAD_JOB_STAGES_TABLE}
+                WHERE job_id = ANY(:job_ids)
+                ORDER BY job_id, ARRAY_POSITION(CAST(:stages AS TEXT[]), stage)
+            """), conn, params={"job_ids": list(job_ids), "stages": JOB_STAGES})
+        return jobs, stages
+    finally:
+        engine.dispose()
@@ -189,15 +189,6 @@ def save_dataframe_to_db(df: pd.DataFrame, table_name: str = "master_logiquip_sa
             df.to_sql(table_name, con=engine, if_exists="append", index=False)
             debug_messages.append(f"✅ Added {len(df)} new records to '{table_name}'.")
 
-        # If the table is 'master_logiquip_sales', update the harmonised table
-        if table_name == "master_logiquip_sales":
-            harmonised_messages = update_harmonised_table("master_logiquip_sales")
-            debug_messages.extend(harmonised_messages)
-            
-            # Now, after updating the harmonised table, update Commission tier 2 date.
-            commission_tier_2_messages = update_commission_tier_2_date()
-            debug_messages.extend(commission_tier_2_messages)
-
     except SQLAlchemyError as e:
         error_msg = f"❌ Error saving data to '{table_name}': {e}"
         print(error_msg)
@@ -3,6 +3,10 @@ from sqlalchemy import create_engine
 from dotenv import load_dotenv
 import os
 from data_loaders.validation_utils import validate_file_format
+from data_loaders.excel_utils import read_vendor_excel
+from data_loaders.parsing_utils import parse_amount, parse_percent, canonical_id, parse_dates, date_parts
+from data_loaders.sales_rep_utils import resolve_sales_reps
+from data_loaders.reference_cache_utils import load_reference_table
 
 # Load environment variables
 load_dotenv()
@@ -16,28 +20,24 @@ def get_db_connection():
 
 def load_master_sales_rep():
     """Load the master_sales_rep table from the database."""
-    query = """
-        SELECT "Source", "Customer field", "Data field value", "Sales Rep name", "Valid from", "Valid until"
-        FROM master_sales_rep
-        WHERE "Source" = 'Logiquip'
-    """
-    engine = get_db_connection()
     try:
-        with engine.connect() as conn:
-            master_df = pd.read_sql_query(query, conn)
+        # Cached per process and re-read only when master_sales_rep is edited
+        master_df = load_reference_table("master_sales_rep")
+        master_df = master_df.loc[
+            master_df["Source"] == "Logiquip",
+            ["Source", "Customer field", "Data field value", "Sales Rep name", "Valid from", "Valid until"]
+        ].reset_index(drop=True)
         # Convert date columns to datetime
         master_df["Valid from"] = pd.to_datetime(master_df["Valid from"], errors='coerce')
         master_df["Valid until"] = pd.to_datetime(master_df["Valid until"], errors='coerce')
         return master_df
     except Exception as e:
         raise RuntimeError(f"Error loading master_sales_rep table: {e}")
-    finally:
-        engine.dispose()
 
 def load_excel_file_logiquip(filepath: str) -> pd.DataFrame:
     # Read the Excel file with converters to preserve original format
     pd.set_option('display.max_columns', None)
-    raw_df = pd.read_excel(filepath, header=1)
+    raw_df = read_vendor_excel(filepath, header=1)
     # Run validation on the raw DataFrame
     is_valid, missing = validate_file_format(raw_df, "Logiquip")
     if not is_valid:
@@ -64,56 +64,40 @@ def load_excel_file_logiquip(filepath: str) -> pd.DataFrame:
     
     # Handle NaN values in "Rep" column
     if "Rep" in df.columns:
-        df["Rep"] = df["Rep"].apply(lambda x: str(int(float(x))) if pd.notnull(x)
-                                         and isinstance(x, (int, float, str))
-                                         and str(x).replace('.','',1).isdigit()
-                       else str(x))
+        df["Rep"] = canonical_id(df["Rep"])
 
     # Convert "Comm Rate" from strings like "7,0%" to floats like 0.07
     if "Comm Rate" in df.columns:
-        df["Comm Rate"] = (
-            df["Comm Rate"].astype(str)
-            .str.replace("%", "", regex=False)
-            .str.replace(",", ".", regex=False)
-        )
-        df["Comm Rate"] = pd.to_numeric(df["Comm Rate"], errors='coerce') / 100
+        df["Comm Rate"] = parse_percent(df["Comm Rate"], decimal_comma=True, fraction=True)
     
     # Fix the "Ship To Zip" column to ensure no trailing zeros
     if "Ship To Zip" in df.columns:
-        df["Ship To Zip"] = df["Ship To Zip"].apply(lambda x: str(int(float(x))) if isinstance(x, str) and x.replace('.', '', 1).isdigit() else x)
+        df["Ship To Zip"] = canonical_id(df["Ship To Zip"], keep_other=True)
     
     # ✅ Handle "Date Paid" column and rename to "Revenue Recognition Date"
     if "Date Paid" in df.columns:
         # Convert "Date Paid" to datetime and handle errors
-        df["Revenue Recognition Date"] = pd.to_datetime(df["Date Paid"], format="%m-%d-%Y", errors='coerce')
+        date_paid = parse_dates(df["Date Paid"], format="%m-%d-%Y")
         
         # Forward-fill <NA> values in "Revenue Recognition Date"
-        df["Revenue Recognition Date"] = df["Revenue Recognition Date"].fillna(method="ffill")
+        date_paid = date_paid.ffill()
         
         # Create the reformatted "Revenue Recognition Date" column in "YYYY-MM-DD" format
-        df["Revenue Recognition Date"] = df["Revenue Recognition Date"].dt.strftime('%Y-%m-%d')
+        date_text, _, month_text = date_parts(date_paid)
+        df["Revenue Recognition Date"] = date_text
 
         # Extract year and month from "Revenue Recognition Date"
-        df["Revenue Recognition YYYY"] = pd.to_datetime(df["Revenue Recognition Date"], errors='coerce').dt.year.astype("Int64")
-        df["Revenue Recognition MM"] = pd.to_datetime(df["Revenue Recognition Date"], errors='coerce').dt.month.apply(
-            lambda x: f"{int(x):02d}" if pd.notnull(x) else ""
-        )
+        df["Revenue Recognition YYYY"] = date_paid.dt.year.astype("Int64")
+        df["Revenue Recognition MM"] = month_text.fillna("")
         
         # Drop the original "Date Paid" column
         df = df.drop(columns=["Date Paid"])
 
-    # Convert numeric columns and ensure proper formatting
+    # Convert numeric columns, rounded to two decimals (kept as numbers, formatted when displayed)
     numeric_columns = ["Comm Amt", "Doc Amt"]
     for column in numeric_columns:
         if column in df.columns:
-            df[column] = (
-                df[column].astype(str)
-                .str.replace(",", "", regex=False)
-                .str.replace("$", "", regex=False)
-                .str.strip()
-            )
-            df[column] = pd.to_numeric(df[column], errors='coerce')
-            df[column] = df[column].map(lambda x: f"{x:.2f}" if pd.notnull(x) else "")
+            df[column] = parse_amount(df[column]).round(2)
     
     # Remove rows where "Comm Rate" is empty
     if "Comm Rate" in df.columns:
@@ -137,19 +121,13 @@ def load_excel_file_logiquip(filepath: str) -> pd.DataFrame:
     # ✅ Populate the "Sales Rep Name" column based on the master_sales_rep table
     master_df = load_master_sales_rep()
 
-    def enrich_sales_rep(row):
-        # Match "SteppingStone" and "Revenue Recognition Date" with master file criteria
-        match = master_df[
-            (master_df["Data field value"] == row["SteppingStone"]) &
-            (master_df["Valid from"] <= row["Revenue Recognition Date"]) &
-            ((master_df["Valid until"].isna()) | (master_df["Valid until"] >= row["Revenue Recognition Date"]))
-        ]
-        if not match.empty:
-            return match.iloc[0]["Sales Rep name"]
-        return None
-
     if "SteppingStone" in df.columns and "Revenue Recognition Date" in df.columns:
-        df["Sales Rep Name"] = df.apply(enrich_sales_rep, axis=1)
+        # Match "SteppingStone" on the master entries valid on the "Revenue Recognition Date"
+        df["Sales Rep Name"], unmatched = resolve_sales_reps(
+            master_df, df["SteppingStone"], dates=df["Revenue Recognition Date"]
+        )
+        if unmatched:
+            print(f"⚠️ No Sales Rep found for {len(unmatched)} SteppingStone values: {', '.join(unmatched[:10])}")
 
     # ✅ Reorder columns to place "Sales Rep Name" before "SteppingStone"
     if "Sales Rep Name" in df.columns and "SteppingStone" in df.columns:
@@ -4,6 +4,10 @@ from dotenv import load_dotenv
 import os
 import re
 from data_loaders.validation_utils import validate_file_format
+from data_loaders.excel_utils import read_vendor_excel
+from data_loaders.parsing_utils import parse_amount, parse_percent, is_text, parse_dates, date_parts
+from data_loaders.sales_rep_utils import resolve_sales_reps
+from data_loaders.reference_cache_utils import load_reference_table
 
 # Load environment variables
 load_dotenv()
@@ -17,23 +21,19 @@ def get_db_connection():
 
 def load_master_sales_rep():
     """Load the master_sales_rep table from the database."""
-    query = """
-        SELECT "Source", "Customer field", "Data field value", "Sales Rep name", "Valid from", "Valid until"
-        FROM master_sales_rep
-        WHERE "Source" = 'NOVO DIRECT'
-    """
-    engine = get_db_connection()
     try:
-        with engine.connect() as conn:
-            master_df = pd.read_sql_query(query, conn)
+        # Cached per process and re-read only when master_sales_rep is edited
+        master_df = load_reference_table("master_sales_rep")
+        master_df = master_df.loc[
+            master_df["Source"] == "NOVO DIRECT",
+            ["Source", "Customer field", "Data field value", "Sales Rep name", "Valid from", "Valid until"]
+        ].reset_index(drop=True)
         # Convert date columns to datetime
         master_df["Valid from"] = pd.to_datetime(master_df["Valid from"], errors='coerce')
         master_df["Valid until"] = pd.to_datetime(master_df["Valid until"], errors='coerce')
         return master_df
     except Exception as e:
         raise RuntimeError(f"Error loading master_sales_rep table: {e}")
-    finally:
-        engine.dispose()
 
 def load_excel_file_novo(filepath: str, year: str = None, month: str = None) -> pd.DataFrame:
     """
@@ -75,7 +75,7 @@ def load_excel_file_novo(filepath: str, year: str = None, month: str = None) ->
     }
     
     # Skip the first column (colA) which is empty
-    raw_df = pd.read_excel(filepath, header=2, converters=converters, usecols=lambda x: x != "Unnamed: 0")
+    raw_df = read_vendor_excel(filepath, header=2, converters=converters, usecols=lambda x: x != "Unnamed: 0")
     
     # If Unnamed:0 still appears, explicitly drop it
     if "Unnamed: 0" in raw_df.columns:
@@ -92,20 +92,19 @@ def load_excel_file_novo(filepath: str, year: str = None, month: str = None) ->
     # Handle "Invoice Date" column - now becomes "Revenue Recognition Date"
     if "Invoice Date" in df.columns:
         # Format "Invoice Date" to "YYYY-MM-DD" string format if it's not already
-        df["Revenue Recognition Date"] = pd.to_datetime(df["Invoice Date"], errors='coerce').dt.strftime('%Y-%m-%d')
-        
-        # Extract "Revenue Recognition Date YYYY" - first 4 characters of the date string
-        df["Revenue Recognition Date YYYY"] = df["Revenue Recognition Date"].str[:4]
+        date_text, year_text, month_text = date_parts(parse_dates(df["Invoice Date"]))
+        df["Revenue Recognition Date"] = date_text
         
-        # Extract "Revenue Recognition Date MM" - characters between the first and second hyphen
-        df["Revenue Recognition Date MM"] = df["Revenue Recognition Date"].str[5:7]
+        # Add "Revenue Recognition Date YYYY" and "Revenue Recognition Date MM"
+        df["Revenue Recognition Date YYYY"] = year_text
+        df["Revenue Recognition Date MM"] = month_text
         
         # Drop the original "Invoice Date" column
         df = df.drop(columns=["Invoice Date"])
 
     # Format Order Date to "YYYY-MM-DD" string format
     if "Order Date" in df.columns:
-        df["Order Date"] = pd.to_datetime(df["Order Date"], errors='coerce').dt.strftime('%Y-%m-%d')
+        df["Order Date"], _, _ = date_parts(parse_dates(df["Order Date"]))
     
     # Add the Commission Date columns based on user selection
     df["Commission Date"] = commission_date_str
@@ -115,9 +114,7 @@ def load_excel_file_novo(filepath: str, year: str = None, month: str = None) ->
     # Preserve the original format of Customer PO Number
     if "Customer PO Number" in df.columns:
         # Simply ensure it's a string but don't convert scientific notation to full numbers
-        df["Customer PO Number"] = df["Customer PO Number"].apply(
-            lambda x: "" if pd.isna(x) else str(x)
-        )
+        df["Customer PO Number"] = df["Customer PO Number"].astype(str).where(df["Customer PO Number"].notna(), "")
     
     text_columns = [
         "Customer Number", "Invoice Number", "Sales Order Number", 
@@ -126,9 +123,7 @@ def load_excel_file_novo(filepath: str, year: str = None, month: str = None) ->
     
     for col in text_columns:
         if col in df.columns:
-            df[col] = df[col].apply(
-                lambda x: str(x) if pd.notnull(x) else ""
-            )
+            df[col] = df[col].astype(str).where(df[col].notna(), "")
     
     # Convert numeric columns to float with 2 decimal places
     numeric_columns = [
@@ -140,70 +135,41 @@ def load_excel_file_novo(filepath: str, year: str = None, month: str = None) ->
         if col in df.columns:
             # Special handling for Commission Percentage
             if col == "Commission Percentage":
-                # Create a temporary series to handle percentage values
-                temp_series = pd.Series(index=df.index)
-                
-                for idx, value in df[col].items():
-                    if pd.isna(value):
-                        temp_series[idx] = 0
-                    elif isinstance(value, str) and '%' in value:
-                        # If it's already in percentage format with % sign
-                        try:
-                            # Remove % sign and convert to decimal
-                            cleaned_value = value.replace('%', '').strip().replace(',', '.')
-                            temp_series[idx] = float(cleaned_value) / 100
-                        except (ValueError, TypeError):
-                            temp_series[idx] = 0
-                    elif isinstance(value, (int, float)) or (isinstance(value, str) and value.replace('.', '', 1).isdigit()):
-                        # If it's a numeric value
-                        try:
-                            numeric_value = float(value)
-                            # If the value is too large (likely already divided), use it directly
-                            if numeric_value < 1:
-                                temp_series[idx] = round(numeric_value, 4)
-                            else:
-                                # Otherwise assume it's a percentage value (e.g., 5 for 5%)
-                                temp_series[idx] = round(numeric_value / 100, 4)
-                        except (ValueError, TypeError):
-                            temp_series[idx] = 0
-                    else:
-                        temp_series[idx] = 0
-                
-                # Replace the original column with our fixed values
-                df[col] = temp_series
+                values = df[col]
+                text = values.astype(str)
+                text_cells = is_text(values)
+                with_sign = text_cells & text.str.contains("%", regex=False)
+                digits = text_cells & text.str.replace(".", "", n=1, regex=False).str.isdigit()
+
+                # Numbers and digit strings: below 1 they are already a fraction,
+                # otherwise assume a percentage value (e.g., 5 for 5%)
+                is_number = values.map(lambda value: isinstance(value, (int, float)))
+                numbers = values.astype(object).where(is_number).astype(float)
+                numbers[digits] = text[digits].astype(float)
+                numbers = numbers.where(numbers < 1, numbers / 100)
+                # Python's round() (correctly rounded halves), not Series.round()
+                percentages = pd.Series([round(x, 4) for x in numbers], index=df.index)
+
+                # Values with a % sign ("5%", "7,5%") are converted to a decimal as written
+                percentages[with_sign] = parse_percent(values[with_sign], decimal_comma=True, fraction=True)
+
+                # Empty and unreadable values become 0
+                df[col] = percentages.fillna(0)
             else:
                 # For other numeric columns
-                # Remove $ and commas from monetary values
-                if df[col].dtype == object:  # If it's a string/object column
-                    df[col] = df[col].apply(
-                        lambda x: x.replace('$', '').replace(',', '') if isinstance(x, str) else x
-                    )
-                
-                # Convert to numeric and round to 2 decimal places
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).round(2)
+                # Remove $ and commas from monetary values, convert to numeric and round to 2 decimal places
+                df[col] = parse_amount(df[col]).fillna(0).round(2)
     
     # Add Sales Rep Name based on Customer Number lookup
     master_df = load_master_sales_rep()
     
-    def lookup_sales_rep(customer_number):
-        """Look up the Sales Rep Name for a given Customer Number."""
-        if pd.isna(customer_number) or customer_number == "":
-            return ""
-            
-        # Find matches in master_sales_rep where Customer field is 'Customer Number'
-        # and Data field value matches the customer_number
-        matches = master_df[
-            (master_df["Customer field"] == "Customer Number") & 
-            (master_df["Data field value"] == str(customer_number))
-        ]
-        
-        if not matches.empty:
-            return matches.iloc[0]["Sales Rep name"]
-        
-        return ""
-    
     if "Customer Number" in df.columns:
-        df["Sales Rep Name"] = df["Customer Number"].apply(lookup_sales_rep)
+        # Match on master_sales_rep rows where Customer field is 'Customer Number'
+        df["Sales Rep Name"], unmatched = resolve_sales_reps(
+            master_df, df["Customer Number"], customer_field="Customer Number", skip_blank=True, default=""
+        )
+        if unmatched:
+            print(f"⚠️ No Sales Rep found for {len(unmatched)} Novo Customer Numbers: {', '.join(unmatched[:10])}")
     else:
         df["Sales Rep Name"] = ""
 
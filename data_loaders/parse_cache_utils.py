@@ -0,0 +1,96 @@
+import os
+import io
+import time
+import pickle
+import hashlib
+import pandas as pd
+from dotenv import load_dotenv
+from data_loaders.version_utils import get_data_versions
+
+# Load environment variables
+load_dotenv()
+
+# Directory holding the parsed output of uploaded files, one file per cache key.
+PARSE_CACHE_DIR = os.getenv("PARSE_CACHE_DIR", "parse_cache")
+
+# Cached parses older than this are removed the next time something is written to the cache.
+PARSE_CACHE_TTL_HOURS = int(os.getenv("PARSE_CACHE_TTL_HOURS", "24"))
+
+# Bump whenever a loader's output changes, so frames parsed by the previous code are not served.
+PARSE_CACHE_SCHEMA_VERSION = 2
+
+# Reference tables the loaders read (Sales Rep names, QuickBooks product lines). Their data
+# versions are part of the key, so editing them invalidates the cached parses.
+PARSE_CACHE_REFERENCE_TABLES = ["master_sales_rep", "service_to_product"]
+
+def make_parse_cache_key(file_bytes: bytes, file_type: str, *params) -> str:
+    """
+    Build the cache key for a parsed upload from the file content, the selected product line,
+    any other loader inputs (commission and revenue recognition dates), the loader schema version
+    and the data versions of the reference tables the loaders read.
+    """
+    digest = hashlib.sha256(file_bytes)
+    digest.update(file_type.encode("utf-8"))
+    digest.update(f"|schema={PARSE_CACHE_SCHEMA_VERSION}".encode("utf-8"))
+    for table_name, version in get_data_versions(PARSE_CACHE_REFERENCE_TABLES).items():
+        digest.update(f"|{table_name}={version}".encode("utf-8"))
+    for param in params:
+        digest.update(b"|" + str(param).encode("utf-8"))
+    return digest.hexdigest()
+
+def frame_to_bytes(df: pd.DataFrame):
+    """
+    Serialise a DataFrame, preferring Parquet and falling back to pickle for frames Arrow
+    cannot represent (e.g. object columns mixing numbers and text).
+    Returns a tuple (format, payload) with format "parquet" or "pickle".
+    """
+    try:
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, index=True)
+        return "parquet", buffer.getvalue()
+    except Exception:
+        return "pickle", pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+
+def frame_from_bytes(fmt: str, payload: bytes) -> pd.DataFrame:
+    """Inverse of frame_to_bytes."""
+    if fmt == "parquet":
+        return pd.read_parquet(io.BytesIO(payload))
+    return pickle.loads(payload)
+
+def _cache_path(key: str, fmt: str) -> str:
+    return os.path.join(PARSE_CACHE_DIR, f"{key}.{fmt}")
+
+def load_cached_frame(key: str):
+    """Return the cached DataFrame for a key, or None if the file has not been parsed yet."""
+    for fmt in ("parquet", "pickle"):
+        path = _cache_path(key, fmt)
+        if os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    return frame_from_bytes(fmt, f.read())
+            except Exception as e:
+                print(f"⚠️ Ignoring unreadable parse cache entry {path}: {e}")
+                return None
+    return None
+
+def save_cached_frame(key: str, df: pd.DataFrame):
+    """Store a parsed DataFrame under a key and prune expired entries."""
+    os.makedirs(PARSE_CACHE_DIR, exist_ok=True)
+    fmt, payload = frame_to_bytes(df)
+    path = _cache_path(key, fmt)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+    prune_parse_cache()
+
+def prune_parse_cache():
+    """Delete cache entries older than PARSE_CACHE_TTL_HOURS."""
+    cutoff = time.time() - PARSE_CACHE_TTL_HOURS * 3600
+    for name in os.listdir(PARSE_CACHE_DIR):
+        path = os.path.join(PARSE_CACHE_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
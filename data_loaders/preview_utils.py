@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+from data_loaders.validation_utils import check_for_blanks_with_details, check_for_amount_line_issues
+
+def find_row_issues(df: pd.DataFrame, file_type: str, rep_column: str = None, rep_options=None) -> dict:
+    """
+    Validate rows of an upload and return {row index: [issue, ...]} for the rows needing attention:
+    blank cells, Sales Reps that are not in rep_options, and QuickBooks 'Amount line' ≤ 0.
+    Can be called on the full frame or on a handful of edited rows.
+    """
+    issues = {}
+    for row, columns in check_for_blanks_with_details(df, file_type):
+        issues.setdefault(row, []).append(f"Blank: {', '.join(columns)}")
+
+    if rep_column in df.columns and rep_options is not None:
+        reps = df[rep_column]
+        unmatched = reps.notna() & (reps.astype(str).str.strip() != "") & ~reps.isin(list(rep_options))
+        for row, rep in reps[unmatched].items():
+            issues.setdefault(row, []).append(f"Unknown Sales Rep: {rep}")
+
+    if file_type == "QuickBooks":
+        # check_for_amount_line_issues reports row index + 1.
+        for row in check_for_amount_line_issues(df):
+            issues.setdefault(row - 1, []).append("Amount line ≤ 0")
+
+    return issues
+
+def diff_window(before: pd.DataFrame, after: pd.DataFrame) -> dict:
+    """Return the cells changed in an edited window as {row index: {column: new value}}."""
+    after = after.reindex(index=before.index, columns=before.columns)
+    unchanged = (before == after).to_numpy(dtype=bool, na_value=False) | (before.isna() & after.isna()).to_numpy()
+    changes = {}
+    for row_pos, col_pos in zip(*np.nonzero(~unchanged)):
+        changes.setdefault(before.index[row_pos], {})[before.columns[col_pos]] = after.iat[row_pos, col_pos]
+    return changes
+
+def merge_edit_delta(delta: dict, changes: dict):
+    """Fold the changes of one editor window into a file's row-level delta, in place."""
+    for row, values in changes.items():
+        delta.setdefault(row, {}).update(values)
+
+def apply_edit_delta(df: pd.DataFrame, delta: dict) -> pd.DataFrame:
+    """Return a copy of df (or of the rows of df given) with the recorded edits applied."""
+    df = df.copy()
+    for row, values in (delta or {}).items():
+        if row not in df.index:
+            continue
+        for column, value in values.items():
+            df.at[row, column] = value
+    return df
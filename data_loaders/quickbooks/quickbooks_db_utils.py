@@ -1,4 +1,7 @@
 import os
+import re
+import time
+import uuid
 import hashlib
 from sqlalchemy import create_engine, text, inspect
 from sqlalchemy.exc import SQLAlchemyError
@@ -13,6 +16,13 @@ DATABASE_URL = (
     f"@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
 )
 
+# Prefix of the per-upload staging tables that large QuickBooks exports are streamed into.
+QUICKBOOKS_STAGING_PREFIX = "staging_quickbooks_sales"
+
+# Staging tables older than this belong to abandoned uploads (closed tabs, expired sessions)
+# and are dropped by prune_staging_tables.
+QUICKBOOKS_STAGING_TTL_HOURS = int(os.getenv("QUICKBOOKS_STAGING_TTL_HOURS", "12"))
+
 def get_db_connection():
     """Create a database connection."""
     engine = create_engine(DATABASE_URL)
@@ -29,10 +39,130 @@ def generate_row_hash(row: pd.Series) -> str:
     row_data = ''.join([str(row[col]) for col in columns_to_hash if col in row]).encode('utf-8')
     return hashlib.sha256(row_data).hexdigest()
 
+def build_replace_condition(df: pd.DataFrame, engine, table_name: str, debug_messages: list) -> str:
+    """
+    Build the WHERE condition selecting the rows of table_name that the rows of df replace:
+    their Revenue Recognition (or Commission Date) periods, narrowed to their Product Lines.
+    Only the distinct period / Product Lines values of df are used. Messages go to debug_messages.
+    """
+    # Find which Revenue Recognition column names are used in this DataFrame
+    rev_year_col = None
+    rev_month_col = None
+
+    # Check for different variations of column names
+    for col in ["Revenue Recognition Date YYYY", "Revenue Recognition YYYY"]:
+        if col in df.columns:
+            rev_year_col = col
+            break
+
+    for col in ["Revenue Recognition Date MM", "Revenue Recognition MM"]:
+        if col in df.columns:
+            rev_month_col = col
+            break
+
+    if not rev_year_col or not rev_month_col:
+        # Handle missing Revenue Recognition columns - fallback to Commission Date
+        debug_messages.append("⚠️ Warning: Could not find Revenue Recognition Date year/month columns in the DataFrame.")
+
+        # Check if there are Commission Date columns to use as fallback
+        if "Commission Date YYYY" in df.columns and "Commission Date MM" in df.columns:
+            date_values = df[['Commission Date YYYY', 'Commission Date MM']].drop_duplicates().values.tolist()
+
+            # Convert the date_values into a filterable SQL condition
+            condition = " OR ".join(
+                [f'("Commission Date YYYY" = \'{yyyy}\' AND "Commission Date MM" = \'{mm}\')' 
+                 for yyyy, mm in date_values]
+            )
+
+            debug_messages.append("⚠️ Using Commission Date columns as fallback for deletion criteria.")
+        else:
+            # No date columns found - this may result in unintended behavior
+            debug_messages.append("❌ Error: No valid date columns found for deletion criteria.")
+            debug_messages.append("⚠️ Falling back to Product Line-based deletion to maintain data integrity.")
+
+            # For QuickBooks, we can safely delete and replace by Data Source in harmonised_table
+            # But for master_quickbooks_sales, we need an approach that won't delete everything
+
+            # Get unique product lines from the new data
+            if "Product Lines" in df.columns:
+                product_lines = df["Product Lines"].unique().tolist()
+                if product_lines:
+                    product_line_conditions = " OR ".join([f'"Product Lines" = \'{pl}\'' for pl in product_lines])
+                    condition = f"({product_line_conditions})"
+                else:
+                    condition = "1=0"  # Don't delete anything if no product lines found
+            else:
+                condition = "1=0"  # Don't delete anything if no product lines column
+    else:
+        # Use Revenue Recognition Date columns as intended
+        date_values = df[[rev_year_col, rev_month_col]].drop_duplicates().values.tolist()
+
+        # For database, we need to check which column names exist in the table
+        inspector = inspect(engine)
+        table_columns = [c["name"] for c in inspector.get_columns(table_name)]
+
+        # Find the matching column names in the database table
+        db_rev_year_col = None
+        db_rev_month_col = None
+
+        for col in table_columns:
+            # For year column
+            if col in ["Revenue Recognition Date YYYY", "Revenue Recognition YYYY"]:
+                db_rev_year_col = col
+            # For month column
+            if col in ["Revenue Recognition Date MM", "Revenue Recognition MM"]:
+                db_rev_month_col = col
+
+        if not db_rev_year_col or not db_rev_month_col:
+            debug_messages.append(f"⚠️ Warning: Revenue Recognition Date columns not found in table {table_name}.")
+            # Fallback to Commission Date columns in the database
+            if "Commission Date YYYY" in table_columns and "Commission Date MM" in table_columns:
+                condition = " OR ".join(
+                    [f'("Commission Date YYYY" = \'{yyyy}\' AND "Commission Date MM" = \'{mm}\')' 
+                     for yyyy, mm in date_values]
+                )
+                debug_messages.append("⚠️ Using Commission Date columns in database as fallback for deletion.")
+            else:
+                # No date columns found - this may result in unintended behavior
+                debug_messages.append("❌ Error: No valid date columns found in database for deletion.")
+                debug_messages.append("⚠️ Falling back to Product Line-based deletion to maintain data integrity.")
+
+                # For QuickBooks with dynamic product lines, we can try to delete by product line
+                product_lines_col = "Product Lines" if "Product Lines" in table_columns else None
+                if product_lines_col and "Product Lines" in df.columns:
+                    product_lines = df["Product Lines"].unique().tolist()
+                    if product_lines:
+                        product_line_conditions = " OR ".join([f'"{product_lines_col}" = \'{pl}\'' for pl in product_lines])
+                        condition = f"({product_line_conditions})"
+                    else:
+                        condition = "1=0"  # Don't delete anything if no product lines found
+                else:
+                    condition = "1=0"  # Don't delete anything if no product lines column
+        else:
+            # Build the condition using the actual column names from the database
+            condition = " OR ".join(
+                [f'("{db_rev_year_col}" = \'{yyyy}\' AND "{db_rev_month_col}" = \'{mm}\')' 
+                 for yyyy, mm in date_values]
+            )
+            debug_messages.append(f"✅ Using Revenue Recognition Date columns for deletion criteria ({len(date_values)} date combinations).")
+
+    # Special handling for QuickBooks - combine product lines with date condition if both are available
+    if "Product Lines" in df.columns and len(df["Product Lines"].unique()) > 1:
+        debug_messages.append(f"📊 QuickBooks has {len(df['Product Lines'].unique())} unique product lines.")
+
+        # If we're deleting by dates, it's safer to also consider product lines for QuickBooks
+        # This prevents deleting data from unrelated product lines that happen to have the same dates
+        if condition != "1=0":
+            product_lines = df["Product Lines"].unique().tolist()
+            product_line_conditions = " OR ".join([f'"Product Lines" = \'{pl}\'' for pl in product_lines])
+            condition = f"({condition}) AND ({product_line_conditions})"
+            debug_messages.append("✅ Enhanced deletion criteria with Product Lines for safety.")
+
+    return condition
+
 def save_dataframe_to_db(df: pd.DataFrame, table_name: str = "master_quickbooks_sales"):
     """
     Save data to the master_quickbooks_sales table by removing entries based on 'Revenue Recognition Date YYYY' and 'Revenue Recognition Date MM'.
-    Then, update the harmonised_table by mapping the new data and recalculating commission tier 2 dates.
     
     Returns a list of debug messages.
     """
@@ -44,118 +174,7 @@ def save_dataframe_to_db(df: pd.DataFrame, table_name: str = "master_quickbooks_
     
     try:
         with engine.connect() as conn:
-            # Find which Revenue Recognition column names are used in this DataFrame
-            rev_year_col = None
-            rev_month_col = None
-            
-            # Check for different variations of column names
-            for col in ["Revenue Recognition Date YYYY", "Revenue Recognition YYYY"]:
-                if col in df.columns:
-                    rev_year_col = col
-                    break
-            
-            for col in ["Revenue Recognition Date MM", "Revenue Recognition MM"]:
-                if col in df.columns:
-                    rev_month_col = col
-                    break
-            
-            if not rev_year_col or not rev_month_col:
-                # Handle missing Revenue Recognition columns - fallback to Commission Date
-                debug_messages.append("⚠️ Warning: Could not find Revenue Recognition Date year/month columns in the DataFrame.")
-                
-                # Check if there are Commission Date columns to use as fallback
-                if "Commission Date YYYY" in df.columns and "Commission Date MM" in df.columns:
-                    date_values = df[['Commission Date YYYY', 'Commission Date MM']].drop_duplicates().values.tolist()
-                    
-                    # Convert the date_values into a filterable SQL condition
-                    condition = " OR ".join(
-                        [f'("Commission Date YYYY" = \'{yyyy}\' AND "Commission Date MM" = \'{mm}\')' 
-                         for yyyy, mm in date_values]
-                    )
-                    
-                    debug_messages.append("⚠️ Using Commission Date columns as fallback for deletion criteria.")
-                else:
-                    # No date columns found - this may result in unintended behavior
-                    debug_messages.append("❌ Error: No valid date columns found for deletion criteria.")
-                    debug_messages.append("⚠️ Falling back to Product Line-based deletion to maintain data integrity.")
-                    
-                    # For QuickBooks, we can safely delete and replace by Data Source in harmonised_table
-                    # But for master_quickbooks_sales, we need an approach that won't delete everything
-                    
-                    # Get unique product lines from the new data
-                    if "Product Lines" in df.columns:
-                        product_lines = df["Product Lines"].unique().tolist()
-                        if product_lines:
-                            product_line_conditions = " OR ".join([f'"Product Lines" = \'{pl}\'' for pl in product_lines])
-                            condition = f"({product_line_conditions})"
-                        else:
-                            condition = "1=0"  # Don't delete anything if no product lines found
-                    else:
-                        condition = "1=0"  # Don't delete anything if no product lines column
-            else:
-                # Use Revenue Recognition Date columns as intended
-                date_values = df[[rev_year_col, rev_month_col]].drop_duplicates().values.tolist()
-                
-                # For database, we need to check which column names exist in the table
-                inspector = inspect(engine)
-                table_columns = [c["name"] for c in inspector.get_columns(table_name)]
-                
-                # Find the matching column names in the database table
-                db_rev_year_col = None
-                db_rev_month_col = None
-                
-                for col in table_columns:
-                    # For year column
-                    if col in ["Revenue Recognition Date YYYY", "Revenue Recognition YYYY"]:
-                        db_rev_year_col = col
-                    # For month column
-                    if col in ["Revenue Recognition Date MM", "Revenue Recognition MM"]:
-                        db_rev_month_col = col
-                
-                if not db_rev_year_col or not db_rev_month_col:
-                    debug_messages.append(f"⚠️ Warning: Revenue Recognition Date columns not found in table {table_name}.")
-                    # Fallback to Commission Date columns in the database
-                    if "Commission Date YYYY" in table_columns and "Commission Date MM" in table_columns:
-                        condition = " OR ".join(
-                            [f'("Commission Date YYYY" = \'{yyyy}\' AND "Commission Date MM" = \'{mm}\')' 
-                             for yyyy, mm in date_values]
-                        )
-                        debug_messages.append("⚠️ Using Commission Date columns in database as fallback for deletion.")
-                    else:
-                        # No date columns found - this may result in unintended behavior
-                        debug_messages.append("❌ Error: No valid date columns found in database for deletion.")
-                        debug_messages.append("⚠️ Falling back to Product Line-based deletion to maintain data integrity.")
-                        
-                        # For QuickBooks with dynamic product lines, we can try to delete by product line
-                        product_lines_col = "Product Lines" if "Product Lines" in table_columns else None
-                        if product_lines_col and "Product Lines" in df.columns:
-                            product_lines = df["Product Lines"].unique().tolist()
-                            if product_lines:
-                                product_line_conditions = " OR ".join([f'"{product_lines_col}" = \'{pl}\'' for pl in product_lines])
-                                condition = f"({product_line_conditions})"
-                            else:
-                                condition = "1=0"  # Don't delete anything if no product lines found
-                        else:
-                            condition = "1=0"  # Don't delete anything if no product lines column
-                else:
-                    # Build the condition using the actual column names from the database
-                    condition = " OR ".join(
-                        [f'("{db_rev_year_col}" = \'{yyyy}\' AND "{db_rev_month_col}" = \'{mm}\')' 
-                         for yyyy, mm in date_values]
-                    )
-                    debug_messages.append(f"✅ Using Revenue Recognition Date columns for deletion criteria ({len(date_values)} date combinations).")
-            
-            # Special handling for QuickBooks - combine product lines with date condition if both are available
-            if "Product Lines" in df.columns and len(df["Product Lines"].unique()) > 1:
-                debug_messages.append(f"📊 QuickBooks has {len(df['Product Lines'].unique())} unique product lines.")
-                
-                # If we're deleting by dates, it's safer to also consider product lines for QuickBooks
-                # This prevents deleting data from unrelated product lines that happen to have the same dates
-                if condition != "1=0":
-                    product_lines = df["Product Lines"].unique().tolist()
-                    product_line_conditions = " OR ".join([f'"Product Lines" = \'{pl}\'' for pl in product_lines])
-                    condition = f"({condition}) AND ({product_line_conditions})"
-                    debug_messages.append("✅ Enhanced deletion criteria with Product Lines for safety.")
+            condition = build_replace_condition(df, engine, table_name, debug_messages)
 
             # Delete existing records matching the specified condition
             delete_query = text(f"DELETE FROM {table_name} WHERE {condition}")
@@ -169,14 +188,129 @@ def save_dataframe_to_db(df: pd.DataFrame, table_name: str = "master_quickbooks_
             df.to_sql(table_name, con=engine, if_exists="append", index=False)
             debug_messages.append(f"✅ {len(df)} new records successfully added to '{table_name}'.")
 
-            # Update harmonised_table with the newly mapped QuickBooks data
-            harmonised_messages = update_harmonised_table(table_name)
-            debug_messages.extend(harmonised_messages)
-            
-            # Now update the Commission tier 2 date for QuickBooks data.
-            if table_name == "master_quickbooks_sales":
-                commission_tier_2_messages = update_commission_tier_2_date()
-                debug_messages.extend(commission_tier_2_messages)
+    except SQLAlchemyError as e:
+        error_message = str(e)
+        print(f"❌ Error saving data to '{table_name}': {error_message}")
+        debug_messages.append(f"❌ Error saving data to '{table_name}': {error_message}")
+    finally:
+        engine.dispose()
+
+    return debug_messages
+
+def create_staging_table(table_name: str = "master_quickbooks_sales") -> str:
+    """
+    Create an empty, unlogged staging table shaped like table_name for one streamed upload and
+    return its name. Chunks appended to it are coerced exactly as they would be by the master table.
+    The name holds the creation time, so abandoned staging tables can be pruned.
+    """
+    prune_staging_tables()
+    staging_table = f"{QUICKBOOKS_STAGING_PREFIX}_{int(time.time())}_{uuid.uuid4().hex[:12]}"
+    engine = get_db_connection()
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f"CREATE UNLOGGED TABLE {staging_table} (LIKE {table_name} INCLUDING DEFAULTS)"))
+    finally:
+        engine.dispose()
+    return staging_table
+
+def stream_to_staging(chunks, table_name: str = "master_quickbooks_sales", progress_callback=None,
+                      sample_rows: int = 200):
+    """
+    Write cleaned DataFrame chunks to a new staging table as they are produced, so only one
+    chunk is held in memory. Row hashes are added as in save_dataframe_to_db.
+    progress_callback, if given, is called with the number of rows written so far.
+
+    Returns:
+        Tuple (staging table name, rows written, DataFrame of the first sample_rows rows).
+    """
+    staging_table = create_staging_table(table_name)
+    rows = 0
+    sample = None
+    engine = get_db_connection()
+    try:
+        for df in chunks:
+            if df.empty:
+                continue
+            df["row_hash"] = df.apply(generate_row_hash, axis=1)
+            df.to_sql(staging_table, con=engine, if_exists="append", index=False)
+            if sample is None:
+                sample = df.head(sample_rows)
+            rows += len(df)
+            if progress_callback:
+                progress_callback(rows)
+    except Exception:
+        drop_staging_table(staging_table)
+        raise
+    finally:
+        engine.dispose()
+    return staging_table, rows, sample if sample is not None else pd.DataFrame()
+
+def drop_staging_table(staging_table: str):
+    """Drop a staging table (e.g. when its upload is abandoned)."""
+    engine = get_db_connection()
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {staging_table}"))
+    finally:
+        engine.dispose()
+
+def prune_staging_tables():
+    """
+    Drop the staging tables created more than QUICKBOOKS_STAGING_TTL_HOURS ago, and those whose
+    name holds no creation time. Return debug messages as a list.
+    """
+    debug_messages = []
+    cutoff = time.time() - QUICKBOOKS_STAGING_TTL_HOURS * 3600
+    pattern = re.compile(rf"^{QUICKBOOKS_STAGING_PREFIX}_(?:(\d+)_)?[0-9a-f]{{12}}$")
+    engine = get_db_connection()
+    try:
+        for staging_table in inspect(engine).get_table_names():
+            match = pattern.match(staging_table)
+            if not match or (match.group(1) and int(match.group(1)) >= cutoff):
+                continue
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP TABLE IF EXISTS {staging_table}"))
+            debug_messages.append(f"✅ Dropped abandoned staging table '{staging_table}'.")
+    except SQLAlchemyError as e:
+        debug_messages.append(f"⚠️ Could not prune QuickBooks staging tables: {e}")
+    finally:
+        engine.dispose()
+    return debug_messages
+
+def save_staged_quickbooks(staging_table: str, table_name: str = "master_quickbooks_sales"):
+    """
+    Replace the periods held in a staging table in table_name, the same way save_dataframe_to_db
+    does for a DataFrame, without loading the rows into memory: the rows are moved with one
+    INSERT ... SELECT in the same transaction as the delete, and the staging table is dropped in
+    that transaction too. If the move fails, nothing is changed and the staging table is kept.
+
+    Returns a list of debug messages.
+    """
+    engine = get_db_connection()
+    debug_messages = []
+
+    key_columns = [
+        "Revenue Recognition Date YYYY", "Revenue Recognition YYYY",
+        "Revenue Recognition Date MM", "Revenue Recognition MM",
+        "Commission Date YYYY", "Commission Date MM", "Product Lines",
+    ]
+    try:
+        staging_columns = [c["name"] for c in inspect(engine).get_columns(staging_table)]
+        selected = ", ".join(f'"{col}"' for col in key_columns if col in staging_columns)
+        with engine.connect() as conn:
+            # The condition only needs the distinct periods / Product Lines of the staged rows.
+            keys = pd.read_sql_query(text(f"SELECT DISTINCT {selected} FROM {staging_table}"), conn)
+        condition = build_replace_condition(keys, engine, table_name, debug_messages)
+
+        with engine.begin() as conn:
+            result = conn.execute(text(f"DELETE FROM {table_name} WHERE {condition}"))
+            debug_messages.append(f"✅ Deleted {result.rowcount} records from '{table_name}' matching the specified criteria.")
+            columns = ", ".join(f'"{col}"' for col in staging_columns)
+            inserted = conn.execute(text(
+                f"INSERT INTO {table_name} ({columns}) SELECT {columns} FROM {staging_table}"
+            ))
+            conn.execute(text(f"DROP TABLE {staging_table}"))
+            debug_messages.append(f"✅ {inserted.rowcount} new records successfully added to '{table_name}'.")
 
     except SQLAlchemyError as e:
         error_message = str(e)
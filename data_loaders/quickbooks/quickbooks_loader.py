@@ -1,19 +1,40 @@
+import numpy as np
 import pandas as pd
 from sqlalchemy import create_engine
 from dotenv import load_dotenv
 import os
+from openpyxl import load_workbook
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+from pandas.io.parsers import TextParser
 from data_loaders.validation_utils import validate_file_format
+from data_loaders.excel_utils import read_vendor_excel
+from data_loaders.parsing_utils import parse_amount, parse_dates, date_parts
+from data_loaders.reference_cache_utils import load_reference_table
 
 # Load environment variables
 load_dotenv()
 
 DATABASE_URL = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
 
+# Rows above the header of a QuickBooks export (report title, dates, blank lines).
+QUICKBOOKS_HEADER_ROW = 4
+
+# Raw rows per chunk when a large export is streamed to the staging table.
+QUICKBOOKS_CHUNK_ROWS = int(os.getenv("QUICKBOOKS_CHUNK_ROWS", "20000"))
+
 def get_db_connection():
     """Create a database connection."""
     engine = create_engine(DATABASE_URL)
     return engine
 
+def get_service_to_product_mapping() -> dict:
+    """Service Lines -> Product Lines mapping (cached per process, re-read only when the table is edited)."""
+    try:
+        service_to_product = load_reference_table("service_to_product")[["Service Lines", "Product Lines"]]
+    except Exception as e:
+        raise RuntimeError(f"Error fetching service_to_product data: {e}")
+    return service_to_product.set_index("Service Lines")["Product Lines"].to_dict()
+
 def load_excel_file_quickbooks(filepath: str) -> pd.DataFrame:
     """
     Load and preprocess a QuickBooks Excel file.
@@ -21,7 +42,7 @@ def load_excel_file_quickbooks(filepath: str) -> pd.DataFrame:
     # Set option to display all columns
     pd.set_option('display.max_columns', None)
     # Read the Excel file
-    raw_df = pd.read_excel(filepath, header=0, skiprows=4, dtype={"Num": str})
+    raw_df = read_vendor_excel(filepath, header=0, skiprows=QUICKBOOKS_HEADER_ROW, dtype={"Num": str})
     # Strip whitespace from all column names
     #raw_df.columns = raw_df.columns.str.strip()
     print(raw_df.head(3))
@@ -30,6 +51,13 @@ def load_excel_file_quickbooks(filepath: str) -> pd.DataFrame:
     if not is_valid:
         raise ValueError(f"Raw file format invalid. Missing columns: {', '.join(missing)}")
 
+    return clean_quickbooks_rows(raw_df, get_service_to_product_mapping())
+
+def clean_quickbooks_rows(raw_df: pd.DataFrame, service_to_product_dict: dict) -> pd.DataFrame:
+    """
+    Apply the QuickBooks cleaning rules to raw export rows. Every rule only looks at the row
+    itself, so a whole export and its chunks (see iter_quickbooks_chunks) give the same rows.
+    """
     df = raw_df.copy()
     # Drop rows that are completely empty
     df.dropna(how='all', inplace=True)
@@ -68,57 +96,23 @@ def load_excel_file_quickbooks(filepath: str) -> pd.DataFrame:
 
     # Clean and process 'Amount line' as strings, then convert to float
     if 'Amount line' in df.columns:
-        df['Amount line'] = df['Amount line'].astype(str)  # Ensure 'Amount line' is a string
-        df['Amount line'] = (
-            df['Amount line']
-            .str.replace(",", "", regex=False)  # Remove commas
-            .str.strip()  # Remove any extra spaces
-        )
-        df['Amount line'] = pd.to_numeric(df['Amount line'], errors='coerce').fillna(0.0)  # Convert to float
+        df['Amount line'] = parse_amount(df['Amount line']).fillna(0.0)  # Convert to float
         df['Amount line'] = df['Amount line'].round(2)  # Round to two decimal places
 
     # # Add a new column 'Product Lines' after 'Date'
     if 'Date' in df.columns and 'Service Lines' in df.columns:
-        # Fetch service_to_product mapping from the database
-        service_to_product_query = """
-        SELECT "Service Lines", "Product Lines"
-        FROM service_to_product
-        """
-        engine = get_db_connection()
-        try:
-            with engine.connect() as conn:
-                service_to_product = pd.read_sql_query(service_to_product_query, conn)
-            
-            # Convert the mapping to a dictionary for faster lookup
-            service_to_product_dict = service_to_product.set_index("Service Lines")["Product Lines"].to_dict()
-
-            # Rename Date to Revenue Recognition Date
-            df.rename(columns={'Date': 'Revenue Recognition Date'}, inplace=True)
-
-            # Add the new column 'Product Lines'
-            df.insert(df.columns.get_loc('Revenue Recognition Date') + 1, 'Product Lines', '')  # Add the column after 'Revenue Recognition Date'
-
-            # Populate 'Product Lines' based on the 'Service Lines' mapping
-            def map_product_line(service_line):
-                return service_to_product_dict.get(service_line, '')  # Return an empty string if no match is found
-            
-            df['Product Lines'] = df['Service Lines'].apply(map_product_line)
-
-        except Exception as e:
-            raise RuntimeError(f"Error fetching service_to_product data: {e}")
-        finally:
-            engine.dispose()
+        # Rename Date to Revenue Recognition Date
+        df.rename(columns={'Date': 'Revenue Recognition Date'}, inplace=True)
+
+        # Add the new column 'Product Lines'
+        df.insert(df.columns.get_loc('Revenue Recognition Date') + 1, 'Product Lines', '')  # Add the column after 'Revenue Recognition Date'
+
+        # Populate 'Product Lines' based on the 'Service Lines' mapping (empty string if no match is found)
+        df['Product Lines'] = df['Service Lines'].map(service_to_product_dict).fillna('')
 
     # Clean and convert 'Purchase price' to numeric
     if 'Purchase price' in df.columns:
-        df['Purchase price'] = df['Purchase price'].astype(str)  # Ensure it's a string
-        df['Purchase price'] = (
-            df['Purchase price']
-            .str.replace("$", "", regex=False)  # Remove the '$' symbol
-            .str.replace(",", "", regex=False)  # Remove commas if any
-            .str.strip()  # Remove any extra spaces
-        )
-        df['Purchase price'] = pd.to_numeric(df['Purchase price'], errors='coerce')  # Convert to float
+        df['Purchase price'] = parse_amount(df['Purchase price'])  # Convert to float
 
      # Add calculated columns after 'Quantity'
     if all(col in df.columns for col in ['Amount line', 'Purchase price', 'Quantity']):
@@ -136,26 +130,77 @@ def load_excel_file_quickbooks(filepath: str) -> pd.DataFrame:
     numeric_columns = ['Amount line', 'Purchase price', 'Margin']
     for col in numeric_columns:
         if col in df.columns:
-            df[col] = df[col].apply(lambda x: round(float(x), 2) if pd.notnull(x) else 0.0)
+            # Python's round() (correctly rounded halves), not Series.round()
+            df[col] = pd.Series([round(x, 2) for x in df[col].astype(float)], index=df.index).fillna(0.0)
 
     # Transform the 'Revenue Recognition Date' column
     if 'Revenue Recognition Date' in df.columns:
         # Convert the 'Revenue Recognition Date' column to datetime format, assuming MM/DD/YYYY
-        df['Revenue Recognition Date'] = pd.to_datetime(df['Revenue Recognition Date'], format='%m/%d/%Y', errors='coerce')
+        df['Revenue Recognition Date'] = parse_dates(df['Revenue Recognition Date'], format='%m/%d/%Y')
 
         # Check for invalid dates and drop rows with invalid dates
         df = df[df['Revenue Recognition Date'].notnull()]
 
         # Add new columns 'Revenue Recognition Date YYYY' and 'Revenue Recognition Date MM'
-        df['Revenue Recognition Date YYYY'] = df['Revenue Recognition Date'].dt.year.astype(str)
-        df['Revenue Recognition Date MM'] = df['Revenue Recognition Date'].dt.month.astype(str).str.zfill(2)
+        date_text, year_text, month_text = date_parts(df['Revenue Recognition Date'])
+        df['Revenue Recognition Date YYYY'] = year_text
+        df['Revenue Recognition Date MM'] = month_text
 
         # Format the 'Revenue Recognition Date' column to YYYY-MM-DD (string representation)
-        df['Revenue Recognition Date'] = df['Revenue Recognition Date'].dt.strftime('%Y-%m-%d')
+        df['Revenue Recognition Date'] = date_text
 
     # Keep all values as-is without specific formatting
     return df
 
+def _excel_cell_value(cell):
+    # Same conversion as pd.read_excel's openpyxl reader: blanks are "", errors NaN, whole numbers ints.
+    if cell.value is None:
+        return ""
+    if cell.data_type == TYPE_ERROR:
+        return np.nan
+    if cell.data_type == TYPE_NUMERIC:
+        value = int(cell.value)
+        return value if value == cell.value else float(cell.value)
+    return cell.value
+
+def _parse_quickbooks_chunk(header: list, chunk: list) -> pd.DataFrame:
+    # pd.read_excel's own parser, for the same column names, NA values and type inference as a whole-file read.
+    return TextParser([header] + chunk, header=0, dtype={"Num": str}, skip_blank_lines=False).read()
+
+def iter_quickbooks_chunks(filepath: str, chunk_rows: int = None):
+    """
+    Stream a QuickBooks export in read-only mode and yield it as cleaned DataFrames of at most
+    chunk_rows raw rows (defaults to QUICKBOOKS_CHUNK_ROWS), so memory does not grow with the file.
+    The header is validated before the first chunk.
+    """
+    chunk_rows = chunk_rows or QUICKBOOKS_CHUNK_ROWS
+    service_to_product_dict = get_service_to_product_mapping()
+    workbook = load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        sheet.reset_dimensions()
+        rows = sheet.iter_rows(min_row=QUICKBOOKS_HEADER_ROW + 1)
+        header = [_excel_cell_value(cell) for cell in next(rows, ())]
+        if not header:
+            raise ValueError("Raw file format invalid. The QuickBooks export has no header row.")
+        is_valid, missing = validate_file_format(_parse_quickbooks_chunk(header, []), "QuickBooks")
+        if not is_valid:
+            raise ValueError(f"Raw file format invalid. Missing columns: {', '.join(missing)}")
+
+        width = len(header)
+        chunk = []
+        for row in rows:
+            values = [_excel_cell_value(cell) for cell in row[:width]]
+            values.extend([""] * (width - len(values)))
+            chunk.append(values)
+            if len(chunk) >= chunk_rows:
+                yield clean_quickbooks_rows(_parse_quickbooks_chunk(header, chunk), service_to_product_dict)
+                chunk = []
+        if chunk:
+            yield clean_quickbooks_rows(_parse_quickbooks_chunk(header, chunk), service_to_product_dict)
+    finally:
+        workbook.close()
+
 def fetch_master_sales_rep():
     """Load the master sales rep data from the database."""
     query = """
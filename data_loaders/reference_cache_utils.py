@@ -0,0 +1,91 @@
+import os
+import time
+import threading
+import pandas as pd
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+from data_loaders.version_utils import get_data_version, bump_data_versions
+
+# Load environment variables
+load_dotenv()
+
+DATABASE_URL = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@" \
+               f"{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+
+# Small tables read by every parse and page, edited a few times a month in Portfolio Management.
+REFERENCE_TABLES = ("master_sales_rep", "service_to_product", "sales_rep_commission_tier")
+
+# How long a cached table is served before its data version is checked again.
+REFERENCE_VERSION_CHECK_SECONDS = float(os.getenv("REFERENCE_VERSION_CHECK_SECONDS", "5"))
+
+# Process-wide cache: table name -> {"version", "checked", "df"}.
+_reference_cache = {}
+_reference_lock = threading.Lock()
+
+def get_db_connection():
+    """Create a database connection."""
+    engine = create_engine(DATABASE_URL)
+    return engine
+
+def _cached_copy(table_name: str, version: int = None):
+    entry = _reference_cache.get(table_name)
+    if entry is None:
+        return None
+    if version is None:
+        if time.monotonic() - entry["checked"] >= REFERENCE_VERSION_CHECK_SECONDS:
+            return None
+    elif entry["version"] != version:
+        return None
+    else:
+        entry["checked"] = time.monotonic()
+    return entry["df"].copy()
+
+def load_reference_table(table_name: str) -> pd.DataFrame:
+    """
+    Return a copy of a reference table (all columns, table order), shared by every session of
+    the process. The table is only read again when its data version has changed.
+    """
+    if table_name not in REFERENCE_TABLES:
+        raise ValueError(f"{table_name} is not a cached reference table.")
+
+    with _reference_lock:
+        df = _cached_copy(table_name)
+    if df is not None:
+        return df
+
+    # Read the version before the data: a save landing in between only causes one extra read later.
+    version = get_data_version(table_name)
+    with _reference_lock:
+        df = _cached_copy(table_name, version)
+    if df is not None:
+        return df
+
+    engine = get_db_connection()
+    try:
+        with engine.connect() as conn:
+            df = pd.read_sql_query(text(f"SELECT * FROM {table_name}"), conn)
+    finally:
+        engine.dispose()
+
+    with _reference_lock:
+        _reference_cache[table_name] = {"version": version, "checked": time.monotonic(), "df": df}
+    return df.copy()
+
+def get_reference_values(table_name: str, column: str) -> list:
+    """Sorted distinct non-empty values of a reference table column."""
+    values = load_reference_table(table_name)[column].dropna()
+    return sorted(values.unique().tolist())
+
+def invalidate_reference_table(table_name: str):
+    """Drop a table from this process's cache (other processes notice the version bump)."""
+    with _reference_lock:
+        _reference_cache.pop(table_name, None)
+
+def reference_table_changed(table_name: str):
+    """
+    Record that a reference table was rewritten: bump its data version and drop it from this
+    process's cache. Return debug messages as a list.
+    """
+    debug_messages = bump_data_versions([table_name])
+    invalidate_reference_table(table_name)
+    return debug_messages
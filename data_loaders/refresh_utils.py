@@ -0,0 +1,17 @@
+from data_loaders.search_index_utils import refresh_invoice_search_index
+from data_loaders.replica_utils import sync_replica_after_save
+from data_loaders.version_utils import bump_data_versions
+
+def refresh_derived_data(table_name: str):
+    """
+    Refresh everything derived from a master table after it has been saved and harmonised:
+    the cross-vendor invoice search index, the local analytics replica and the data versions
+    that snapshots and caches are keyed by.
+    Return debug messages as a list.
+    """
+    debug_messages = []
+    debug_messages.extend(refresh_invoice_search_index(table_name))
+    # Versions are bumped first: the replica records the version it was synced at
+    debug_messages.extend(bump_data_versions([table_name, "harmonised_table"]))
+    debug_messages.extend(sync_replica_after_save(table_name))
+    return debug_messages
@@ -0,0 +1,301 @@
+import os
+import time
+import threading
+import pandas as pd
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
+from dotenv import load_dotenv
+from data_loaders.access_utils import REP_COLUMNS
+from data_loaders.version_utils import get_data_version
+
+try:
+    import duckdb
+except ImportError:  # The analytical replica is optional; callers fall back to Postgres.
+    duckdb = None
+
+# Load environment variables
+load_dotenv()
+
+DATABASE_URL = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@" \
+               f"{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+
+# Local DuckDB file holding a columnar copy of the tables used by the Analytics page. The default
+# sits next to the package, so the app, the upload worker and scripts share it whatever their
+# working directory.
+REPLICA_PATH = os.getenv(
+    "ANALYTICS_REPLICA_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "analytics_replica.duckdb"),
+)
+
+# DuckDB lets one process write the replica file, or several processes read it, at a time.
+# Opening it while another connection holds a conflicting lock is retried for up to these many
+# seconds: writers wait their turn, readers give up sooner and read from Postgres instead.
+REPLICA_WRITE_TIMEOUT_SECONDS = float(os.getenv("REPLICA_WRITE_TIMEOUT_SECONDS", "60"))
+REPLICA_READ_TIMEOUT_SECONDS = float(os.getenv("REPLICA_READ_TIMEOUT_SECONDS", "2"))
+REPLICA_LOCK_RETRY_SECONDS = 0.2
+
+REPLICA_TABLES = [
+    "harmonised_table",
+    "master_cygnus_sales",
+    "master_logiquip_sales",
+    "master_summit_medical_sales",
+    "master_quickbooks_sales",
+    "master_inspektor_sales",
+    "master_sunoptic_sales",
+    "master_ternio_sales",
+    "master_novo_sales",
+    "master_chemence_sales",
+]
+
+# DuckDB table recording the data version (see version_utils) each replica table was synced at.
+REPLICA_VERSIONS_TABLE = "replica_versions"
+
+# Serialises replica writes between threads of this process; other processes are kept out by
+# DuckDB's file lock (see connect_replica).
+_replica_lock = threading.Lock()
+
+def get_db_connection():
+    """Create a database connection."""
+    engine = create_engine(DATABASE_URL)
+    return engine
+
+def replica_available() -> bool:
+    """Return True if DuckDB is installed and the replica file has been created."""
+    return duckdb is not None and os.path.exists(REPLICA_PATH)
+
+def connect_replica(read_only: bool = True):
+    """
+    Open the replica, retrying while another connection holds a conflicting lock on the file
+    (a writer in any process, or readers in other processes when opening for writing).
+    Raises the lock error once REPLICA_READ_TIMEOUT_SECONDS / REPLICA_WRITE_TIMEOUT_SECONDS pass.
+    """
+    timeout = REPLICA_READ_TIMEOUT_SECONDS if read_only else REPLICA_WRITE_TIMEOUT_SECONDS
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return duckdb.connect(REPLICA_PATH, read_only=read_only)
+        except (duckdb.IOException, duckdb.ConnectionException):
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(REPLICA_LOCK_RETRY_SECONDS)
+
+def _replica_has_table(db, table_name: str) -> bool:
+    result = db.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?", [table_name]
+    ).fetchone()
+    return result[0] > 0
+
+def _replace_replica_table(db, table_name: str, df: pd.DataFrame):
+    """(Re)create a replica table from a DataFrame."""
+    db.register("incoming_rows", df)
+    try:
+        db.execute(f'CREATE OR REPLACE TABLE "{table_name}" AS SELECT * FROM incoming_rows')
+    finally:
+        db.unregister("incoming_rows")
+
+def _append_replica_rows(db, table_name: str, df: pd.DataFrame):
+    """Append rows to a replica table, matching columns by name."""
+    db.register("incoming_rows", df)
+    try:
+        db.execute(f'INSERT INTO "{table_name}" BY NAME SELECT * FROM incoming_rows')
+    finally:
+        db.unregister("incoming_rows")
+
+def _ensure_replica_versions(db):
+    db.execute(f"CREATE TABLE IF NOT EXISTS {REPLICA_VERSIONS_TABLE} (table_name VARCHAR PRIMARY KEY, version BIGINT)")
+
+def _replica_version(db, table_name: str):
+    """Data version the replica copy of table_name was synced at (None if unknown)."""
+    if not _replica_has_table(db, REPLICA_VERSIONS_TABLE):
+        return None
+    row = db.execute(
+        f"SELECT version FROM {REPLICA_VERSIONS_TABLE} WHERE table_name = ?", [table_name]
+    ).fetchone()
+    return row[0] if row else None
+
+def _copy_full_table(conn, db, table_name: str) -> str:
+    full_df = pd.read_sql_query(text(f"SELECT * FROM {table_name}"), conn)
+    _replace_replica_table(db, table_name, full_df)
+    return f"✅ Analytics replica: copied {len(full_df)} rows of '{table_name}'."
+
+def _sync_partition(conn, db, table_name: str, data_source: str) -> str:
+    partition_df = pd.read_sql_query(
+        text(f'SELECT * FROM {table_name} WHERE "Data Source" = :data_source'),
+        conn, params={"data_source": data_source}
+    )
+    db.execute(f'DELETE FROM "{table_name}" WHERE "Data Source" = ?', [data_source])
+    _append_replica_rows(db, table_name, partition_df)
+    return f"✅ Analytics replica: refreshed {len(partition_df)} '{data_source}' rows of '{table_name}'."
+
+def _sync_by_row_hash(conn, db, table_name: str) -> str:
+    # Compare row counts per row_hash to find what changed since the last sync.
+    pg_counts = pd.read_sql_query(
+        text(f"SELECT row_hash, COUNT(*) AS n FROM {table_name} GROUP BY row_hash"), conn
+    )
+    replica_counts = db.execute(
+        f'SELECT row_hash, COUNT(*) AS n FROM "{table_name}" GROUP BY row_hash'
+    ).df()
+    counts = pg_counts.merge(replica_counts, on="row_hash", how="outer", suffixes=("_pg", "_replica"))
+    counts[["n_pg", "n_replica"]] = counts[["n_pg", "n_replica"]].fillna(0)
+    changed = counts[counts["n_pg"] != counts["n_replica"]]
+    if changed.empty:
+        return f"✅ Analytics replica: '{table_name}' already up to date."
+
+    changed_hashes = changed["row_hash"].dropna().tolist()
+    null_hash_changed = changed["row_hash"].isna().any()
+
+    db.register("changed_hashes", pd.DataFrame({"row_hash": changed_hashes}, dtype=object))
+    try:
+        db.execute(
+            f'DELETE FROM "{table_name}" WHERE row_hash IN (SELECT row_hash FROM changed_hashes)'
+        )
+    finally:
+        db.unregister("changed_hashes")
+    if null_hash_changed:
+        db.execute(f'DELETE FROM "{table_name}" WHERE row_hash IS NULL')
+
+    fetch_conditions = ["row_hash = ANY(:hashes)"]
+    if null_hash_changed:
+        fetch_conditions.append("row_hash IS NULL")
+    new_rows = pd.read_sql_query(
+        text(f"SELECT * FROM {table_name} WHERE " + " OR ".join(fetch_conditions)),
+        conn, params={"hashes": changed_hashes}
+    )
+    if not new_rows.empty:
+        _append_replica_rows(db, table_name, new_rows)
+    return f"✅ Analytics replica: '{table_name}' synced ({len(changed)} changed hashes, {len(new_rows)} rows fetched)."
+
+def sync_replica_table(table_name: str, data_source: str = None, full: bool = False):
+    """
+    Bring one replica table in line with Postgres.
+
+    - harmonised_table is synced per "Data Source" partition when data_source is given, because
+      harmonisation rewrites a whole product line (including "Commission tier 2 date") on every save.
+    - Master tables are synced by row_hash: only hashes whose row count differs between Postgres
+      and the replica are deleted and re-fetched, so a monthly upload transfers one month of rows.
+    - A missing replica table (or a schema change) triggers a full copy, as does full=True (e.g.
+      after a column type change, which the column comparison does not see). So does a partition
+      sync when the replica missed an earlier version, since other partitions may be stale too.
+
+    Each table is synced in one DuckDB transaction, together with the data version it now matches
+    (read before the rows, so a concurrent save leaves the replica marked as behind, not ahead).
+    Only one process writes the replica at a time; the others wait for its file lock.
+    Return debug messages as a list.
+    """
+    debug_messages = []
+    if duckdb is None:
+        debug_messages.append("⚠️ duckdb is not installed; the analytics replica was not updated.")
+        return debug_messages
+
+    engine = get_db_connection()
+    try:
+        version = get_data_version(table_name)
+        with _replica_lock, engine.connect() as conn, connect_replica(read_only=False) as db:
+            _ensure_replica_versions(db)
+            synced_version = _replica_version(db, table_name)
+            pg_columns = list(pd.read_sql_query(text(f"SELECT * FROM {table_name} LIMIT 0"), conn).columns)
+            replica_columns = []
+            if _replica_has_table(db, table_name):
+                replica_columns = [row[0] for row in db.execute(f'DESCRIBE "{table_name}"').fetchall()]
+
+            db.begin()
+            try:
+                if full or sorted(replica_columns) != sorted(pg_columns):
+                    # First sync or schema change: copy the whole table.
+                    message = _copy_full_table(conn, db, table_name)
+                elif data_source is not None and "Data Source" in pg_columns:
+                    if synced_version in (version - 1, version):
+                        message = _sync_partition(conn, db, table_name, data_source)
+                    else:
+                        message = _copy_full_table(conn, db, table_name)
+                else:
+                    message = _sync_by_row_hash(conn, db, table_name)
+                db.execute(
+                    f"INSERT OR REPLACE INTO {REPLICA_VERSIONS_TABLE} (table_name, version) VALUES (?, ?)",
+                    [table_name, version]
+                )
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            debug_messages.append(message)
+    except (SQLAlchemyError, duckdb.Error) as e:
+        print(f"❌ Error syncing analytics replica for '{table_name}': {e}")
+        debug_messages.append(f"❌ Error syncing analytics replica for '{table_name}': {e}")
+    finally:
+        engine.dispose()
+    return debug_messages
+
+def sync_replica_after_save(table_name: str):
+    """Sync the replica tables touched by saving one master table. Return debug messages as a list."""
+    debug_messages = []
+    debug_messages.extend(sync_replica_table(table_name))
+    debug_messages.extend(sync_replica_table("harmonised_table", data_source=table_name))
+    return debug_messages
+
+def sync_full_replica():
+    """Sync every replica table. Return debug messages as a list."""
+    debug_messages = []
+    for table_name in REPLICA_TABLES:
+        debug_messages.extend(sync_replica_table(table_name))
+    return debug_messages
+
+def replica_is_fresh(table_name: str) -> bool:
+    """
+    Return True if the replica holds table_name as of its current data version. A failed or
+    missed sync leaves the replica behind, and readers then use Postgres instead.
+    """
+    if not replica_available():
+        return False
+    with connect_replica() as db:
+        synced_version = _replica_version(db, table_name)
+    return synced_version is not None and synced_version == get_data_version(table_name)
+
+def get_replica_columns(table_name: str) -> list:
+    """Return the column names of a replica table (empty list if it does not exist)."""
+    with connect_replica() as db:
+        if not _replica_has_table(db, table_name):
+            return []
+        return [row[0] for row in db.execute(f'DESCRIBE "{table_name}"').fetchall()]
+
+def fetch_replica_table(table_name: str, rep_name=None, filters=None) -> pd.DataFrame:
+    """
+    Read a table from the analytics replica as an Arrow-backed DataFrame, restricted to
+    rep_name's rows when set. filters maps column names to lists of values to keep.
+    Raises LookupError if the table has not been replicated yet or the replica is behind Postgres.
+    """
+    columns = get_replica_columns(table_name)
+    if not columns:
+        raise LookupError(f"'{table_name}' is not in the analytics replica yet.")
+    if not replica_is_fresh(table_name):
+        raise LookupError(f"The analytics replica of '{table_name}' is behind Postgres.")
+
+    conditions = []
+    params = []
+    if rep_name is not None:
+        rep_column = next((col for col in REP_COLUMNS if col in columns), None)
+        if rep_column is None:
+            # Never hand a restricted session rows it cannot be filtered on.
+            conditions.append("1 = 0")
+        else:
+            conditions.append(f'"{rep_column}" = ?')
+            params.append(rep_name)
+    for column, values in (filters or {}).items():
+        if values and column in columns:
+            conditions.append(f'"{column}" IN ({", ".join("?" for _ in values)})')
+            params.extend(values)
+
+    query = f'SELECT * FROM "{table_name}"'
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+
+    with connect_replica() as db:
+        return db.execute(query, params).arrow().to_pandas(types_mapper=pd.ArrowDtype)
+
+def query_replica(query: str, params=None) -> pd.DataFrame:
+    """
+    Run an analytical query against the replica and return the result as an Arrow-backed
+    DataFrame. Callers check replica_is_fresh for the tables the query reads.
+    """
+    with connect_replica() as db:
+        return db.execute(query, params or []).arrow().to_pandas(types_mapper=pd.ArrowDtype)
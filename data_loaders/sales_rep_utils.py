@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+def resolve_sales_reps(master_df: pd.DataFrame, keys: pd.Series, dates: pd.Series = None,
+                       customer_field: str = None, source: str = None, strip: bool = False,
+                       skip_blank: bool = False, default=None):
+    """
+    Look up the Sales Rep name of a whole column at once in master_sales_rep.
+
+    Each key gets the "Sales Rep name" of the first master_sales_rep row (in table order) whose
+    "Data field value" equals the key, optionally restricted to a Source / Customer field and, when
+    dates are given, to the rows whose Valid from <= date <= Valid until (open-ended when Valid until
+    is empty). This is the same match the loaders made row by row, done with one map / merge.
+
+    Args:
+        master_df: master_sales_rep rows ("Valid from"/"Valid until" parsed as datetimes).
+        keys: Column holding the values to look up.
+        dates: Optional column of dates (same index as keys) the match must be valid on.
+        customer_field: Only use master rows with this "Customer field".
+        source: Only use master rows with this "Source".
+        strip: Compare str(key).strip() with the stripped "Data field value".
+        skip_blank: Give the default to empty keys without looking them up.
+        default: Value for keys without a match.
+
+    Returns:
+        Tuple (Series of Sales Rep names aligned with keys, sorted list of the unmatched keys).
+    """
+    master = master_df
+    if source is not None:
+        master = master[master["Source"] == source]
+    if customer_field is not None:
+        master = master[master["Customer field"] == customer_field]
+
+    if strip:
+        master_keys = master["Data field value"].str.strip()
+        lookup_keys = keys.astype(str).str.strip()
+    else:
+        master_keys = master["Data field value"]
+        lookup_keys = keys.astype(str) if dates is None else keys
+
+    blank = (keys.isna() | (lookup_keys == "")).to_numpy()
+    skip = blank.copy() if skip_blank else np.zeros(len(keys), dtype=bool)
+    if dates is not None:
+        dates = pd.to_datetime(dates, errors="coerce")
+        skip |= dates.isna().to_numpy()
+    positions = np.flatnonzero(~skip)
+
+    master = pd.DataFrame({
+        "key": master_keys.to_numpy(dtype=object),
+        "rep": master["Sales Rep name"].to_numpy(),
+        "order": np.arange(len(master)),
+        "valid_from": master["Valid from"].to_numpy() if dates is not None else None,
+        "valid_until": master["Valid until"].to_numpy() if dates is not None else None,
+    }).dropna(subset=["key"])
+
+    if dates is None:
+        # First master row per key wins.
+        first_rep = master.drop_duplicates("key").set_index("key")["rep"]
+        found = lookup_keys.iloc[positions].map(first_rep).to_numpy()
+        has_match = pd.notna(found)
+        matched_positions, matched_reps = positions[has_match], found[has_match]
+    else:
+        rows = pd.DataFrame({
+            "row": positions,
+            "key": lookup_keys.iloc[positions].to_numpy(dtype=object),
+            "date": dates.iloc[positions].to_numpy(),
+        })
+        candidates = rows.merge(master, on="key", how="inner")
+        valid = (candidates["valid_from"] <= candidates["date"]) & (
+            candidates["valid_until"].isna() | (candidates["valid_until"] >= candidates["date"])
+        )
+        first = candidates[valid].sort_values(["row", "order"]).drop_duplicates("row")
+        matched_positions, matched_reps = first["row"].to_numpy(), first["rep"].to_numpy()
+
+    result = np.full(len(keys), default, dtype=object)
+    result[matched_positions] = matched_reps
+    reps = pd.Series(result, index=keys.index)
+
+    unmatched_mask = ~blank
+    unmatched_mask[matched_positions] = False
+    unmatched = sorted({str(key) for key in keys[unmatched_mask]})
+    return reps, unmatched
@@ -0,0 +1,278 @@
+import os
+import re
+import pandas as pd
+from sqlalchemy import create_engine, text, inspect
+from sqlalchemy.exc import SQLAlchemyError
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+DATABASE_URL = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@" \
+               f"{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+
+SEARCH_INDEX_TABLE = "invoice_search_index"
+
+# Column mapping from each master table to the unified search projection.
+# None means the vendor file has no equivalent column.
+SEARCH_SOURCES = {
+    "master_cygnus_sales": {
+        "Product Line": "Cygnus",
+        "Invoice": "Invoice",
+        "Customer": "Cust- Name",
+        "Item": "SKU",
+        "Amount": "Invoice Total",
+        "Revenue Recognition YYYY": "Revenue Recognition Date YYYY",
+        "Revenue Recognition MM": "Revenue Recognition Date MM",
+    },
+    "master_logiquip_sales": {
+        "Product Line": "Logiquip",
+        "Invoice": "Doc Num",
+        "Customer": "Customer",
+        "Item": "Item Class",
+        "Amount": "Doc Amt",
+        "Revenue Recognition YYYY": "Revenue Recognition YYYY",
+        "Revenue Recognition MM": "Revenue Recognition MM",
+    },
+    "master_summit_medical_sales": {
+        "Product Line": "Summit Medical",
+        "Invoice": "Invoice #",
+        "Customer": "Client Name",
+        "Item": "Item ID",
+        "Amount": "Net Sales Amount",
+        "Revenue Recognition YYYY": "Revenue Recognition Date YYYY",
+        "Revenue Recognition MM": "Revenue Recognition Date MM",
+    },
+    "master_quickbooks_sales": {
+        "Product Line": "QuickBooks",
+        "Invoice": "Num",
+        "Customer": "Customer",
+        "Item": "Product/Service",
+        "Amount": "Amount line",
+        "Revenue Recognition YYYY": "Revenue Recognition Date YYYY",
+        "Revenue Recognition MM": "Revenue Recognition Date MM",
+    },
+    "master_inspektor_sales": {
+        "Product Line": "InspeKtor",
+        "Invoice": "Document Number",
+        "Customer": "Customer:Project",
+        "Item": "Item: Name",
+        "Amount": "Total",
+        "Revenue Recognition YYYY": "Revenue Recognition Date YYYY",
+        "Revenue Recognition MM": "Revenue Recognition Date MM",
+    },
+    "master_sunoptic_sales": {
+        "Product Line": "Sunoptic",
+        "Invoice": "Invoice ID",
+        "Customer": "Bill Name",
+        "Item": "Item ID",
+        "Amount": "Line Amount",
+        "Revenue Recognition YYYY": "Revenue Recognition Date YYYY",
+        "Revenue Recognition MM": "Revenue Recognition Date MM",
+    },
+    "master_ternio_sales": {
+        "Product Line": "Ternio",
+        "Invoice": "Num",
+        "Customer": "Client Name",
+        "Item": "Memo/Description",
+        "Amount": "Invoiced",
+        "Revenue Recognition YYYY": "Revenue Recognition Date YYYY",
+        "Revenue Recognition MM": "Revenue Recognition Date MM",
+    },
+    "master_novo_sales": {
+        "Product Line": "Novo",
+        "Invoice": "Invoice Number",
+        "Customer": "Bill To Name",
+        "Item": "Item Code",
+        "Amount": "Extension",
+        "Revenue Recognition YYYY": "Revenue Recognition Date YYYY",
+        "Revenue Recognition MM": "Revenue Recognition Date MM",
+    },
+    "master_chemence_sales": {
+        "Product Line": "Chemence",
+        "Invoice": None,
+        "Customer": "Account Name",
+        "Item": "Part #",
+        "Amount": "Sales Total",
+        "Revenue Recognition YYYY": "Revenue Recognition Date YYYY",
+        "Revenue Recognition MM": "Revenue Recognition Date MM",
+    },
+}
+
+def get_db_connection():
+    """Create a database connection."""
+    engine = create_engine(DATABASE_URL)
+    return engine
+
+def ensure_search_index(conn):
+    """
+    Create the invoice_search_index table and its indexes if they do not exist yet.
+    Only the refresh path calls it; searches stay read-only so they never take DDL locks.
+    """
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {SEARCH_INDEX_TABLE} (
+            "Invoice Number"      TEXT,
+            "Customer"            TEXT,
+            "Item"                TEXT,
+            "Sales Rep"           TEXT,
+            "Period"              TEXT,
+            "Commission Date"     TEXT,
+            "Amount"              NUMERIC(15,2),
+            "Product Line"        TEXT,
+            "Data Source"         TEXT,
+            row_hash              TEXT
+        )
+    """))
+    # text_pattern_ops lets prefix searches (LIKE '12345%') use the index as well as exact matches.
+    conn.execute(text(f"""
+        CREATE INDEX IF NOT EXISTS idx_{SEARCH_INDEX_TABLE}_invoice
+        ON {SEARCH_INDEX_TABLE} ("Invoice Number" text_pattern_ops)
+    """))
+    conn.execute(text(f"""
+        CREATE INDEX IF NOT EXISTS idx_{SEARCH_INDEX_TABLE}_rep_period
+        ON {SEARCH_INDEX_TABLE} ("Sales Rep", "Period")
+    """))
+    conn.execute(text(f"""
+        CREATE INDEX IF NOT EXISTS idx_{SEARCH_INDEX_TABLE}_source
+        ON {SEARCH_INDEX_TABLE} ("Data Source")
+    """))
+
+def _text_expr(column):
+    """SQL expression returning a trimmed text value for a master table column (or NULL)."""
+    if column is None:
+        return "NULL"
+    # Colons in column names (e.g. "Customer:Project") must be escaped for SQLAlchemy's text().
+    column = column.replace(":", "\\:")
+    return f'NULLIF(TRIM(CAST(m."{column}" AS TEXT)), \'\')'
+
+def build_refresh_query(table_name: str) -> str:
+    """Build the INSERT ... SELECT statement projecting one master table into the search index."""
+    source = SEARCH_SOURCES[table_name]
+    invoice_col = source["Invoice"]
+    if invoice_col is None:
+        invoice_expr = "NULL"
+    else:
+        # Normalise invoice numbers: trimmed, upper-cased and without the ".0" suffix left by Excel floats.
+        invoice_expr = f'UPPER(REGEXP_REPLACE({_text_expr(invoice_col)}, \'\\.0+$\', \'\'))'
+    # Some master tables store amounts as text, so only cast values that look like numbers.
+    amount_text = f'REPLACE(REPLACE({_text_expr(source["Amount"])}, \'$\', \'\'), \',\', \'\')'
+    amount_expr = (
+        f'CASE WHEN {amount_text} ~ \'^-?[0-9]*\\.?[0-9]+$\' '
+        f'THEN CAST({amount_text} AS NUMERIC(15,2)) END'
+    )
+    period_expr = (
+        f'{_text_expr(source["Revenue Recognition YYYY"])} || \'-\' || '
+        f'LPAD({_text_expr(source["Revenue Recognition MM"])}, 2, \'0\')'
+    )
+    return f"""
+        INSERT INTO {SEARCH_INDEX_TABLE} (
+            "Invoice Number", "Customer", "Item", "Sales Rep", "Period",
+            "Commission Date", "Amount", "Product Line", "Data Source", row_hash
+        )
+        SELECT
+            {invoice_expr},
+            {_text_expr(source["Customer"])},
+            {_text_expr(source["Item"])},
+            {_text_expr("Sales Rep Name")},
+            {period_expr},
+            {_text_expr("Commission Date")},
+            {amount_expr},
+            '{source["Product Line"]}',
+            '{table_name}',
+            m.row_hash
+        FROM {table_name} AS m
+    """
+
+def refresh_invoice_search_index(table_name: str):
+    """
+    Replace the search index rows coming from one master table with its current content.
+    Called by the ingest path after a master table has been saved.
+    Return debug messages as a list.
+    """
+    debug_messages = []
+    table_name = table_name.lower()
+    if table_name not in SEARCH_SOURCES:
+        debug_messages.append(f"⚠️ No search index mapping defined for '{table_name}'.")
+        return debug_messages
+
+    engine = get_db_connection()
+    try:
+        with engine.begin() as conn:
+            ensure_search_index(conn)
+            conn.execute(
+                text(f'DELETE FROM {SEARCH_INDEX_TABLE} WHERE "Data Source" = :data_source'),
+                {"data_source": table_name}
+            )
+            result = conn.execute(text(build_refresh_query(table_name)))
+        debug_messages.append(f"✅ Invoice search index refreshed with {result.rowcount} rows from '{table_name}'.")
+    except SQLAlchemyError as e:
+        print(f"❌ Error refreshing invoice search index for '{table_name}': {e}")
+        debug_messages.append(f"❌ Error refreshing invoice search index for '{table_name}': {e}")
+    finally:
+        engine.dispose()
+    return debug_messages
+
+def rebuild_invoice_search_index():
+    """Rebuild the search index from every master table. Return debug messages as a list."""
+    debug_messages = []
+    for table_name in SEARCH_SOURCES:
+        debug_messages.extend(refresh_invoice_search_index(table_name))
+    return debug_messages
+
+def search_invoice_index(invoice=None, customer=None, sales_reps=None, period=None, limit=1000) -> pd.DataFrame:
+    """
+    Query the unified search index.
+
+    Args:
+        invoice: Invoice number or prefix (normalised the same way as the index).
+        customer: Case-insensitive substring of the customer name.
+        sales_reps: List of Sales Rep names to restrict to.
+        period: Revenue recognition period as 'YYYY-MM'.
+        limit: Maximum number of rows returned.
+
+    Returns:
+        pandas DataFrame with the matching index rows.
+    """
+    where_conditions = []
+    params = {"limit": limit}
+
+    if invoice:
+        # Same normalisation as build_refresh_query ("12345.00" -> "12345")
+        normalised = re.sub(r"\.0+$", "", str(invoice).strip().upper())
+        where_conditions.append('"Invoice Number" LIKE :invoice')
+        params["invoice"] = normalised.replace("%", r"\%").replace("_", r"\_") + "%"
+    if customer:
+        where_conditions.append('"Customer" ILIKE :customer')
+        params["customer"] = f"%{customer.strip()}%"
+    if sales_reps:
+        where_conditions.append('"Sales Rep" = ANY(:sales_reps)')
+        params["sales_reps"] = list(sales_reps)
+    if period:
+        where_conditions.append('"Period" = :period')
+        params["period"] = period
+
+    query = f'SELECT * FROM {SEARCH_INDEX_TABLE}'
+    if where_conditions:
+        query += " WHERE " + " AND ".join(where_conditions)
+    query += ' ORDER BY "Period" DESC, "Product Line", "Invoice Number" LIMIT :limit'
+
+    engine = get_db_connection()
+    try:
+        if not inspect(engine).has_table(SEARCH_INDEX_TABLE):
+            return pd.DataFrame()
+        with engine.connect() as conn:
+            result = conn.execute(text(query), params)
+            return pd.DataFrame(result.fetchall(), columns=result.keys())
+    finally:
+        engine.dispose()
+
+def count_search_index_rows() -> int:
+    """Return the number of rows currently in the search index (0 if it has not been built)."""
+    engine = get_db_connection()
+    try:
+        if not inspect(engine).has_table(SEARCH_INDEX_TABLE):
+            return 0
+        with engine.connect() as conn:
+            return conn.execute(text(f"SELECT COUNT(*) FROM {SEARCH_INDEX_TABLE}")).scalar()
+    finally:
+        engine.dispose()
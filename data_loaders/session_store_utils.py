@@ -0,0 +1,148 @@
+import os
+import time
+import shutil
+import tempfile
+import pandas as pd
+from dotenv import load_dotenv
+from data_loaders.parse_cache_utils import frame_to_bytes, frame_from_bytes
+
+# Load environment variables
+load_dotenv()
+
+# In-memory budget of one session's staged uploads (raw file bytes and parsed/edited DataFrames).
+# Least recently used items beyond it are spilled to the session's scratch directory.
+SESSION_MEMORY_BUDGET_MB = int(os.getenv("SESSION_MEMORY_BUDGET_MB", "256"))
+
+# Scratch directory holding one sub-directory per session.
+SESSION_SCRATCH_DIR = os.getenv("SESSION_SCRATCH_DIR", "session_scratch")
+
+# Session directories untouched for this long belong to expired sessions and are removed.
+SESSION_SCRATCH_TTL_HOURS = int(os.getenv("SESSION_SCRATCH_TTL_HOURS", "12"))
+
+def new_session_store() -> dict:
+    """
+    Create the staging store of a session: a plain dict kept in st.session_state, with a
+    private scratch directory for spilled items. Expired sessions' directories are pruned.
+    """
+    os.makedirs(SESSION_SCRATCH_DIR, exist_ok=True)
+    prune_session_scratch()
+    return {
+        "dir": tempfile.mkdtemp(prefix="session_", dir=SESSION_SCRATCH_DIR),
+        "budget": SESSION_MEMORY_BUDGET_MB * 1024 * 1024,
+        "items": {},
+    }
+
+def _item_size(value) -> int:
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    return len(value)
+
+def _touch(store: dict):
+    # The directory mtime marks the session as alive for prune_session_scratch.
+    try:
+        os.utime(store["dir"])
+    except OSError:
+        os.makedirs(store["dir"], exist_ok=True)
+
+def _spill(store: dict, key: str):
+    item = store["items"][key]
+    # An item reloaded from disk keeps its spill file, so spilling it again only drops the value.
+    if item["path"] is None:
+        if isinstance(item["value"], pd.DataFrame):
+            fmt, payload = frame_to_bytes(item["value"])
+        else:
+            fmt, payload = "bytes", bytes(item["value"])
+        fd, path = tempfile.mkstemp(suffix=f".{fmt}", dir=store["dir"])
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        item.update(path=path, format=fmt)
+    item["value"] = None
+
+def _enforce_budget(store: dict):
+    """Spill the least recently used in-memory items until the session is within its budget."""
+    in_memory = sorted(
+        (item["last_used"], key) for key, item in store["items"].items() if item["value"] is not None
+    )
+    used = sum(store["items"][key]["size"] for _, key in in_memory)
+    for _, key in in_memory:
+        if used <= store["budget"]:
+            break
+        used -= store["items"][key]["size"]
+        _spill(store, key)
+
+def _remove_spill_file(item: dict):
+    if item.get("path"):
+        try:
+            os.remove(item["path"])
+        except OSError:
+            pass
+
+def store_put(store: dict, key: str, value):
+    """
+    Stage raw file bytes or a DataFrame under a key, replacing any previous value.
+    Staged values are not copied: put a changed DataFrame back rather than editing it in place.
+    """
+    _touch(store)
+    if key in store["items"]:
+        _remove_spill_file(store["items"][key])
+    store["items"][key] = {
+        "value": value,
+        "size": _item_size(value),
+        "path": None,
+        "format": None,
+        "last_used": time.monotonic(),
+    }
+    _enforce_budget(store)
+
+def store_get(store: dict, key: str, default=None):
+    """Return a staged value, reloading it from the scratch directory if it was spilled."""
+    item = store["items"].get(key)
+    if item is None:
+        return default
+    _touch(store)
+    item["last_used"] = time.monotonic()
+    if item["value"] is not None:
+        return item["value"]
+
+    with open(item["path"], "rb") as f:
+        payload = f.read()
+    value = payload if item["format"] == "bytes" else frame_from_bytes(item["format"], payload)
+    item["value"] = value
+    _enforce_budget(store)
+    return value
+
+def store_contains(store: dict, key: str) -> bool:
+    return key in store["items"]
+
+def store_pop(store: dict, key: str):
+    """Drop a staged value and its spill file, if any."""
+    item = store["items"].pop(key, None)
+    if item is not None:
+        _remove_spill_file(item)
+
+def store_usage(store: dict):
+    """Return (bytes held in memory, bytes spilled to disk) for a session's staged items."""
+    memory = sum(item["size"] for item in store["items"].values() if item["value"] is not None)
+    disk = sum(
+        os.path.getsize(item["path"]) for item in store["items"].values()
+        if item["value"] is None and item["path"]
+    )
+    return memory, disk
+
+def clear_session_store(store: dict):
+    """Drop every staged item of a session and delete its scratch directory (e.g. on logout)."""
+    if not store:
+        return
+    store["items"].clear()
+    shutil.rmtree(store["dir"], ignore_errors=True)
+
+def prune_session_scratch():
+    """Delete the scratch directories of sessions idle for more than SESSION_SCRATCH_TTL_HOURS."""
+    cutoff = time.time() - SESSION_SCRATCH_TTL_HOURS * 3600
+    for name in os.listdir(SESSION_SCRATCH_DIR):
+        path = os.path.join(SESSION_SCRATCH_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            pass
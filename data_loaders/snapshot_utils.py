@@ -0,0 +1,177 @@
+import os
+import glob
+import threading
+import pandas as pd
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+from data_loaders.access_utils import REP_COLUMNS
+from data_loaders.version_utils import get_data_version
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc as ipc
+except ImportError:  # Without pyarrow, callers read straight from the database.
+    pa = None
+
+# Load environment variables
+load_dotenv()
+
+DATABASE_URL = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@" \
+               f"{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+
+# Directory holding one Arrow IPC file per (table, data version).
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")
+
+# Tables whose version is bumped by the ingest path; only these can be served from snapshots.
+SNAPSHOT_TABLES = {
+    "harmonised_table",
+    "master_cygnus_sales",
+    "master_logiquip_sales",
+    "master_summit_medical_sales",
+    "master_quickbooks_sales",
+    "master_inspektor_sales",
+    "master_sunoptic_sales",
+    "master_ternio_sales",
+    "master_novo_sales",
+    "master_chemence_sales",
+}
+
+# Snapshot rows are written in this column's order (when the table has it), so filtered reads
+# come out in the order the pages show them without a per-session sort.
+SNAPSHOT_SORT_COLUMN = "Sales Rep Name"
+
+# Process-level cache shared by every Streamlit session: {table_name: (version, pyarrow.Table)}.
+# The tables are memory-mapped from the snapshot files, so the operating system keeps a single
+# copy of the data in the page cache no matter how many sessions read it.
+_snapshots = {}
+
+# One lock per table, so writing one table's snapshot does not hold up readers of the others.
+_snapshot_locks = {}
+_snapshot_locks_guard = threading.Lock()
+
+def get_db_connection():
+    """Create a database connection."""
+    engine = create_engine(DATABASE_URL)
+    return engine
+
+def _snapshot_lock(table_name: str) -> threading.Lock:
+    with _snapshot_locks_guard:
+        return _snapshot_locks.setdefault(table_name, threading.Lock())
+
+def snapshots_available(table_name: str) -> bool:
+    """Return True if a table can be served from snapshots (pyarrow installed and table versioned)."""
+    return pa is not None and table_name in SNAPSHOT_TABLES
+
+def snapshot_path(table_name: str, version: int) -> str:
+    """Return the path of the snapshot file for a table version."""
+    return os.path.join(SNAPSHOT_DIR, f"{table_name}_v{version}_sorted.arrow")
+
+def write_snapshot(table_name: str, version: int) -> str:
+    """
+    Write the current content of a table to an Arrow IPC file for the given version.
+    The file is written under a temporary name and renamed, so readers never see a partial file.
+    """
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    engine = get_db_connection()
+    try:
+        with engine.connect() as conn:
+            df = pd.read_sql_query(text(f"SELECT * FROM {table_name}"), conn)
+    finally:
+        engine.dispose()
+
+    if SNAPSHOT_SORT_COLUMN in df.columns:
+        df = df.sort_values(SNAPSHOT_SORT_COLUMN, kind="stable")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    path = snapshot_path(table_name, version)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return path
+
+def remove_old_snapshots(table_name: str, keep_version: int):
+    """Delete snapshot files of older versions of a table."""
+    for path in glob.glob(os.path.join(SNAPSHOT_DIR, f"{table_name}_v*.arrow")):
+        if path != snapshot_path(table_name, keep_version):
+            try:
+                os.remove(path)
+            except OSError:
+                # Another process may still have it mapped (Windows) or already removed it.
+                pass
+
+def get_snapshot(table_name: str):
+    """
+    Return the memory-mapped pyarrow.Table for the current data version of a table.
+    The snapshot file is written by the first reader of a new version.
+    """
+    version = get_data_version(table_name)
+    # Sessions reading a version that is already mapped do not wait for the lock.
+    cached = _snapshots.get(table_name)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    with _snapshot_lock(table_name):
+        cached = _snapshots.get(table_name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        path = snapshot_path(table_name, version)
+        if not os.path.exists(path):
+            write_snapshot(table_name, version)
+            remove_old_snapshots(table_name, version)
+
+        # read_all() on a memory-mapped file references the mapped pages instead of copying them.
+        table = ipc.open_file(pa.memory_map(path, "r")).read_all()
+        _snapshots[table_name] = (version, table)
+        return table
+
+def filter_snapshot(table, rep_name=None, filters=None):
+    """
+    Apply the row-level restriction and column filters to a snapshot table.
+
+    Args:
+        table: pyarrow.Table returned by get_snapshot.
+        rep_name: Sales Rep the session is restricted to (None for unrestricted sessions).
+        filters: Dictionary with column names as keys and lists of values to keep.
+
+    Returns:
+        pyarrow.Table holding only the matching rows. Unfiltered reads return the shared table itself.
+    """
+    mask = None
+    if rep_name is not None:
+        rep_column = next((col for col in REP_COLUMNS if col in table.column_names), None)
+        if rep_column is None:
+            # Never hand a restricted session rows it cannot be filtered on.
+            return table.slice(0, 0)
+        mask = pc.equal(table[rep_column], rep_name)
+
+    for column, values in (filters or {}).items():
+        if values and column in table.column_names:
+            value_mask = pc.is_in(table[column], value_set=pa.array(values, type=table.schema.field(column).type))
+            mask = value_mask if mask is None else pc.and_(mask, value_mask)
+
+    if mask is None:
+        return table
+    return table.filter(pc.fill_null(mask, False))
+
+def fetch_snapshot_table(table_name: str, rep_name=None, filters=None):
+    """Return the filtered rows of a table snapshot as a pyarrow.Table (see filter_snapshot)."""
+    return filter_snapshot(get_snapshot(table_name), rep_name=rep_name, filters=filters)
+
+def fetch_snapshot_frame(table_name: str, rep_name=None, filters=None) -> pd.DataFrame:
+    """
+    Return the filtered rows of a table snapshot as an Arrow-backed pandas DataFrame
+    (pd.ArrowDtype columns). The DataFrame references the Arrow buffers instead of copying them,
+    so an unfiltered read shares the memory-mapped snapshot; only filtered reads hold their own
+    rows. Convert just the rows that are displayed or edited to NumPy-backed columns.
+    """
+    table = fetch_snapshot_table(table_name, rep_name=rep_name, filters=filters)
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+def get_snapshot_values(table_name: str, column_name: str, rep_name=None) -> list:
+    """Return the sorted distinct non-null values of a column in a table snapshot."""
+    table = filter_snapshot(get_snapshot(table_name), rep_name=rep_name)
+    values = pc.unique(table[column_name].drop_null()).to_pylist()
+    return sorted(values)
@@ -226,15 +226,6 @@ def save_dataframe_to_db(df: pd.DataFrame, table_name: str = "master_summit_medi
             df.to_sql(table_name, con=engine, if_exists="append", index=False)
             debug_messages.append(f"✅ {len(df)} new records successfully added to '{table_name}'.")
 
-        # If the table is 'master_summit_medical_sales', update the harmonised table
-        if table_name == "master_summit_medical_sales":
-            harmonised_messages = update_harmonised_table("master_summit_medical_sales")
-            debug_messages.extend(harmonised_messages)
-            
-            # Now, after updating the harmonised table, update Commission tier 2 date.
-            commission_tier_2_messages = update_commission_tier_2_date()
-            debug_messages.extend(commission_tier_2_messages)
-
     except SQLAlchemyError as e:
         error_message = str(e)
         print(f"❌ Error saving data to '{table_name}': {error_message}")
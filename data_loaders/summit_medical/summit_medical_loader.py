@@ -1,29 +1,220 @@
 import os
 import re
+import numpy as np
 import pandas as pd
-import camelot
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from sqlalchemy import create_engine
 from dotenv import load_dotenv
 from data_loaders.validation_utils import validate_file_format
+from data_loaders.excel_utils import read_vendor_excel
+from data_loaders.parsing_utils import parse_amount, number_to_text
+
+# The PDF readers are only needed for PDF statements; Excel exports load without them.
+try:
+    import camelot
+except ImportError:
+    camelot = None
+try:
+    from PyPDF2 import PdfReader
+except ImportError:
+    PdfReader = None
 
 # Load environment variables
 load_dotenv()
 
 DATABASE_URL = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
 
+# Worker processes used to extract one Summit PDF; long statements are split into page ranges.
+PDF_EXTRACT_MAX_WORKERS = int(os.getenv("PDF_EXTRACT_MAX_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+# Fewest pages given to a worker: shorter statements are not worth the process start-up.
+PDF_EXTRACT_MIN_PAGES_PER_WORKER = int(os.getenv("PDF_EXTRACT_MIN_PAGES_PER_WORKER", "10"))
+
+# Summit statements are machine-generated text PDFs: set to 1 to read their text layer directly and
+# only fall back to Camelot when the layout is not recognised. Off by default until the text layer
+# matches Camelot on recorded statements (tests/test_summit_medical_loader.py).
+SUMMIT_PDF_TEXT_LAYER = os.getenv("SUMMIT_PDF_TEXT_LAYER", "0") == "1"
+
+# Number of statement columns (Column_0..Column_5) and the vertical distance, in points, within
+# which text fragments belong to the same line.
+SUMMIT_PDF_COLUMNS = 6
+SUMMIT_PDF_LINE_TOLERANCE = 2.0
+
 def get_db_connection():
     """Create a database connection."""
     engine = create_engine(DATABASE_URL)
     return engine
 
-def extract_tables_from_pdf(pdf_file_path):
-    """Extract tables from PDF using Camelot."""
-    tables = camelot.read_pdf(pdf_file_path, pages="all", flavor="stream")
-    if not tables:
+def get_pdf_page_count(pdf_file_path) -> int:
+    """Return the number of pages of a PDF."""
+    with open(pdf_file_path, "rb") as f:
+        return len(PdfReader(f).pages)
+
+def split_page_ranges(page_count: int, chunks: int):
+    """Split pages 1..page_count into at most `chunks` contiguous (first, last) page ranges of similar size."""
+    chunks = max(1, min(chunks, page_count))
+    size, extra = divmod(page_count, chunks)
+    ranges = []
+    first = 1
+    for i in range(chunks):
+        last = first + size - 1 + (1 if i < extra else 0)
+        ranges.append((first, last))
+        first = last + 1
+    return ranges
+
+def extract_page_range(pdf_file_path, first: int, last: int):
+    """Extract the tables of pages first..last with Camelot; returns their DataFrames in page order."""
+    tables = camelot.read_pdf(pdf_file_path, pages=f"{first}-{last}", flavor="stream")
+    return [table.df for table in tables]
+
+def read_text_layer_lines(page):
+    """
+    Read the text fragments of a PDF page with their positions and group them into lines,
+    top to bottom. Each line is a list of (x start, x centre, text) sorted left to right.
+    """
+    fragments = []
+
+    def visit(text, cm, tm, font_dict, font_size):
+        text = text.strip()
+        if not text:
+            return
+        x = tm[4] * cm[0] + tm[5] * cm[2] + cm[4]
+        y = tm[4] * cm[1] + tm[5] * cm[3] + cm[5]
+        # Helvetica-like fonts average about half an em per character.
+        width = len(text) * font_size * (abs(tm[0] * cm[0]) or 1) * 0.5
+        fragments.append((y, x, x + width / 2, text))
+
+    page.extract_text(visitor_text=visit)
+
+    lines = []
+    line_y = None
+    for y, x, centre, text in sorted(fragments, key=lambda f: (-f[0], f[1])):
+        if line_y is None or line_y - y > SUMMIT_PDF_LINE_TOLERANCE:
+            lines.append([])
+            line_y = y
+        lines[-1].append((x, centre, text))
+    return [sorted(line) for line in lines]
+
+def _is_amount(value: str) -> bool:
+    try:
+        float(value.replace(",", "").replace("$", "").replace("%", ""))
+    except ValueError:
+        return False
+    return True
+
+def extract_tables_from_text_layer(pdf_file_path, progress_callback=None):
+    """
+    Extract the statement table of a Summit PDF from its text layer with PyPDF2.
+
+    The column x-ranges come from each page's header line (the line whose first cell starts with
+    "Name"); every text line of the page becomes a row of Column_0..Column_5, the same shape as the
+    Camelot tables. Returns None when the layout is not recognised, so the caller can use Camelot:
+    a page without a six-cell header line, an invoice line whose amounts are not numbers, or a
+    table format_table_logic_and_update_df finds no statement date or Sales Rep Code in.
+    """
+    reader = PdfReader(pdf_file_path)
+    page_count = len(reader.pages)
+    rows = []
+    invoice_rows = 0
+    for page_number, page in enumerate(reader.pages, start=1):
+        lines = read_text_layer_lines(page)
+        header = next((line for line in lines if line[0][2].startswith("Name")), None)
+        if header is None or len(header) != SUMMIT_PDF_COLUMNS:
+            print(f"Summit PDF page {page_number}: no {SUMMIT_PDF_COLUMNS}-column header line, using Camelot.")
+            return None
+        # A cell belongs to the column whose header starts at or before its centre.
+        column_starts = [x for x, _, _ in header]
+
+        for line in lines:
+            cells = [[] for _ in range(SUMMIT_PDF_COLUMNS)]
+            for _, centre, text in line:
+                column = sum(start <= centre for start in column_starts[1:])
+                cells[column].append(text)
+            row = [" ".join(cell) for cell in cells]
+            if line is not header and row[1] and row[2]:
+                if not all(_is_amount(value) for value in row[3:6]):
+                    print(f"Summit PDF page {page_number}: unexpected amounts {row[3:6]}, using Camelot.")
+                    return None
+                invoice_rows += 1
+            rows.append(row)
+
+        if progress_callback:
+            progress_callback(page_number, page_count)
+
+    if not invoice_rows:
+        print("Summit PDF: no invoice lines found in the text layer, using Camelot.")
+        return None
+
+    # The statement date and the Sales Rep Code are read from the rows around the invoice lines
+    # (see format_table_logic_and_update_df): check both are found in the table as read.
+    raw_df = pd.DataFrame(rows)
+    formatted_df, date, _, _ = format_table_logic_and_update_df(clean_extracted_data(raw_df))
+    if date is None:
+        print("Summit PDF: no statement date found in the text layer, using Camelot.")
+        return None
+    if formatted_df.empty or not str(formatted_df.at[0, "Sales Rep Code"]).strip():
+        print("Summit PDF: no Sales Rep Code found in the text layer, using Camelot.")
+        return None
+    return raw_df
+
+def extract_tables_from_pdf(pdf_file_path, max_workers: int = None, progress_callback=None):
+    """
+    Extract tables from PDF using Camelot.
+
+    With SUMMIT_PDF_TEXT_LAYER on, the text layer is tried first (see
+    extract_tables_from_text_layer). Otherwise long statements are split into page ranges
+    extracted concurrently in a process pool; the tables are combined in page order, so the
+    result is the same as one pages="all" call.
+
+    Args:
+        pdf_file_path: Path to the PDF.
+        max_workers: Size of the pool (defaults to PDF_EXTRACT_MAX_WORKERS).
+        progress_callback: Optional function called with (pages done, total pages) as ranges finish.
+    """
+    if camelot is None or PdfReader is None:
+        raise ImportError("camelot and PyPDF2 are required to read Summit Medical PDF statements.")
+
+    if SUMMIT_PDF_TEXT_LAYER:
+        combined_df = extract_tables_from_text_layer(pdf_file_path, progress_callback)
+        if combined_df is not None:
+            return combined_df
+
+    max_workers = max_workers or PDF_EXTRACT_MAX_WORKERS
+    page_count = get_pdf_page_count(pdf_file_path)
+    if page_count == 0:
+        raise ValueError("No tables were found in the PDF using Camelot.")
+    chunks = -(-page_count // PDF_EXTRACT_MIN_PAGES_PER_WORKER)
+    # Inside a batch parsing worker the files are already parsed in parallel: don't nest pools.
+    if multiprocessing.parent_process() is not None:
+        max_workers = 1
+    page_ranges = split_page_ranges(page_count, min(max_workers, chunks))
+
+    results = [None] * len(page_ranges)
+    pages_done = 0
+    if len(page_ranges) == 1:
+        results[0] = extract_page_range(pdf_file_path, 1, page_count)
+        if progress_callback:
+            progress_callback(page_count, page_count)
+    else:
+        with ProcessPoolExecutor(max_workers=len(page_ranges)) as executor:
+            futures = {
+                executor.submit(extract_page_range, pdf_file_path, first, last): i
+                for i, (first, last) in enumerate(page_ranges)
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                results[i] = future.result()
+                first, last = page_ranges[i]
+                pages_done += last - first + 1
+                if progress_callback:
+                    progress_callback(pages_done, page_count)
+
+    df_list = [df for dfs in results for df in dfs]
+    if not df_list:
         raise ValueError("No tables were found in the PDF using Camelot.")
     
     # Combine all tables into a single DataFrame
-    df_list = [table.df for table in tables]
     combined_df = pd.concat(df_list, ignore_index=True)
     return combined_df
 
@@ -48,45 +239,42 @@ def format_table_logic_and_update_df(cleaned_df: pd.DataFrame):
     date = None
     date_mm = None
     date_yyyy = None
-    rows_to_drop = []
 
     # ----------------------
     # Identify date + row drops with 3 consecutive empty cells in Column_0
-    consecutive_empty_count = 0
-    for index, cell in enumerate(cleaned_df["Column_0"]):
-        if pd.isna(cell) or cell == "":
-            consecutive_empty_count += 1
-            if consecutive_empty_count == 3:
-                row_index = index
-                rows_to_drop.extend([row_index - 2, row_index - 1, row_index])
-                if date is None:
-                    for col in cleaned_df.columns:
-                        val = cleaned_df.at[row_index, col]
-                        if pd.notna(val) and val != "":
-                            raw_date = str(val).split(" ")[0]
-                            match = re.match(r"(\d{1,2})/(\d{1,2})/(\d{4})", raw_date)
-                            if match:
-                                month, day, year = match.groups()
-                                date_mm = f"{int(month):02d}"
-                                date_yyyy = year
-                                date = f"{year}-{date_mm}"
-                            break
-        else:
-            consecutive_empty_count = 0
+    first_col = cleaned_df["Column_0"]
+    is_empty = (first_col.isna() | (first_col == "")).to_numpy()
+    # Position of each row within its run of empty cells (0 for non-empty rows).
+    run_start = np.maximum.accumulate(np.where(~is_empty, np.arange(len(is_empty)), -1))
+    run_position = np.where(is_empty, np.arange(len(is_empty)) - run_start, 0)
+    third_empty = np.flatnonzero(run_position == 3)
+    rows_to_drop = np.concatenate([third_empty - 2, third_empty - 1, third_empty])
+
+    # The date is read from the first such row whose first populated cell holds one.
+    for row_index in third_empty:
+        row = cleaned_df.iloc[row_index]
+        populated = row[row.notna() & (row != "")]
+        if populated.empty:
+            continue
+        raw_date = str(populated.iloc[0]).split(" ")[0]
+        match = re.match(r"(\d{1,2})/(\d{1,2})/(\d{4})", raw_date)
+        if match:
+            month, day, year = match.groups()
+            date_mm = f"{int(month):02d}"
+            date_yyyy = year
+            date = f"{year}-{date_mm}"
+            break
 
     # ----------------------
-    # Additional row drops
-    for index, cell in enumerate(cleaned_df["Column_0"]):
-        # Drop rows starting with "Total"
-        if isinstance(cell, str) and cell.strip().startswith("Total"):
-            rows_to_drop.append(index)
-        # Drop rows starting with "Name" + next row
-        if isinstance(cell, str) and cell.strip().startswith("Name"):
-            rows_to_drop.extend([index, index + 1])
+    # Additional row drops: rows starting with "Total", rows starting with "Name" + next row
+    stripped = first_col.str.strip()
+    is_total = stripped.str.startswith("Total", na=False).to_numpy(dtype=bool)
+    is_name = stripped.str.startswith("Name", na=False).to_numpy(dtype=bool)
+    name_rows = np.flatnonzero(is_name)
+    rows_to_drop = np.concatenate([rows_to_drop, np.flatnonzero(is_total), name_rows, name_rows + 1])
 
     # Remove duplicates, drop them
-    rows_to_drop = list(set(rows_to_drop))
-    cleaned_df.drop(rows_to_drop, inplace=True)
+    cleaned_df.drop(np.unique(rows_to_drop), inplace=True)
     cleaned_df.reset_index(drop=True, inplace=True)
 
     # ----------------------
@@ -106,17 +294,16 @@ def format_table_logic_and_update_df(cleaned_df: pd.DataFrame):
 
     # ----------------------
     # If Column_1 is populated, fill Column_7 with next row's Column_0
-    for index in range(len(cleaned_df) - 1):
-        if not pd.isna(cleaned_df.at[index, "Column_1"]) and cleaned_df.at[index, "Column_1"] != "":
-            cleaned_df.at[index, "Column_7"] = cleaned_df.at[index + 1, "Column_0"]
+    has_invoice = cleaned_df["Column_1"].notna() & (cleaned_df["Column_1"] != "")
+    has_invoice.iloc[-1:] = False
+    cleaned_df.loc[has_invoice, "Column_7"] = cleaned_df["Column_0"].shift(-1)[has_invoice]
 
     # If Column_7 is populated, last 5 go to Column_8, first 2 remain in Column_7
-    for index in range(len(cleaned_df)):
-        val = cleaned_df.at[index, "Column_7"]
-        if pd.notna(val) and val != "":
-            val_str = str(val)
-            cleaned_df.at[index, "Column_8"] = val_str[-5:]
-            cleaned_df.at[index, "Column_7"] = val_str[:2]
+    address = cleaned_df["Column_7"]
+    has_address = address.notna() & (address != "")
+    address = address[has_address].astype(str)
+    cleaned_df.loc[has_address, "Column_8"] = address.str[-5:]
+    cleaned_df.loc[has_address, "Column_7"] = address.str[:2]
 
     # ----------------------
     # Fill Column_6 with first row's Column_0 (strip .00)
@@ -163,12 +350,7 @@ def format_table_logic_and_update_df(cleaned_df: pd.DataFrame):
     cleaned_df["Sales Rep Name"] = ""         
 
     # Convert "Comm $" to numeric (remove commas if any) for calculations
-    cleaned_df["Comm $"] = (
-        cleaned_df["Comm $"]
-        .astype(str)
-        .str.replace(",", "", regex=False)
-    )
-    cleaned_df["Comm $"] = pd.to_numeric(cleaned_df["Comm $"], errors="coerce")
+    cleaned_df["Comm $"] = parse_amount(cleaned_df["Comm $"])
 
     # ----------------------
     # Format numeric columns
@@ -179,20 +361,14 @@ def format_table_logic_and_update_df(cleaned_df: pd.DataFrame):
     ]
     for col in columns_to_format:
         if col in cleaned_df.columns:
-            # Remove commas if any
-            cleaned_df[col] = (
-                cleaned_df[col]
-                .astype(str)
-                .str.replace(",", "", regex=False)
-            )
-            # Convert to float
-            cleaned_df[col] = pd.to_numeric(cleaned_df[col], errors="coerce")
+            # Remove commas if any and convert to float
+            cleaned_df[col] = parse_amount(cleaned_df[col])
             # Keep them numeric and just round them to 2 decimals:
             cleaned_df[col] = cleaned_df[col].round(2)
 
     return cleaned_df, date, date_mm, date_yyyy
 
-def load_pdf_file_summit_medical(filepath: str) -> pd.DataFrame:
+def load_pdf_file_summit_medical(filepath: str, progress_callback=None) -> pd.DataFrame:
     """
     Main function to load and process a Summit Medical PDF:
       1) Extract data with Camelot,
@@ -205,7 +381,7 @@ def load_pdf_file_summit_medical(filepath: str) -> pd.DataFrame:
     while Commission Date fields are left empty to be filled by sales_data_upload.py.
     """
     # Step 1: Extract raw data
-    raw_data = extract_tables_from_pdf(filepath)
+    raw_data = extract_tables_from_pdf(filepath, progress_callback=progress_callback)
     # Step 2: Clean extracted data
     cleaned_data = clean_extracted_data(raw_data)
     # Step 3: Format table & add calculations
@@ -270,7 +446,7 @@ def load_excel_file_summit_medical(filepath: str, year: str = None, month: str =
     
     try:
         # First attempt - try to read with specified dtype for text columns
-        df = pd.read_excel(
+        df = read_vendor_excel(
             filepath, 
             dtype={
                 'Invoice #': str,
@@ -279,12 +455,12 @@ def load_excel_file_summit_medical(filepath: str, year: str = None, month: str =
         )
     except Exception:
         # Fallback - read without dtype specification
-        df = pd.read_excel(filepath)
+        df = read_vendor_excel(filepath)
         # Then fix the columns manually
         if 'Invoice #' in df.columns:
-            df['Invoice #'] = df['Invoice #'].apply(lambda x: str(int(x)) if pd.notnull(x) else '')
+            df['Invoice #'] = number_to_text(df['Invoice #']).where(df['Invoice #'].notna(), '')
         if 'ZIP Code' in df.columns:
-            df['ZIP Code'] = df['ZIP Code'].apply(lambda x: str(int(x)) if pd.notnull(x) else '')
+            df['ZIP Code'] = number_to_text(df['ZIP Code']).where(df['ZIP Code'].notna(), '')
     
     # Run validation on the raw DataFrame
     is_valid, missing = validate_file_format(df, "Summit Medical Excel")
@@ -301,15 +477,11 @@ def load_excel_file_summit_medical(filepath: str, year: str = None, month: str =
     # 1. Fix text columns that might have been interpreted as numbers
     # Invoice # as text - handle float conversion if needed
     if "Invoice #" in df.columns:
-        df["Invoice #"] = df["Invoice #"].apply(
-            lambda x: str(int(float(x))) if pd.notnull(x) and not isinstance(x, str) else str(x)
-        ).str.strip()
+        df["Invoice #"] = number_to_text(df["Invoice #"]).str.strip()
     
     # ZIP Code as text - handle float conversion if needed
     if "ZIP Code" in df.columns:
-        df["ZIP Code"] = df["ZIP Code"].apply(
-            lambda x: str(int(float(x))) if pd.notnull(x) and not isinstance(x, str) else str(x)
-        ).str.strip()
+        df["ZIP Code"] = number_to_text(df["ZIP Code"]).str.strip()
     
     # State as text
     if "St" in df.columns:
@@ -319,11 +491,8 @@ def load_excel_file_summit_medical(filepath: str, year: str = None, month: str =
     numeric_columns = ["CommRate", "Sum of Net Sales Amount", "Sum of Comm $"]
     for col in numeric_columns:
         if col in df.columns:
-            # Remove any currency symbols or thousand separators
-            if df[col].dtype == object:  # If it's already a string
-                df[col] = df[col].str.replace('$', '', regex=False).str.replace(',', '', regex=False)
-            # Convert to numeric and round to 2 decimals
-            df[col] = pd.to_numeric(df[col], errors='coerce').round(2)
+            # Remove any currency symbols or thousand separators, convert to numeric and round to 2 decimals
+            df[col] = parse_amount(df[col]).round(2)
     
     # Rename columns to match standardized format
     column_mapping = {
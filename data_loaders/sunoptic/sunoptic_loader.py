@@ -3,6 +3,10 @@ from sqlalchemy import create_engine
 from dotenv import load_dotenv
 import os
 from data_loaders.validation_utils import validate_file_format
+from data_loaders.excel_utils import read_vendor_excel
+from data_loaders.parsing_utils import parse_amount, parse_percent, parse_dates, date_parts
+from data_loaders.sales_rep_utils import resolve_sales_reps
+from data_loaders.reference_cache_utils import load_reference_table
 
 # Load environment variables
 load_dotenv()
@@ -16,27 +20,23 @@ def get_db_connection():
 
 def load_master_sales_rep():
     """Load the master_sales_rep table from the database."""
-    query = """
-        SELECT "Source", "Customer field", "Data field value", "Sales Rep name", "Valid from", "Valid until"
-        FROM master_sales_rep
-        WHERE "Source" = 'Sunoptics'
-    """
-    engine = get_db_connection()
     try:
-        with engine.connect() as conn:
-            master_df = pd.read_sql_query(query, conn)
+        # Cached per process and re-read only when master_sales_rep is edited
+        master_df = load_reference_table("master_sales_rep")
+        master_df = master_df.loc[
+            master_df["Source"] == "Sunoptics",
+            ["Source", "Customer field", "Data field value", "Sales Rep name", "Valid from", "Valid until"]
+        ].reset_index(drop=True)
         # Convert date columns to datetime
         master_df["Valid from"] = pd.to_datetime(master_df["Valid from"], errors='coerce')
         master_df["Valid until"] = pd.to_datetime(master_df["Valid until"], errors='coerce')
         return master_df
     except Exception as e:
         raise RuntimeError(f"Error loading master_sales_rep table: {e}")
-    finally:
-        engine.dispose()
 
 def load_excel_file_sunoptic(filepath: str) -> pd.DataFrame:
     # Read the Excel file starting from the correct header row
-    raw_df = pd.read_excel(filepath, header=0)
+    raw_df = read_vendor_excel(filepath, header=0)
     # Run validation on the raw DataFrame
     is_valid, missing = validate_file_format(raw_df, "Sunoptic")
     if not is_valid:
@@ -62,18 +62,17 @@ def load_excel_file_sunoptic(filepath: str) -> pd.DataFrame:
 
     # 6. Convert "Commission %" from percentage to decimal factor
     if "Commission %" in df.columns:
-        df["Commission %"] = df["Commission %"].astype(str).str.replace('%', '', regex=False)
-        df["Commission %"] = pd.to_numeric(df["Commission %"], errors='coerce')
+        df["Commission %"] = parse_percent(df["Commission %"])
 
     # 2. Convert "Invoice Date" to "Revenue Recognition Date" fields
     if "Invoice Date" in df.columns:
         # Convert to datetime for processing
-        invoice_date = pd.to_datetime(df["Invoice Date"], errors='coerce')
+        date_text, year_text, month_text = date_parts(parse_dates(df["Invoice Date"]))
         
         # Create Revenue Recognition Date columns
-        df["Revenue Recognition Date"] = invoice_date.dt.strftime('%Y-%m-%d')
-        df["Revenue Recognition Date YYYY"] = invoice_date.dt.year.astype(str)
-        df["Revenue Recognition Date MM"] = invoice_date.dt.month.astype(str).str.zfill(2)
+        df["Revenue Recognition Date"] = date_text
+        df["Revenue Recognition Date YYYY"] = year_text.fillna("nan")
+        df["Revenue Recognition Date MM"] = month_text.fillna("nan")
         
         # Remove the original Invoice Date column - we don't need it anymore
         df = df.drop(columns=["Invoice Date"])
@@ -82,8 +81,7 @@ def load_excel_file_sunoptic(filepath: str) -> pd.DataFrame:
     monetary_columns = ["Unit Price", "Line Amount", "Commission $"]
     for col in monetary_columns:
         if col in df.columns:
-            df[col] = df[col].astype(str).str.replace('$', '', regex=False).str.replace(',', '', regex=False)
-            df[col] = pd.to_numeric(df[col], errors='coerce').round(2)
+            df[col] = parse_amount(df[col]).round(2)
     
     # 5. Convert "Ship Qty" to numeric with specified precision
     if "Ship Qty" in df.columns:
@@ -92,24 +90,6 @@ def load_excel_file_sunoptic(filepath: str) -> pd.DataFrame:
     # ✅ Load the master data from the database
     master_df = load_master_sales_rep()
 
-    # ✅ Enrich the DataFrame
-    def enrich_sales_rep(name):
-        # Convert empty strings to None before processing
-        if pd.isna(name) or str(name).strip() == "":
-            return None
-            
-        # Ensure we're using string comparison correctly
-        match = master_df[
-            (master_df["Source"] == "Sunoptics") &
-            (master_df["Data field value"].str.strip() == str(name).strip())
-        ]
-        
-        if not match.empty:
-            return match.iloc[0]["Sales Rep name"]
-        
-        # Explicitly return None, not an empty string
-        return None
-    
     # After enrichment, ensure empty strings are converted to None
     if "Sales Rep Name" in df.columns:
         df["Sales Rep Name"] = df["Sales Rep Name"].apply(
@@ -118,6 +98,11 @@ def load_excel_file_sunoptic(filepath: str) -> pd.DataFrame:
     
     # Enrich the data
     if "Customer ID" in df.columns:
-        df["Sales Rep Name"] = df["Customer ID"].apply(enrich_sales_rep)
+        # Empty Customer IDs and unmatched ones get None, not an empty string
+        df["Sales Rep Name"], unmatched = resolve_sales_reps(
+            master_df, df["Customer ID"], source="Sunoptics", strip=True, skip_blank=True
+        )
+        if unmatched:
+            print(f"⚠️ No Sales Rep found for {len(unmatched)} Sunoptic Customer IDs: {', '.join(unmatched[:10])}")
         
     return df
\ No newline at end of file
@@ -4,6 +4,10 @@ from dotenv import load_dotenv
 import os
 import numpy as np
 from data_loaders.validation_utils import validate_file_format
+from data_loaders.excel_utils import read_vendor_excel
+from data_loaders.parsing_utils import parse_amount, canonical_id, parse_dates, date_parts
+from data_loaders.sales_rep_utils import resolve_sales_reps
+from data_loaders.reference_cache_utils import load_reference_table
 
 # Load environment variables
 load_dotenv()
@@ -17,23 +21,103 @@ def get_db_connection():
 
 def load_master_sales_rep():
     """Load the master_sales_rep table from the database."""
-    query = """
-        SELECT "Source", "Customer field", "Data field value", "Sales Rep name", "Valid from", "Valid until"
-        FROM master_sales_rep
-        WHERE "Source" = 'Ternio'
-    """
-    engine = get_db_connection()
     try:
-        with engine.connect() as conn:
-            master_df = pd.read_sql_query(query, conn)
+        # Cached per process and re-read only when master_sales_rep is edited
+        master_df = load_reference_table("master_sales_rep")
+        master_df = master_df.loc[
+            master_df["Source"] == "Ternio",
+            ["Source", "Customer field", "Data field value", "Sales Rep name", "Valid from", "Valid until"]
+        ].reset_index(drop=True)
         # Convert date columns to datetime
         master_df["Valid from"] = pd.to_datetime(master_df["Valid from"], errors='coerce')
         master_df["Valid until"] = pd.to_datetime(master_df["Valid until"], errors='coerce')
         return master_df
     except Exception as e:
         raise RuntimeError(f"Error loading master_sales_rep table: {e}")
-    finally:
-        engine.dispose()
+
+# Columns copied onto a client row from the Payment row that follows it.
+PAYMENT_COLUMNS = [
+    "Transaction Type 1",
+    "Revenue Recognition Date",
+    "Revenue Recognition Date YYYY",
+    "Revenue Recognition Date MM",
+    "Paid",
+    "Comm Amount",
+]
+
+# Columns copied from the Invoice row ("Transaction Type 2" and "Invoice Date" come from its
+# "Transaction Type 1" and "Revenue Recognition Date").
+INVOICE_COLUMNS = ["Memo/Description", "Num", "Invoiced"]
+
+def merge_payment_invoice_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Merge the Payment and Invoice rows of a Ternio export into single rows.
+
+    Rows are read top to bottom, each row starting one of these patterns:
+      - Client row (Client Name populated) followed by a Payment row and an Invoice row:
+        the Payment and Invoice data are copied onto the client row and both rows are dropped.
+      - Payment row without Client Name (not the first or last row): it takes the last populated
+        Client Name above it and the data of the next (Invoice) row, which is dropped.
+      - Client row that is the last row: dropped.
+    Rows dropped by a pattern do not start one themselves.
+
+    The patterns are matched on shifted columns for all rows at once; only the walk deciding which
+    rows start a pattern (given each row's pattern length) is a loop over integers.
+    """
+    merged_df = df.reset_index(drop=True).copy()
+    n = len(merged_df)
+    if n == 0:
+        return merged_df
+
+    client = merged_df["Client Name"]
+    has_client = (client.notna() & (client != "")).to_numpy()
+    transaction = merged_df["Transaction Type 1"]
+    next_is_payment = (transaction.shift(-1) == "Payment").to_numpy()
+    next_next_is_invoice = (transaction.shift(-2) == "Invoice").to_numpy()
+    positions = np.arange(n)
+
+    # Rows consumed by a pattern starting at each row (0 when the row starts no pattern)
+    client_pattern = has_client & (positions + 2 < n) & next_is_payment & next_next_is_invoice
+    payment_pattern = (~has_client & (transaction == "Payment").to_numpy() & (positions > 0) & (positions + 1 < n))
+    step = np.where(client_pattern, 3, np.where(payment_pattern, 2, 1))
+
+    starts = np.zeros(n, dtype=bool)
+    steps = step.tolist()
+    i = 0
+    while i < n:
+        starts[i] = True
+        i += steps[i]
+
+    client_rows = np.flatnonzero(starts & client_pattern)
+    payment_rows = np.flatnonzero(starts & payment_pattern)
+
+    # Client rows: Payment data from the next row, Invoice data from the row after
+    if len(client_rows):
+        for col in PAYMENT_COLUMNS:
+            merged_df.loc[client_rows, col] = merged_df[col].to_numpy()[client_rows + 1]
+        invoice_rows = client_rows + 2
+        merged_df.loc[client_rows, "Transaction Type 2"] = df["Transaction Type 1"].to_numpy()[invoice_rows]
+        merged_df.loc[client_rows, "Invoice Date"] = df["Revenue Recognition Date"].to_numpy()[invoice_rows]
+        for col in INVOICE_COLUMNS:
+            merged_df.loc[client_rows, col] = merged_df[col].to_numpy()[invoice_rows]
+
+    # Payment rows without client: last populated Client Name above, Invoice data from the next row
+    if len(payment_rows):
+        previous_client = client.where(has_client).ffill().shift(1).to_numpy()[payment_rows]
+        found = pd.notna(previous_client)
+        merged_df.loc[payment_rows[found], "Client Name"] = previous_client[found]
+        invoice_rows = payment_rows + 1
+        merged_df.loc[payment_rows, "Transaction Type 2"] = df["Transaction Type 1"].to_numpy()[invoice_rows]
+        merged_df.loc[payment_rows, "Invoice Date"] = df["Revenue Recognition Date"].to_numpy()[invoice_rows]
+        for col in INVOICE_COLUMNS:
+            merged_df.loc[payment_rows, col] = merged_df[col].to_numpy()[invoice_rows]
+
+    to_drop = np.concatenate([client_rows + 1, client_rows + 2, payment_rows + 1])
+    if starts[n - 1] and has_client[n - 1]:
+        to_drop = np.append(to_drop, n - 1)
+
+    # Drop the rows marked for deletion
+    return merged_df.drop(to_drop).reset_index(drop=True)
 
 def load_excel_file_ternio(filepath: str) -> pd.DataFrame:
     """
@@ -47,21 +131,20 @@ def load_excel_file_ternio(filepath: str) -> pd.DataFrame:
       4. Rename and reformat columns as specified
       5. Apply complex merge logic for Payment and Invoice rows
     """
-    # Read the Excel file starting from the 6th row (index 5)
-    # First read the header row (row 5) to get column names
-    header_df = pd.read_excel(filepath, header=None, skiprows=4, nrows=1)
+    # Read the sheet once from row 5 (the header) and split the header row from the data
+    # Use dtype parameter to explicitly set Num column as string
+    sheet_df = read_vendor_excel(filepath, header=None, skiprows=4, dtype={4: str})  # Column index 4 is "Num" based on your headers
     
     # Get column headers from the first row
-    column_headers = header_df.iloc[0, :7].tolist()
+    column_headers = sheet_df.iloc[0, :7].tolist()
     
     # Ensure column headers are valid
     # The first column is often None but we need a valid column name
     if column_headers[0] is None or pd.isna(column_headers[0]):
         column_headers[0] = "Unnamed"
     
-    # Read the actual data, starting from row 6
-    # Use dtype parameter to explicitly set Num column as string
-    raw_df = pd.read_excel(filepath, header=None, skiprows=5, dtype={4: str})  # Column index 4 is "Num" based on your headers
+    # The actual data starts from row 6; infer the column types again without the header row
+    raw_df = sheet_df.iloc[1:].reset_index(drop=True).infer_objects()
     
     # Apply the column headers to the first 7 columns
     columns_to_use = min(len(raw_df.columns), 7)
@@ -87,19 +170,14 @@ def load_excel_file_ternio(filepath: str) -> pd.DataFrame:
     # Ensure 'Date' column is properly formatted (if it exists)
     if "Date" in df.columns:
         # First convert to datetime, handling potential errors
-        df["Date"] = pd.to_datetime(df["Date"], errors='coerce')
+        date_text, year_text, month_text = date_parts(parse_dates(df["Date"]))
         
         # Add 'Revenue Recognition Date YYYY' and 'Revenue Recognition Date MM' columns, handling NaN values
-        df["Revenue Recognition Date YYYY"] = df["Date"].dt.year.astype("Int64").astype(str)
-        # Use dt.month directly without formatting
-        month_values = df["Date"].dt.month
-        # Convert to string and zero-pad month values, handling NaN
-        df["Revenue Recognition Date MM"] = month_values.apply(
-            lambda x: f"{int(x):02d}" if pd.notnull(x) else ""
-        )
+        df["Revenue Recognition Date YYYY"] = year_text.fillna("<NA>")
+        df["Revenue Recognition Date MM"] = month_text.fillna("")
         
         # Format 'Date' as YYYY-MM-DD
-        df["Revenue Recognition Date"] = df["Date"].dt.strftime('%Y-%m-%d')
+        df["Revenue Recognition Date"] = date_text
         
         # Drop the original Date column
         df = df.drop(columns=["Date"])
@@ -109,9 +187,7 @@ def load_excel_file_ternio(filepath: str) -> pd.DataFrame:
         # Remove any commas and convert to plain string format
         df["Num"] = df["Num"].astype(str).str.replace(',', '', regex=False)
         # Handle numeric values by converting them to simple strings without formatting
-        df["Num"] = df["Num"].apply(
-            lambda x: str(int(float(x))) if pd.notnull(x) and str(x).replace('.', '', 1).isdigit() else str(x)
-        )
+        df["Num"] = canonical_id(df["Num"])
         # Remove 'nan' strings
         df["Num"] = df["Num"].replace('nan', '')
     
@@ -120,9 +196,7 @@ def load_excel_file_ternio(filepath: str) -> pd.DataFrame:
     for col in numeric_columns:
         if col in df.columns:
             # Convert to string first, then process
-            df[col] = df[col].astype(str).str.replace('$', '', regex=False).str.replace(',', '', regex=False)
-            # Convert to numeric, handling any errors
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+            df[col] = parse_amount(df[col]).fillna(0)
     
     # === COLUMN REFORMATTING AS REQUESTED ===
     
@@ -147,40 +221,9 @@ def load_excel_file_ternio(filepath: str) -> pd.DataFrame:
     df["Commission Date YYYY"] = ""
     df["Commission Date MM"] = ""
     
-    # Add Sales Rep Name based on lookup
-    try:
-        # Load master data for Sales Rep lookup
-        master_df = load_master_sales_rep()
-        
-        # Function to lookup Sales Rep Name based on Client Name and dates
-        def lookup_sales_rep(row):
-            client_name = row["Client Name"]
-            payment_date = pd.to_datetime(row["Revenue Recognition Date"]) if pd.notna(row["Revenue Recognition Date"]) else None
-            
-            if pd.isna(client_name) or client_name == "" or payment_date is None:
-                return ""
-                
-            # Filter master_df for matching Client Names
-            matches = master_df[
-                (master_df["Customer field"] == "Client Name") & 
-                (master_df["Data field value"] == client_name)
-            ]
-            
-            # Filter by date validity
-            valid_matches = matches[
-                (matches["Valid from"] <= payment_date) & 
-                ((matches["Valid until"].isna()) | (matches["Valid until"] >= payment_date))
-            ]
-            
-            if not valid_matches.empty:
-                return valid_matches.iloc[0]["Sales Rep name"]
-            return ""
-        
-        # Apply the lookup function to each row
-        df["Sales Rep Name"] = df.apply(lookup_sales_rep, axis=1)
-    except Exception as e:
-        print(f"Error enriching Sales Rep Name: {e}")
-        df["Sales Rep Name"] = ""  # Fallback if lookup fails
+    # Sales Rep Name is looked up once the Payment and Invoice rows are merged (below), since the
+    # merge changes the Client Name and Revenue Recognition Date of the rows.
+    df["Sales Rep Name"] = ""
     
     # Round numeric values to 2 decimal places
     df["Invoiced"] = df["Invoiced"].round(2)
@@ -188,93 +231,8 @@ def load_excel_file_ternio(filepath: str) -> pd.DataFrame:
     df["Comm Amount"] = df["Comm Amount"].round(2)
     df["Comm Rate"] = df["Comm Rate"].round(2)
     
-    # ==========================================
-    # Complex merge logic for Payment and Invoice rows
-    # ==========================================
-    
-    # Make a copy to avoid issues with modifying during iteration
-    merged_df = df.copy()
-    
-    # Reset index to make it easier to work with
-    merged_df = merged_df.reset_index(drop=True)
-    
-    # List to track indices to drop
-    to_drop = []
-    
-    # Step 1-4: Process each row in the DataFrame
-    i = 0
-    while i < len(merged_df):
-        # If Client Name is populated (Case 1)
-        if pd.notna(merged_df.loc[i, "Client Name"]) and merged_df.loc[i, "Client Name"] != "":
-            # Check if we have at least two more rows
-            if i+2 < len(merged_df):
-                # Check if the pattern matches: Current row followed by Payment then Invoice
-                if (merged_df.loc[i+1, "Transaction Type 1"] == "Payment" and 
-                    merged_df.loc[i+2, "Transaction Type 1"] == "Invoice"):
-                    
-                    # Copy data from Payment row (i+1) to current row (i)
-                    merged_df.loc[i, "Transaction Type 1"] = merged_df.loc[i+1, "Transaction Type 1"]
-                    merged_df.loc[i, "Revenue Recognition Date"] = merged_df.loc[i+1, "Revenue Recognition Date"]
-                    merged_df.loc[i, "Revenue Recognition Date YYYY"] = merged_df.loc[i+1, "Revenue Recognition Date YYYY"]
-                    merged_df.loc[i, "Revenue Recognition Date MM"] = merged_df.loc[i+1, "Revenue Recognition Date MM"]
-                    merged_df.loc[i, "Paid"] = merged_df.loc[i+1, "Paid"]
-                    merged_df.loc[i, "Comm Amount"] = merged_df.loc[i+1, "Comm Amount"]
-                    
-                    # Copy data from Invoice row (i+2) to current row (i)
-                    merged_df.loc[i, "Transaction Type 2"] = merged_df.loc[i+2, "Transaction Type 1"]
-                    merged_df.loc[i, "Invoice Date"] = merged_df.loc[i+2, "Revenue Recognition Date"]
-                    merged_df.loc[i, "Memo/Description"] = merged_df.loc[i+2, "Memo/Description"]
-                    merged_df.loc[i, "Num"] = merged_df.loc[i+2, "Num"]
-                    merged_df.loc[i, "Invoiced"] = merged_df.loc[i+2, "Invoiced"]
-                    
-                    # Mark rows i+1 and i+2 for deletion
-                    to_drop.extend([i+1, i+2])
-                    
-                    # Skip the rows we just processed
-                    i += 3
-                    continue
-            
-            # Check if this is the last row with a populated Client Name
-            if i == len(merged_df) - 1 or i + 1 >= len(merged_df):
-                to_drop.append(i)
-                i += 1
-                continue
-                
-        # Case 3: Empty Client Name and Transaction Type 1 is "Payment"
-        elif ((pd.isna(merged_df.loc[i, "Client Name"]) or merged_df.loc[i, "Client Name"] == "") and
-              merged_df.loc[i, "Transaction Type 1"] == "Payment"):
-            
-            # Check if we have at least one more row and there's a previous row
-            if i > 0 and i+1 < len(merged_df):
-                # Find the most recent populated Client Name
-                prev_idx = i - 1
-                while prev_idx >= 0:
-                    if (pd.notna(merged_df.loc[prev_idx, "Client Name"]) and 
-                        merged_df.loc[prev_idx, "Client Name"] != ""):
-                        # Copy Client Name from previous populated row
-                        merged_df.loc[i, "Client Name"] = merged_df.loc[prev_idx, "Client Name"]
-                        break
-                    prev_idx -= 1
-                
-                # Copy data from next row (Invoice)
-                merged_df.loc[i, "Transaction Type 2"] = merged_df.loc[i+1, "Transaction Type 1"]
-                merged_df.loc[i, "Invoice Date"] = merged_df.loc[i+1, "Revenue Recognition Date"]
-                merged_df.loc[i, "Memo/Description"] = merged_df.loc[i+1, "Memo/Description"]
-                merged_df.loc[i, "Num"] = merged_df.loc[i+1, "Num"]
-                merged_df.loc[i, "Invoiced"] = merged_df.loc[i+1, "Invoiced"]
-                
-                # Mark row i+1 for deletion
-                to_drop.append(i+1)
-                
-                # Skip the row we just processed
-                i += 2
-                continue
-        
-        # Move to the next row
-        i += 1
-    
-    # Drop the rows marked for deletion
-    merged_df = merged_df.drop(to_drop).reset_index(drop=True)
+    # Merge the Payment and Invoice rows into their client rows
+    merged_df = merge_payment_invoice_rows(df)
     
     # Reorder columns in the specified sequence
     ordered_columns = [ 
@@ -300,37 +258,19 @@ def load_excel_file_ternio(filepath: str) -> pd.DataFrame:
     existing_columns = [col for col in ordered_columns if col in merged_df.columns]
     merged_df = merged_df[existing_columns]
     
-    # Re-enrich Sales Rep Name after merging rows
+    # Enrich Sales Rep Name after merging rows: Client Name valid on the Revenue Recognition Date
     try:
-        # Load master data for Sales Rep lookup
         master_df = load_master_sales_rep()
-        
-        # Function to lookup Sales Rep Name based on Client Name and dates
-        def lookup_sales_rep(row):
-            client_name = row["Client Name"]
-            payment_date = pd.to_datetime(row["Revenue Recognition Date"]) if pd.notna(row["Revenue Recognition Date"]) else None
-            
-            if pd.isna(client_name) or client_name == "" or payment_date is None:
-                return ""
-                
-            # Filter master_df for matching Client Names
-            matches = master_df[
-                (master_df["Customer field"] == "Client Name") & 
-                (master_df["Data field value"] == client_name)
-            ]
-            
-            # Filter by date validity
-            valid_matches = matches[
-                (matches["Valid from"] <= payment_date) & 
-                ((matches["Valid until"].isna()) | (matches["Valid until"] >= payment_date))
-            ]
-            
-            if not valid_matches.empty:
-                return valid_matches.iloc[0]["Sales Rep name"]
-            return ""
-        
-        # Apply the lookup function to each row
-        merged_df["Sales Rep Name"] = merged_df.apply(lookup_sales_rep, axis=1)
+        merged_df["Sales Rep Name"], unmatched = resolve_sales_reps(
+            master_df,
+            merged_df["Client Name"],
+            dates=merged_df["Revenue Recognition Date"],
+            customer_field="Client Name",
+            skip_blank=True,
+            default="",
+        )
+        if unmatched:
+            print(f"⚠️ No Sales Rep found for {len(unmatched)} Ternio clients: {', '.join(unmatched[:10])}")
     except Exception as e:
         print(f"Error enriching Sales Rep Name after merge: {e}")
     
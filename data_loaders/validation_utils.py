@@ -1,4 +1,7 @@
+import io
+import numpy as np
 import pandas as pd
+from data_loaders.excel_utils import read_vendor_excel
 
 # You might also want to define EXPECTED_COLUMNS here or in another config file.# Serving the function validate_file_format()
 EXPECTED_COLUMNS = {
@@ -197,4 +200,193 @@ def validate_file_format(df: pd.DataFrame, file_type: str):
     # Find missing columns
     missing = list(expected - actual)
     
-    return (len(missing) == 0, missing)
\ No newline at end of file
+    return (len(missing) == 0, missing)
+
+# Raw header names for the vendors whose files do not carry their EXPECTED_COLUMNS names
+# (the loader renames or derives them). Summit Medical PDFs are not sampled.
+HEADER_FINGERPRINTS = {
+    "Summit Medical": EXPECTED_COLUMNS["Summit Medical Excel"],
+    "Ternio": ["Transaction Type", "Date", "Memo/Description", "Num", "Invoiced", "Paid"],
+}
+
+# Row (0-based, counting from the top of the sheet) holding the header in each vendor's file.
+HEADER_ROWS = {
+    "Cygnus": 3,
+    "Logiquip": 1,
+    "Summit Medical": 0,
+    "QuickBooks": 4,
+    "InspeKtor": 0,
+    "Sunoptic": 0,
+    "Ternio": 4,
+    "Novo": 2,
+    "Chemence": 3,
+}
+
+HEADER_SAMPLE_ROWS = 30
+
+# A header row is accepted when at least this share of a vendor's fingerprint is found in it.
+HEADER_MATCH_THRESHOLD = 0.6
+
+def _normalise_header(value) -> str:
+    return str(value).strip().casefold() if pd.notna(value) else ""
+
+def get_header_fingerprint(file_type: str) -> set:
+    """
+    Normalised raw header names expected in a vendor's file. Columns the loaders add themselves
+    (Commission Date and Revenue Recognition Date columns) are left out.
+    """
+    columns = HEADER_FINGERPRINTS.get(file_type, EXPECTED_COLUMNS.get(file_type, []))
+    return {
+        _normalise_header(col) for col in columns
+        if not str(col).startswith(("Commission Date", "Revenue Recognition"))
+    }
+
+def detect_file_vendor(file_bytes: bytes, sample_rows: int = HEADER_SAMPLE_ROWS):
+    """
+    Identify the vendor of an Excel file from the first rows of each sheet only.
+    Every sampled row is scored against every vendor fingerprint (share of the fingerprint's
+    columns present in the row).
+
+    Returns:
+        Tuple (vendor, header_row, confidence) for the best match; vendor is None when no row
+        reaches HEADER_MATCH_THRESHOLD. header_row is 0-based.
+    """
+    # openpyxl stops after the sampled rows, whereas calamine always loads whole sheets.
+    sheets = read_vendor_excel(io.BytesIO(file_bytes), engine="openpyxl", sheet_name=None, header=None,
+                               nrows=sample_rows)
+    fingerprints = {file_type: get_header_fingerprint(file_type) for file_type in HEADER_ROWS}
+
+    best = (None, None, 0.0)
+    for sample in sheets.values():
+        for row_pos, values in enumerate(sample.itertuples(index=False)):
+            row = {_normalise_header(value) for value in values} - {""}
+            if not row:
+                continue
+            for file_type, fingerprint in fingerprints.items():
+                confidence = len(fingerprint & row) / len(fingerprint)
+                # Prefer the vendor's usual header row when two rows score the same.
+                if confidence > best[2] or (
+                    confidence == best[2] and file_type == best[0] and row_pos == HEADER_ROWS[file_type]
+                ):
+                    best = (file_type, row_pos, confidence)
+
+    vendor, header_row, confidence = best
+    if confidence < HEADER_MATCH_THRESHOLD:
+        return None, None, round(confidence, 2)
+    return vendor, header_row, round(confidence, 2)
+
+def check_file_vendor(file_bytes: bytes, file_type: str):
+    """
+    Check that an Excel file looks like the selected product line before it is parsed.
+    Returns (is_match, message); the file is only rejected when it clearly matches another vendor
+    or the header is not on the row the loader reads.
+    """
+    try:
+        vendor, header_row, confidence = detect_file_vendor(file_bytes)
+    except Exception as e:
+        return True, f"⚠️ Could not sample the file header: {e}"
+
+    if vendor is None:
+        return True, "⚠️ The file header did not match any known vendor layout."
+    if vendor != file_type:
+        return False, f"The file looks like a {vendor} file ({confidence:.0%} of its header matched), not {file_type}."
+    if header_row != HEADER_ROWS[file_type]:
+        return False, (
+            f"The {file_type} header was found on row {header_row + 1} instead of row "
+            f"{HEADER_ROWS[file_type] + 1}; rows above the header may have been added or removed."
+        )
+    return True, f"✅ Header matches {file_type} ({confidence:.0%})."
+
+# Columns checked for blanks for file types that do not check every column.
+BLANK_CHECK_COLUMNS = {
+    "Novo": [
+        "Customer Number",
+        "Qty Shipped",
+        "Unit Price",
+        "Extension",
+        "Commission Percentage",
+        "Commission Amount",
+        "Commission Date",
+        "Commission Date YYYY",
+        "Commission Date MM"
+    ],
+    "Chemence": [
+        "Source",
+        "Commission Date",
+        "Commission Date YYYY",
+        "Commission Date MM",
+        "Sales Group",
+        "Source ID",
+        "Sales Rep Name",
+        "Account Number",
+        "Account Name",
+        "Street",
+        "City",
+        "State",
+        "Zip",
+        "Description",
+        "Part #",
+        "Qty Shipped",
+        "UOM",
+        "Sales Price",
+        "Sales Total",
+        "Commission",
+        "Unit Price"
+    ],
+}
+
+def blank_cell_mask(df: pd.DataFrame) -> pd.DataFrame:
+    """Boolean DataFrame marking null cells and empty strings."""
+    mask = df.isna()
+    for col_pos, dtype in enumerate(df.dtypes):
+        # Only text-like columns can hold "" (comparing other dtypes to "" is always False).
+        if dtype == object or pd.api.types.is_string_dtype(dtype):
+            mask.iloc[:, col_pos] |= (df.iloc[:, col_pos] == "").fillna(False).astype(bool)
+    return mask
+
+def check_for_blanks_with_details(df: pd.DataFrame, file_type: str = None) -> list:
+    """
+    Return a list of (row_number, [columns_with_blanks]) for any row that has blank cells.
+    For certain file types, only checks specific columns.
+    """
+    if file_type in BLANK_CHECK_COLUMNS:
+        existing_columns = [col for col in BLANK_CHECK_COLUMNS[file_type] if col in df.columns]
+        df = df[existing_columns]
+
+    mask = blank_cell_mask(df).to_numpy()
+    row_positions, col_positions = np.nonzero(mask)
+    if len(row_positions) == 0:
+        return []
+
+    # np.nonzero walks the mask row by row, so each row's columns come out in column order.
+    columns = df.columns
+    index = df.index
+    blank_details = []
+    boundaries = np.flatnonzero(np.diff(row_positions)) + 1
+    for row_cols, row_pos in zip(np.split(col_positions, boundaries), row_positions[np.r_[0, boundaries]]):
+        blank_details.append((index[row_pos], columns[row_cols].tolist()))
+    return blank_details
+
+def check_for_amount_line_issues(df: pd.DataFrame) -> list:
+    """
+    Check for rows where 'Amount line' is ≤ 0 and return a list of problematic rows
+    (row index + 1, to make it human-readable). Values that cannot be converted to float are skipped.
+    """
+    if 'Amount line' not in df.columns:
+        return []
+
+    values = df['Amount line']
+    amounts = pd.to_numeric(values, errors="coerce")
+    # to_numeric is stricter than float() for a few spellings (e.g. "1_000"); convert those one by one.
+    unparsed = amounts.isna() & values.notna()
+    if unparsed.any():
+        def to_float(value):
+            try:
+                return float(value)
+            except (ValueError, TypeError):
+                return np.nan
+        amounts = amounts.astype(float)
+        amounts[unparsed] = values[unparsed].map(to_float)
+
+    return [row_idx + 1 for row_idx in df.index[(amounts <= 0).to_numpy(dtype=bool, na_value=False)]]
+
@@ -0,0 +1,95 @@
+import os
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import SQLAlchemyError, ProgrammingError
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+DATABASE_URL = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@" \
+               f"{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+
+# One row per table: the version is bumped every time the table's content is rewritten,
+# so caches and snapshots can be keyed by (table, version) instead of re-reading the data.
+DATA_VERSIONS_TABLE = "data_versions"
+
+# Engine shared by the version reads of this process (see get_version_engine).
+_version_engine = None
+_version_engine_pid = None
+
+def get_db_connection():
+    """Create a database connection."""
+    engine = create_engine(DATABASE_URL)
+    return engine
+
+def get_version_engine():
+    """
+    Return the engine used for version reads. They run on every cache and snapshot check, so
+    they share one connection pool per process (a forked worker creates its own).
+    """
+    global _version_engine, _version_engine_pid
+    if _version_engine is None or _version_engine_pid != os.getpid():
+        _version_engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+        _version_engine_pid = os.getpid()
+    return _version_engine
+
+def ensure_data_versions(conn):
+    """Create the data_versions table if it does not exist yet."""
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {DATA_VERSIONS_TABLE} (
+            table_name  TEXT PRIMARY KEY,
+            version     BIGINT NOT NULL DEFAULT 0,
+            updated_at  TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+    """))
+
+def bump_data_versions(table_names):
+    """
+    Increment the version of each table in table_names.
+    Return debug messages as a list.
+    """
+    debug_messages = []
+    engine = get_db_connection()
+    try:
+        with engine.begin() as conn:
+            ensure_data_versions(conn)
+            for table_name in table_names:
+                conn.execute(text(f"""
+                    INSERT INTO {DATA_VERSIONS_TABLE} (table_name, version, updated_at)
+                    VALUES (:table_name, 1, NOW())
+                    ON CONFLICT (table_name)
+                    DO UPDATE SET version = {DATA_VERSIONS_TABLE}.version + 1, updated_at = NOW()
+                """), {"table_name": table_name})
+        debug_messages.append(f"✅ Data version bumped for: {', '.join(table_names)}.")
+    except SQLAlchemyError as e:
+        print(f"❌ Error bumping data versions for {table_names}: {e}")
+        debug_messages.append(f"❌ Error bumping data versions for {table_names}: {e}")
+    finally:
+        engine.dispose()
+    return debug_messages
+
+def get_data_versions(table_names) -> dict:
+    """
+    Return {table_name: version} for several tables in one query (0 for a table that has never
+    been bumped). This is a plain read: the data_versions table is created by setup_database.py
+    (or by the first bump).
+    """
+    table_names = list(table_names)
+    try:
+        with get_version_engine().connect() as conn:
+            rows = conn.execute(
+                text(f"SELECT table_name, version FROM {DATA_VERSIONS_TABLE} WHERE table_name = ANY(:table_names)"),
+                {"table_names": table_names}
+            ).fetchall()
+    except ProgrammingError as e:
+        if getattr(e.orig, "pgcode", None) != "42P01":
+            raise
+        # data_versions does not exist yet (undefined_table): nothing has been bumped.
+        rows = []
+    versions = dict.fromkeys(table_names, 0)
+    versions.update({table_name: version or 0 for table_name, version in rows})
+    return versions
+
+def get_data_version(table_name: str) -> int:
+    """Return the current version of a table (0 if it has never been bumped)."""
+    return get_data_versions([table_name])[table_name]
@@ -0,0 +1,108 @@
+"""
+One-off migration of the master tables' amount columns to NUMERIC(15,2).
+
+The loaders keep amounts as numbers rounded to two decimals; older rows were saved as text
+("1234.50", "" for blanks). This converts those columns in place (values that are not numbers
+become NULL) and refreshes what is derived from each table. Columns that are missing or already
+NUMERIC(15,2) are skipped, so it is safe to run again.
+
+    python migrate_numeric_columns.py            # migrate every master table
+    python migrate_numeric_columns.py --dry-run  # only list the columns that would change
+"""
+import sys
+import os
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+from dotenv import load_dotenv
+from data_loaders.search_index_utils import refresh_invoice_search_index
+from data_loaders.replica_utils import sync_replica_table
+from data_loaders.version_utils import bump_data_versions
+
+# Load environment variables
+load_dotenv()
+
+DATABASE_URL = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+
+# Amount columns each loader rounds to two decimals. Rates kept with more precision
+# (e.g. "Rep %", "Comm Rate", "Commission Percentage", "Commission %") are left as they are.
+NUMERIC_COLUMNS = {
+    "master_cygnus_sales": ["Invoice Total", "Total Rep Due"],
+    "master_logiquip_sales": ["Doc Amt", "Comm Amt"],
+    "master_summit_medical_sales": ["Net Sales Amount", "Comm $"],
+    "master_quickbooks_sales": ["Quantity", "Amount line", "Purchase price", "Margin"],
+    "master_inspektor_sales": ["Quantity", "Total", "Formula"],
+    "master_sunoptic_sales": ["Unit Price", "Line Amount", "Commission $"],
+    "master_ternio_sales": ["Invoiced", "Paid", "Comm Amount"],
+    "master_novo_sales": [
+        "Quantity Ordered", "Qty Shipped", "Quantity Backordered", "Unit Price", "Extension", "Commission Amount"
+    ],
+    "master_chemence_sales": ["Qty Shipped", "Sales Price", "Sales Total", "Commission", "Unit Price", "Comm %"],
+}
+
+def get_db_connection():
+    """Create a database connection."""
+    engine = create_engine(DATABASE_URL)
+    return engine
+
+def _is_numeric_15_2(column_type) -> bool:
+    return getattr(column_type, "precision", None) == 15 and getattr(column_type, "scale", None) == 2
+
+def _alter_column_sql(table_name: str, column: str) -> str:
+    # Same cleaning as dry_run_utils._numeric_expr: text that is not a plain number becomes NULL.
+    value = f'REPLACE(REPLACE(TRIM(CAST("{column}" AS TEXT)), \'$\', \'\'), \',\', \'\')'
+    return (
+        f'ALTER TABLE {table_name} ALTER COLUMN "{column}" TYPE NUMERIC(15,2) '
+        f"USING CASE WHEN {value} ~ '^-?[0-9]*\\.?[0-9]+$' THEN CAST({value} AS NUMERIC(15,2)) END"
+    )
+
+def columns_to_migrate(engine) -> dict:
+    """Return {table_name: [columns]} for the listed columns that exist and are not NUMERIC(15,2) yet."""
+    inspector = inspect(engine)
+    pending = {}
+    for table_name, columns in NUMERIC_COLUMNS.items():
+        if not inspector.has_table(table_name):
+            continue
+        column_types = {column["name"]: column["type"] for column in inspector.get_columns(table_name)}
+        todo = [col for col in columns if col in column_types and not _is_numeric_15_2(column_types[col])]
+        if todo:
+            pending[table_name] = todo
+    return pending
+
+def migrate_numeric_columns(dry_run: bool = False):
+    """
+    Convert the amount columns of every master table to NUMERIC(15,2), one transaction per table,
+    then refresh the search index, analytics replica and data versions of the tables changed.
+    Return debug messages as a list.
+    """
+    debug_messages = []
+    engine = get_db_connection()
+    try:
+        pending = columns_to_migrate(engine)
+        if not pending:
+            debug_messages.append("✅ All master table amount columns are already NUMERIC(15,2).")
+            return debug_messages
+
+        for table_name, columns in pending.items():
+            if dry_run:
+                debug_messages.append(f"⚠️ {table_name}: would convert {', '.join(columns)}.")
+                continue
+            try:
+                with engine.begin() as conn:
+                    for column in columns:
+                        conn.execute(text(_alter_column_sql(table_name, column)))
+            except SQLAlchemyError as e:
+                debug_messages.append(f"❌ {table_name}: migration failed, table left unchanged: {e}")
+                continue
+            debug_messages.append(f"✅ {table_name}: converted {', '.join(columns)} to NUMERIC(15,2).")
+
+            # The replica only notices column name changes, so the table is copied again in full.
+            debug_messages.extend(refresh_invoice_search_index(table_name))
+            debug_messages.extend(bump_data_versions([table_name]))
+            debug_messages.extend(sync_replica_table(table_name, full=True))
+    finally:
+        engine.dispose()
+    return debug_messages
+
+if __name__ == "__main__":
+    for message in migrate_numeric_columns(dry_run="--dry-run" in sys.argv):
+        print(message)
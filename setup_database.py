@@ -0,0 +1,83 @@
+"""
+One-off (and repeatable) database setup: creates the tables and indexes the app relies on, so
+pages and the ingest path never run DDL while users read or save data.
+
+    python setup_database.py
+
+- Period index on every master table (used by the pre-save overwrite check). Built with
+  CREATE INDEX CONCURRENTLY, so saves are not blocked while it is built.
+- The invoice search index, upload job and data version tables.
+"""
+import os
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+from dotenv import load_dotenv
+from data_loaders.ingest_utils import MASTER_TABLES
+from data_loaders.search_index_utils import ensure_search_index
+from data_loaders.job_queue_utils import ensure_job_tables
+from data_loaders.version_utils import ensure_data_versions
+
+# Load environment variables
+load_dotenv()
+
+DATABASE_URL = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+
+PERIOD_YEAR_COLUMNS = ["Revenue Recognition Date YYYY", "Revenue Recognition YYYY"]
+PERIOD_MONTH_COLUMNS = ["Revenue Recognition Date MM", "Revenue Recognition MM"]
+
+def get_db_connection():
+    """Create a database connection."""
+    engine = create_engine(DATABASE_URL)
+    return engine
+
+def create_period_indexes(engine):
+    """
+    Create the (year, month) Revenue Recognition index of every master table.
+    Return debug messages as a list.
+    """
+    debug_messages = []
+    inspector = inspect(engine)
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table_name in MASTER_TABLES.values():
+            if not inspector.has_table(table_name):
+                debug_messages.append(f"⚠️ {table_name} does not exist yet; no period index created.")
+                continue
+            columns = [c["name"] for c in inspector.get_columns(table_name)]
+            year_col = next((col for col in PERIOD_YEAR_COLUMNS if col in columns), None)
+            month_col = next((col for col in PERIOD_MONTH_COLUMNS if col in columns), None)
+            if not (year_col and month_col):
+                debug_messages.append(f"⚠️ {table_name} has no Revenue Recognition year/month columns.")
+                continue
+            try:
+                conn.execute(text(f"""
+                    CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_{table_name}_rev_period
+                    ON {table_name} ("{year_col}", "{month_col}")
+                """))
+                debug_messages.append(f"✅ Period index ready on {table_name}.")
+            except SQLAlchemyError as e:
+                # A failed concurrent build leaves an invalid index behind, which IF NOT EXISTS would keep.
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS idx_{table_name}_rev_period"))
+                debug_messages.append(f"❌ Error creating the period index on {table_name}: {e}")
+    return debug_messages
+
+def setup_database():
+    """Create every table and index the app needs. Return debug messages as a list."""
+    debug_messages = []
+    engine = get_db_connection()
+    try:
+        with engine.begin() as conn:
+            ensure_search_index(conn)
+            ensure_job_tables(conn)
+            ensure_data_versions(conn)
+        debug_messages.append("✅ Search index, upload job and data version tables ready.")
+        debug_messages.extend(create_period_indexes(engine))
+    except SQLAlchemyError as e:
+        debug_messages.append(f"❌ Error setting up the database: {e}")
+    finally:
+        engine.dispose()
+    return debug_messages
+
+if __name__ == "__main__":
+    for message in setup_database():
+        print(message)
@@ -35,6 +35,7 @@ import pandas as pd
 from sqlalchemy import create_engine
 from dotenv import load_dotenv
 import os
+from data_loaders.reference_cache_utils import reference_table_changed
 
 # Step 1: Load environment variables
 load_dotenv()
@@ -69,5 +70,7 @@ print(df.head())
 try:
     df.to_sql("service_to_product", con=engine, if_exists="replace", index=False)
     print("Data successfully loaded into the service_to_product table!")
+    # Let the running app know its cached copy of service_to_product is stale.
+    print("\n".join(reference_table_changed("service_to_product")))
 except Exception as e:
     print(f"Error inserting data into the database: {e}")
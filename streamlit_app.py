@@ -8,6 +8,8 @@ import random
 import string
 import smtplib
 from email.message import EmailMessage
+from data_loaders.session_store_utils import clear_session_store
+from data_loaders.quickbooks.quickbooks_db_utils import drop_staging_table, prune_staging_tables
 
 # Set page configuration and load assets.
 im = Image.open("assets/images-2.jpeg")
@@ -27,6 +29,14 @@ def get_db_connection():
     engine = create_engine(DATABASE_URL)
     return engine
 
+@st.cache_resource
+def prune_staging_tables_at_start():
+    """Drop the staging tables of abandoned uploads (see prune_staging_tables) once per server process."""
+    for message in prune_staging_tables():
+        print(message)
+
+prune_staging_tables_at_start()
+
 def authenticate_user(email, password):
     """
     Authenticate the user by querying the master_access_level table.
@@ -308,6 +318,13 @@ with st.sidebar:
     st.image("assets/images-2.jpeg", use_container_width=True, caption="Sales Performance Tracker")
     st.write(f"Logged in as: **{st.session_state.user_name}** ({st.session_state.user_permission})")
     if st.button("Logout"):
+        # Drop the staged uploads of this session (memory and scratch files).
+        clear_session_store(st.session_state.pop("upload_store", None))
+        streamed = st.session_state.pop("streamed_upload", None)
+        if streamed and streamed.get("staging_table"):
+            drop_staging_table(streamed["staging_table"])
+        for key in ("dataframes", "batch_dataframes", "confirmed_file_name", "confirmed_file_type"):
+            st.session_state.pop(key, None)
         st.session_state.authenticated = False
         st.session_state.user_permission = None
         st.session_state.user_name = None
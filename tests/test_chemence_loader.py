@@ -0,0 +1,32 @@
+"""Chemence loader tests."""
+import numpy as np
+import pandas as pd
+import pytest
+from data_loaders.chemence import chemence_loader
+from data_loaders.validation_utils import EXPECTED_COLUMNS
+
+HEADER_ROW = 3
+
+@pytest.fixture
+def export_path(tmp_path, monkeypatch):
+    """A Chemence export whose rows have a zero Sales Total (a positive, negative and zero Commission)."""
+    monkeypatch.setattr(chemence_loader, "load_master_sales_rep", lambda: pd.DataFrame(
+        columns=["Source", "Customer field", "Data field value", "Sales Rep name", "Valid from", "Valid until"]
+    ))
+    rows = [
+        {"Source ID": "1001", "Sales Total": "$200.00", "Commission": "10.00"},
+        {"Source ID": "1002", "Sales Total": "0", "Commission": "5.00"},
+        {"Source ID": "1003", "Sales Total": "0", "Commission": "-5.00"},
+        {"Source ID": "1004", "Sales Total": "0", "Commission": "0"},
+    ]
+    df = pd.DataFrame([{col: "x" for col in EXPECTED_COLUMNS["Chemence"]} | row for row in rows])
+    df["Invoice Date"] = pd.Timestamp("2025-01-15")
+    path = tmp_path / "chemence.xlsx"
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        df.to_excel(writer, index=False, startrow=HEADER_ROW)
+    return str(path)
+
+def test_comm_percent_is_zero_without_sales_total(export_path):
+    loaded = chemence_loader.load_excel_file_chemence(export_path)
+    assert loaded["Comm %"].tolist() == [0.05, 0.0, 0.0, 0.0]
+    assert np.isfinite(loaded["Comm %"]).all()
@@ -0,0 +1,74 @@
+"""
+Tests of the shared parsing helpers.
+
+The backend fixture runs each test with pyarrow and again with parsing_utils.pa set to None,
+the pandas fallback used when pyarrow is not installed; both must give the same results.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from data_loaders import parsing_utils
+from data_loaders.parsing_utils import (
+    number_to_text,
+    parse_amount,
+    parse_percent,
+    canonical_id,
+    date_parts,
+)
+
+@pytest.fixture(params=["pyarrow", "pandas"])
+def backend(request, monkeypatch):
+    if request.param == "pandas":
+        monkeypatch.setattr(parsing_utils, "pa", None)
+    return request.param
+
+def test_number_to_text_numeric_column(backend):
+    series = pd.Series([75001.0, 1003.0, None])
+    assert number_to_text(series).tolist()[:2] == ["75001", "1003"]
+
+def test_number_to_text_keeps_text_as_written(backend):
+    # Codes read without a dtype mix numbers and text; text (e.g. a leading zero) is not passed
+    # through int().
+    series = pd.Series([75001.0, "07310", "INV1002", 1003], dtype=object)
+    assert number_to_text(series).tolist() == ["75001", "07310", "INV1002", "1003"]
+
+def test_parse_amount_drops_currency_noise(backend):
+    series = pd.Series(["$1,234.50", " 12 ", "-$3.00", "abc", None, ""], index=[5, 6, 7, 8, 9, 10])
+    expected = pd.Series([1234.5, 12.0, -3.0, np.nan, np.nan, np.nan], index=series.index)
+    pd.testing.assert_series_equal(parse_amount(series), expected)
+
+def test_parse_amount_integer_only_column(backend):
+    # Like pd.to_numeric, whole numbers stay int64.
+    parsed = parse_amount(pd.Series(["1,000", "$25", "-7", "+5"]))
+    pd.testing.assert_series_equal(parsed, pd.Series([1000, 25, -7, 5], dtype="int64"))
+
+def test_parse_amount_overflow_is_nan(backend):
+    parsed = parse_amount(pd.Series(["1e400", "5.5", "-1e400"]))
+    pd.testing.assert_series_equal(parsed, pd.Series([np.nan, 5.5, np.nan]))
+
+def test_parse_amount_keeps_numeric_column(backend):
+    series = pd.Series([1.5, 2.0])
+    assert parse_amount(series) is series
+
+def test_parse_percent(backend):
+    assert parse_percent(pd.Series(["7.5%", "10 %", "x"])).tolist()[:2] == [7.5, 10.0]
+    assert np.isnan(parse_percent(pd.Series(["x"]))[0])
+    assert parse_percent(pd.Series(["7,5%"]), decimal_comma=True, fraction=True).tolist() == [0.075]
+
+def test_canonical_id(backend):
+    series = pd.Series(["1234.0", "1234", 1234.0, "AB12", "12.3.4", None], dtype=object)
+    assert canonical_id(series).tolist() == ["1234", "1234", "1234", "AB12", "12.3.4", "None"]
+    assert canonical_id(series, keep_other=True).tolist() == ["1234", "1234", "1234", "AB12", "12.3.4", None]
+
+def test_date_parts_with_missing_dates(backend):
+    dates = pd.Series(pd.to_datetime(["2024-03-05", None, "2023-12-31"]), index=[3, 4, 5])
+    full, year, month = date_parts(dates)
+    assert full.tolist()[::2] == ["2024-03-05", "2023-12-31"]
+    assert year.tolist()[::2] == ["2024", "2023"]
+    assert month.tolist()[::2] == ["03", "12"]
+    assert full.isna().tolist() == year.isna().tolist() == month.isna().tolist() == [False, True, False]
+    assert list(full.index) == [3, 4, 5]
+
+def test_date_parts_all_missing(backend):
+    full, year, month = date_parts(pd.Series(pd.to_datetime([None, None])))
+    assert full.isna().all() and year.isna().all() and month.isna().all()
@@ -0,0 +1,28 @@
+"""
+Ternio loader tests.
+
+fixtures/ternio/merge_expected.csv was produced from merge_input.csv by the row-by-row
+Payment/Invoice merge loop the loader used before merge_payment_invoice_rows was vectorised.
+"""
+import os
+import pandas as pd
+from data_loaders.ternio.ternio_loader import merge_payment_invoice_rows
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "ternio")
+
+NUMERIC_COLUMNS = ["Invoiced", "Paid", "Comm Rate", "Comm Amount"]
+
+def read_fixture(name: str) -> pd.DataFrame:
+    """Read a fixture with text columns kept as text ("" for blanks) and amounts as floats."""
+    df = pd.read_csv(os.path.join(FIXTURES, name), dtype=str, keep_default_na=False)
+    for col in NUMERIC_COLUMNS:
+        df[col] = pd.to_numeric(df[col])
+    return df
+
+def test_merge_payment_invoice_rows_matches_recorded_output():
+    merged = merge_payment_invoice_rows(read_fixture("merge_input.csv"))
+    pd.testing.assert_frame_equal(merged, read_fixture("merge_expected.csv"))
+
+def test_merge_payment_invoice_rows_empty():
+    df = read_fixture("merge_input.csv").iloc[0:0]
+    assert merge_payment_invoice_rows(df).empty
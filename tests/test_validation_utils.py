@@ -0,0 +1,45 @@
+"""
+Validation helper tests.
+
+fixtures/validation/validation_expected.json was produced from blanks_input.csv by the
+row-by-row (iterrows) check_for_blanks_with_details and check_for_amount_line_issues the upload
+page used before they were vectorised. The input has null and empty cells, whitespace-only
+cells (not blank) and Amount line values that are negative, zero, unparseable or only parse
+with float().
+"""
+import json
+import os
+import pandas as pd
+from data_loaders.validation_utils import check_for_blanks_with_details, check_for_amount_line_issues
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "validation")
+
+NUMERIC_COLUMNS = ["Qty Shipped", "Unit Price", "Extension", "Commission Percentage", "Commission Amount"]
+
+def read_input() -> pd.DataFrame:
+    """Read the input with "" kept as an empty string, NULL as a missing value and amounts as floats."""
+    df = pd.read_csv(os.path.join(FIXTURES, "blanks_input.csv"), dtype=str, keep_default_na=False)
+    df = df.mask(df == "NULL", None)
+    for col in NUMERIC_COLUMNS:
+        df[col] = pd.to_numeric(df[col])
+    return df
+
+def read_expected() -> dict:
+    with open(os.path.join(FIXTURES, "validation_expected.json")) as f:
+        return json.load(f)
+
+def test_blanks_match_recorded_output():
+    blanks = check_for_blanks_with_details(read_input())
+    assert [[row, cols] for row, cols in blanks] == read_expected()["blanks"]
+
+def test_blanks_for_checked_columns_match_recorded_output():
+    blanks = check_for_blanks_with_details(read_input(), "Novo")
+    assert [[row, cols] for row, cols in blanks] == read_expected()["blanks_novo"]
+
+def test_amount_line_issues_match_recorded_output():
+    assert check_for_amount_line_issues(read_input()) == read_expected()["amount_line_issues"]
+
+def test_no_blanks_or_amount_line():
+    df = pd.DataFrame({"Customer": ["A", "B"], "Total": [1.0, 2.0]})
+    assert check_for_blanks_with_details(df) == []
+    assert check_for_amount_line_issues(df) == []
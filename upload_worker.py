@@ -0,0 +1,42 @@
+"""
+Background worker for queued upload jobs (save, harmonise, tier 2 and refresh stages).
+
+Run it next to the Streamlit app:
+    python upload_worker.py            # poll the upload_jobs table forever
+    python upload_worker.py --once     # run at most one queued job and exit (handy locally)
+
+Several workers can run side by side: each claims its own jobs and keeps their heartbeat fresh,
+and jobs whose heartbeat went stale (the worker stopped) are marked failed by the others.
+"""
+import sys
+import time
+import os
+from dotenv import load_dotenv
+from data_loaders.job_queue_utils import run_once, fail_interrupted_jobs, UPLOAD_JOB_STALE_SECONDS
+
+# Load environment variables
+load_dotenv()
+
+POLL_INTERVAL_SECONDS = float(os.getenv("UPLOAD_WORKER_POLL_SECONDS", "2"))
+
+if __name__ == "__main__":
+    fail_interrupted_jobs()
+    if "--once" in sys.argv:
+        run_once()
+        sys.exit(0)
+
+    print(f"Upload worker started, polling every {POLL_INTERVAL_SECONDS}s.")
+    last_sweep = time.monotonic()
+    while True:
+        try:
+            if not run_once():
+                # Pick up jobs of workers that stopped while this one is idle
+                if time.monotonic() - last_sweep >= UPLOAD_JOB_STALE_SECONDS:
+                    fail_interrupted_jobs()
+                    last_sweep = time.monotonic()
+                time.sleep(POLL_INTERVAL_SECONDS)
+        except KeyboardInterrupt:
+            break
+        except Exception as e:
+            print(f"❌ Upload worker error: {e}")
+            time.sleep(POLL_INTERVAL_SECONDS)
@@ -5,6 +5,11 @@ from sqlalchemy import create_engine, text
 import pygwalker as pyg
 from dotenv import load_dotenv
 import os
+from data_loaders.access_utils import build_select_query, get_rep_restriction
+from data_loaders.snapshot_utils import snapshots_available, fetch_snapshot_frame
+from data_loaders.replica_utils import (
+    replica_available, replica_is_fresh, fetch_replica_table, query_replica, sync_full_replica
+)
 
 # Load environment variables
 load_dotenv()
@@ -18,13 +23,97 @@ def get_db_connection():
     engine = create_engine(DATABASE_URL)
     return engine
 
-def fetch_table_data(table_name):
-    """Fetch data from a given table."""
-    query = f"SELECT * FROM {table_name}"
+# Columns summed in the pre-aggregated (Sales Rep x Product Line x Month) dataset.
+SUMMARY_MEASURES = ["Sales Actual", "Rev Actual", "Comm Amount tier 1", "Comm tier 2 diff amount"]
+SUMMARY_DIMENSIONS = ["Sales Rep", "Product Line", "Commission Date YYYY", "Commission Date MM"]
+
+def build_summary_query(data_source=None, rep_name=None, placeholder=":"):
+    """
+    Build the aggregate query over harmonised_table (one row per Sales Rep, Product Line and month).
+
+    Args:
+        data_source: Master table to restrict to ("Data Source" column), None for all product lines.
+        rep_name: Sales Rep the session is restricted to (None for unrestricted sessions).
+        placeholder: ":" for SQLAlchemy named parameters (Postgres), "?" for DuckDB positional ones.
+
+    Returns:
+        Tuple (query, params) where params is a dict for ":" and a list for "?".
+    """
+    conditions = []
+    values = {}
+    if data_source is not None:
+        conditions.append('"Data Source" = {data_source}')
+        values["data_source"] = data_source
+    if rep_name is not None:
+        conditions.append('"Sales Rep" = {sales_rep}')
+        values["sales_rep"] = rep_name
+
+    dimensions = ", ".join(f'"{col}"' for col in SUMMARY_DIMENSIONS)
+    measures = ", ".join(f'SUM("{col}") AS "{col}"' for col in SUMMARY_MEASURES)
+    query = f'SELECT {dimensions}, {measures}, COUNT(*) AS "Rows" FROM harmonised_table'
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += f" GROUP BY {dimensions} ORDER BY {dimensions}"
+
+    if placeholder == "?":
+        return query.format(**{name: "?" for name in values}), list(values.values())
+    return query.format(**{name: f":{name}" for name in values}), values
+
+def fetch_summary_data(data_source=None, rep_name=None):
+    """Fetch the pre-aggregated dataset from the analytics replica when it is up to date, falling back to Postgres."""
+    if replica_available():
+        try:
+            if not replica_is_fresh("harmonised_table"):
+                raise LookupError("the replica of 'harmonised_table' is behind Postgres")
+            query, params = build_summary_query(data_source, rep_name, placeholder="?")
+            return query_replica(query, params)
+        except Exception as e:
+            print(f"⚠️ Analytics replica unavailable for the summary, reading from Postgres: {e}")
+
     engine = get_db_connection()
     try:
+        query, params = build_summary_query(data_source, rep_name)
         with engine.connect() as conn:
-            result = pd.read_sql_query(text(query), conn)
+            return pd.read_sql_query(text(query), conn, params=params)
+    except Exception as e:
+        st.error(f"Error fetching the summary dataset: {e}")
+        return pd.DataFrame()
+    finally:
+        engine.dispose()
+
+def fetch_table_data(table_name, rep_name=None, filters=None):
+    """
+    Fetch data from a given table.
+    When rep_name is set, only that Sales Rep's rows are read (the filter runs in the database).
+    filters maps column names to lists of values to keep.
+    Reads from the shared Arrow snapshot, then the local DuckDB analytics replica, and falls back to Postgres.
+    """
+    if snapshots_available(table_name):
+        try:
+            return fetch_snapshot_frame(table_name, rep_name=rep_name, filters=filters)
+        except Exception as e:
+            print(f"⚠️ Snapshot unavailable for {table_name}: {e}")
+
+    if replica_available():
+        try:
+            return fetch_replica_table(table_name, rep_name=rep_name, filters=filters)
+        except Exception as e:
+            print(f"⚠️ Analytics replica unavailable for {table_name}, reading from Postgres: {e}")
+
+    engine = get_db_connection()
+    try:
+        where_conditions = []
+        params = {}
+        for i, (column, values) in enumerate((filters or {}).items()):
+            if values:
+                placeholders = [f":filter_{i}_{j}" for j in range(len(values))]
+                where_conditions.append(f'"{column}" IN ({", ".join(placeholders)})')
+                params.update({f"filter_{i}_{j}": value for j, value in enumerate(values)})
+        query, params = build_select_query(
+            table_name, rep_name=rep_name, where_conditions=where_conditions, params=params
+        )
+        with engine.connect() as conn:
+            result = pd.read_sql_query(text(query), conn, params=params)
         return result
     except Exception as e:
         st.error(f"Error fetching data from {table_name} table: {e}")
@@ -46,35 +135,71 @@ def analytics_page():
 
     # Determine the table to fetch based on selection.
     if table_choice == "All":
-        data_df = fetch_table_data("harmonised_table")
+        table_name = "harmonised_table"
     elif table_choice == "Cygnus":
-        data_df = fetch_table_data("master_cygnus_sales")
+        table_name = "master_cygnus_sales"
     elif table_choice == "Summit Medical":
-        data_df = fetch_table_data("master_summit_medical_sales")
+        table_name = "master_summit_medical_sales"
     elif table_choice == "QuickBooks":
-        data_df = fetch_table_data("master_quickbooks_sales")
+        table_name = "master_quickbooks_sales"
     else:  # Logiquip
-        data_df = fetch_table_data("master_logiquip_sales")
-
-    # --- New: Filter Data for Simple Users ---
-    # If the logged-in user is a simple "user", only show rows where the Sales Rep
-    # (or Sales Rep Name) equals the logged-in user's name.
-    if "user_permission" in st.session_state and st.session_state.user_permission.lower() == "user":
-        user_name = st.session_state.user_name
-        if "Sales Rep" in data_df.columns:
-            data_df = data_df[data_df["Sales Rep"] == user_name]
-        elif "Sales Rep Name" in data_df.columns:
-            data_df = data_df[data_df["Sales Rep Name"] == user_name]
-        else:
-            st.warning("No Sales Rep column available for filtering.")
-
-    if data_df.empty:
+        table_name = "master_logiquip_sales"
+
+    # Admins can (re)build the local analytics replica, e.g. on first deployment.
+    if (st.session_state.get("user_permission") or "").lower() == "admin":
+        if st.button("Refresh Analytics Replica"):
+            with st.spinner("Syncing the analytics replica from the database..."):
+                for message in sync_full_replica():
+                    st.write(message)
+
+    # Simple "user" accounts only get their own rows; the restriction is applied in SQL
+    # so the rest of the company's data never leaves the database.
+    rep_name = get_rep_restriction(st.session_state)
+
+    # The pre-aggregated dataset is small whatever the table size, so it is the default.
+    data_source = None if table_name == "harmonised_table" else table_name
+    summary_df = fetch_summary_data(data_source, rep_name=rep_name)
+
+    if summary_df.empty:
         st.warning(f"No data available in the {table_choice} table.")
         return
 
+    granularity = st.radio(
+        "Dataset:",
+        options=["Summary (Sales Rep × Product Line × Month)", "Row level (filtered)"],
+        horizontal=True,
+    )
+
+    if granularity.startswith("Summary"):
+        data_df = summary_df
+    else:
+        # Row-level data is only loaded for an explicit selection of Sales Reps and years.
+        st.caption("Select at least one Sales Rep or year to load row-level data.")
+        col1, col2 = st.columns(2)
+        with col1:
+            selected_reps = st.multiselect(
+                "Sales Rep:", sorted(summary_df["Sales Rep"].dropna().unique().tolist())
+            )
+        with col2:
+            selected_years = st.multiselect(
+                "Commission Year:", sorted(summary_df["Commission Date YYYY"].dropna().unique().tolist())
+            )
+        if not (selected_reps or selected_years):
+            st.info("No row-level filter selected yet.")
+            return
+
+        rep_column = "Sales Rep" if table_name == "harmonised_table" else "Sales Rep Name"
+        filters = {rep_column: selected_reps, "Commission Date YYYY": selected_years}
+        data_df = fetch_table_data(table_name, rep_name=rep_name, filters=filters)
+        if data_df.empty:
+            st.warning("No rows match the selected filters.")
+            return
+
     # Data Visualization with PyGWalker
+    # kernel_computation runs the chart queries server-side (DuckDB) instead of shipping every row to the browser.
     st.subheader("Data Visualization with PyGWalker")
-    pyg_app = StreamlitRenderer(data_df)
+    st.caption(f"{len(data_df):,} rows loaded.")
+    pyg_app = StreamlitRenderer(data_df, kernel_computation=True)
     pyg_app.explorer()
 
 # Render the analytics page
@@ -3,6 +3,7 @@ import pandas as pd
 from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 import os
+from data_loaders.reference_cache_utils import get_reference_values
 
 # Load environment variables
 load_dotenv()
@@ -184,43 +185,20 @@ def remove_subtotals_for_editing(df):
 
 # New helper function to fetch unique Sales Rep names from the sales_rep_commission_tier table.
 def get_unique_sales_reps_commission_tier():
-    """Fetch distinct Sales Rep Names from the sales_rep_commission_tier table."""
-    query = """
-        SELECT DISTINCT "Sales Rep Name"
-        FROM sales_rep_commission_tier
-        ORDER BY "Sales Rep Name"
-    """
-    engine = get_db_connection()
+    """Fetch distinct Sales Rep Names from the sales_rep_commission_tier table (cached per process)."""
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text(query))
-            sales_reps = [row[0] for row in result.fetchall()]
-        return sales_reps
+        return get_reference_values("sales_rep_commission_tier", "Sales Rep Name")
     except Exception as e:
         st.error(f"Error fetching Sales Reps from commission tier: {e}")
         return []
-    finally:
-        engine.dispose()
 
 def get_unique_product_lines_service_to_product():
-    """Fetch distinct Product Lines from the service_to_product table."""
-    query = """
-        SELECT DISTINCT "Product Lines"
-        FROM service_to_product
-        WHERE "Product Lines" IS NOT NULL
-        ORDER BY "Product Lines"
-    """
-    engine = get_db_connection()
+    """Fetch distinct Product Lines from the service_to_product table (cached per process)."""
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text(query))
-            product_lines = [row[0] for row in result.fetchall()]
-        return product_lines
+        return get_reference_values("service_to_product", "Product Lines")
     except Exception as e:
         st.error(f"Error fetching unique product lines from service_to_product: {e}")
         return []
-    finally:
-        engine.dispose()
 
 
 # ----------------- Streamlit UI -----------------
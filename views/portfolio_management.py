@@ -3,6 +3,7 @@ import pandas as pd
 from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 import os
+from data_loaders.reference_cache_utils import get_reference_values, reference_table_changed, REFERENCE_TABLES
 
 def clean_string_value(value):
     """Clean string values by stripping whitespace and handling None/NaN."""
@@ -58,6 +59,11 @@ def update_table_data(table_name, df):
                 # Insert the updated data
                 df.to_sql(table_name, con=engine, if_exists="append", index=False)
         st.success(f"Changes successfully saved to the {table_name} table!")
+        # Loaders and pages cache the reference tables until their data version changes.
+        if table_name in REFERENCE_TABLES:
+            for message in reference_table_changed(table_name):
+                if message.startswith("❌"):
+                    st.warning(message)
     except Exception as e:
         st.error(f"Error updating the {table_name} table: {e}")
     finally:
@@ -71,23 +77,12 @@ def render_preview_table(df, css_class=""):
     st.markdown(html_table, unsafe_allow_html=True)
 
 def get_unique_sales_rep_names():
-    """Fetch distinct Sales Rep Names from the sales_rep_commission_tier table."""
-    query = """
-        SELECT DISTINCT "Sales Rep Name"
-        FROM sales_rep_commission_tier
-        ORDER BY "Sales Rep Name"
-    """
-    engine = get_db_connection()
+    """Fetch distinct Sales Rep Names from the sales_rep_commission_tier table (cached per process)."""
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text(query))
-            sales_reps = [row[0] for row in result.fetchall()]
-        return sales_reps
+        return get_reference_values("sales_rep_commission_tier", "Sales Rep Name")
     except Exception as e:
         st.error(f"Error fetching unique Sales Rep names: {e}")
         return []
-    finally:
-        engine.dispose()
     
 def validate_sales_territory_upload(df, sales_rep_names):
     """
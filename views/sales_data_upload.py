@@ -1,35 +1,67 @@
 import streamlit as st
 import pandas as pd
-from sqlalchemy import create_engine, text, inspect
+from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 import os
-import tempfile
 import datetime
+import hashlib
 
-# Import all the loaders
-from data_loaders.cygnus.cygnus_loader import load_excel_file_cygnus
-from data_loaders.logiquip.logiquip_loader import load_excel_file_logiquip
-from data_loaders.summit_medical.summit_medical_loader import load_pdf_file_summit_medical, load_excel_file_summit_medical
-from data_loaders.quickbooks.quickbooks_loader import load_excel_file_quickbooks
-from data_loaders.inspektor.inspektor_loader import load_excel_file_inspektor
-from data_loaders.sunoptic.sunoptic_loader import load_excel_file_sunoptic
-from data_loaders.ternio.ternio_loader import load_excel_file_ternio
-from data_loaders.novo.novo_loader import load_excel_file_novo
-from data_loaders.chemence.chemence_loader import load_excel_file_chemence
-
-# Import all the DB utils
-from data_loaders.cygnus.cygnus_db_utils import save_dataframe_to_db as save_cygnus_to_db
-from data_loaders.logiquip.logiquip_db_utils import save_dataframe_to_db as save_logiquip_to_db
-from data_loaders.summit_medical.summit_medical_db_utils import save_dataframe_to_db as save_summit_medical_to_db
-from data_loaders.quickbooks.quickbooks_db_utils import save_dataframe_to_db as save_quickbooks_to_db
-from data_loaders.inspektor.inspektor_db_utils import save_dataframe_to_db as save_inspektor_to_db
-from data_loaders.sunoptic.sunoptic_db_utils import save_dataframe_to_db as save_sunoptic_to_db
-from data_loaders.ternio.ternio_db_utils import save_dataframe_to_db as save_ternio_to_db
-from data_loaders.novo.novo_db_utils import save_dataframe_to_db as save_novo_to_db
-from data_loaders.chemence.chemence_db_utils import save_dataframe_to_db as save_chemence_to_db
+# Loader dispatch, parsing and saving shared with the batch upload mode
+from data_loaders.ingest_utils import (
+    MASTER_TABLES,
+    SAVE_FUNCTIONS,
+    INGEST_MAX_WORKERS,
+    parse_upload,
+    parse_uploads_parallel,
+    save_uploads_parallel,
+    save_upload,
+    harmonise_product_line,
+    has_failed_messages,
+    expand_uploads,
+    detect_file_type_from_name,
+    STREAMING_LOADERS,
+    STREAM_THRESHOLD_MB,
+    stream_upload_to_staging,
+)
+from data_loaders.quickbooks.quickbooks_db_utils import drop_staging_table
+
+# Background job queue for the save -> harmonise -> tier 2 pipeline
+from data_loaders.job_queue_utils import enqueue_upload_job, get_jobs_status
+
+# Dry-run comparison of an upload with the live master table
+from data_loaders.dry_run_utils import dry_run_diff
+
+# Memory-bounded staging of uploaded bytes and parsed DataFrames (spills to disk)
+from data_loaders.session_store_utils import (
+    new_session_store,
+    store_put,
+    store_get,
+    store_contains,
+    store_pop,
+    store_usage,
+)
+
+# Windowed preview of large uploads: row issues and row-level edit deltas
+from data_loaders.preview_utils import find_row_issues, diff_window, merge_edit_delta, apply_edit_delta
+
+# Content key of a parsed upload, so a preview is only reused for the same file content
+from data_loaders.parse_cache_utils import make_parse_cache_key
+
+# Cached schema lookup
+from data_loaders.access_utils import get_table_columns
+
+# Cached reference tables (master_sales_rep, service_to_product, sales_rep_commission_tier)
+from data_loaders.reference_cache_utils import get_reference_values
 
 # Import validation_utils
-from data_loaders.validation_utils import validate_file_format, EXPECTED_COLUMNS
+from data_loaders.validation_utils import (
+    validate_file_format,
+    EXPECTED_COLUMNS,
+    check_for_blanks_with_details,
+    check_for_amount_line_issues,
+    check_file_vendor,
+    detect_file_vendor,
+)
 
 # Load environment variables
 load_dotenv()
@@ -42,6 +74,17 @@ def get_db_connection():
     engine = create_engine(DATABASE_URL)
     return engine
 
+# Uploads with more rows than this are edited through a window of rows instead of the full frame.
+PREVIEW_ROW_THRESHOLD = int(os.getenv("UPLOAD_PREVIEW_ROW_THRESHOLD", "5000"))
+PREVIEW_PAGE_ROWS = 500
+
+# Rows listed per failed check of a streamed upload (the counts cover the whole file).
+STREAM_CHECK_DETAIL_ROWS = 50
+
+# Revenue Recognition period columns, under either naming used by the loaders.
+PERIOD_COLUMNS = ["Revenue Recognition Date YYYY", "Revenue Recognition YYYY",
+                  "Revenue Recognition Date MM", "Revenue Recognition MM"]
+
 # Define file types and their corresponding handlers
 FILE_TYPES = {
     "Logiquip": "Logiquip",
@@ -55,148 +98,118 @@ FILE_TYPES = {
     "Chemence": "Chemence",
 }
 
-# Dictionary specifying if a file type's loader already handles commission dates internally
-# This will be used to skip date column addition for loaders that already handle it
-LOADERS_WITH_DATE_HANDLING = {
-    # File types that already fully handle commission dates in their loaders
-    "Chemence": False,  
-    # File types that need us to add Commission Date columns
-    "Cygnus": False,
-    "Logiquip": False,
-    "Summit Medical": False,
-    "QuickBooks": False,
-    "InspeKtor": False,
-    "Sunoptic": False,
-    "Ternio": False,
-    "Novo": False
-}
+def get_upload_store() -> dict:
+    """Staging store of this session's uploads; items beyond the session memory budget live on disk."""
+    if "upload_store" not in st.session_state:
+        st.session_state.upload_store = new_session_store()
+    return st.session_state.upload_store
 
-def load_file(filepath: str, file_type: str, debug_info: list, year: str = None, month: str = None) -> pd.DataFrame:
+def stage_dataframe(names_key: str, file_name: str, df: pd.DataFrame, file_type: str, parse_key: str = None):
     """
-    Generic dispatcher to the correct loader function, with standardized parameters.
-    All loaders receive year and month where applicable.
+    Stage a parsed DataFrame; st.session_state[names_key] only keeps file name -> file type.
+    parse_key records which parse the frame came from (see is_staged).
     """
-    if file_type == "Cygnus":
-        return load_excel_file_cygnus(filepath)
-    elif file_type == "Logiquip":
-        return load_excel_file_logiquip(filepath)
-    elif file_type == "Summit Medical":
-        # For Summit Medical, check if the file is PDF or Excel
-        if filepath.lower().endswith('.xlsx') or filepath.lower().endswith('.xls'):
-            # Check for Revenue Recognition date selections
-            rev_year = None
-            rev_month = None
-            if "summit_rev_selected_year" in st.session_state and "summit_rev_selected_month" in st.session_state:
-                rev_year = str(st.session_state["summit_rev_selected_year"])
-                rev_month = st.session_state["summit_rev_selected_month"]
-            
-            return load_excel_file_summit_medical(
-                filepath, 
-                year=year,
-                month=month,
-                rev_year=rev_year,
-                rev_month=rev_month
-            )
-        else:
-            # For PDF files, use the PDF loader
-            return load_pdf_file_summit_medical(filepath)
-    elif file_type == "QuickBooks":
-        return load_excel_file_quickbooks(filepath)
-    elif file_type == "InspeKtor":
-        return load_excel_file_inspektor(filepath)
-    elif file_type == "Sunoptic":
-        return load_excel_file_sunoptic(filepath)
-    elif file_type == "Ternio":
-        return load_excel_file_ternio(filepath)
-    elif file_type == "Novo":
-        return load_excel_file_novo(filepath, year=year, month=month)
-    elif file_type == "Chemence":
-        return load_excel_file_chemence(filepath)
-    else:
-        return pd.read_excel(filepath)
+    st.session_state.setdefault(names_key, {})[file_name] = file_type
+    st.session_state.setdefault("staged_parse_keys", {})[f"{names_key}:{file_name}"] = parse_key
+    store_put(get_upload_store(), f"{names_key}:{file_name}", df)
+
+def is_staged(names_key: str, file_name: str, parse_key: str) -> bool:
+    """True when file_name is already staged from this parse, so a rerun can keep the staged frame."""
+    store_key = f"{names_key}:{file_name}"
+    return (
+        parse_key is not None
+        and st.session_state.get("staged_parse_keys", {}).get(store_key) == parse_key
+        and store_contains(get_upload_store(), store_key)
+    )
+
+def mark_editor_changed(file_name: str):
+    """on_change callback of the small-file data editor: the edited frame needs staging again."""
+    st.session_state.setdefault("edited_files", set()).add(file_name)
 
-def check_for_blanks_with_details(df: pd.DataFrame, file_type: str = None) -> list:
+def staged_dataframes(names_key: str):
     """
-    Return a list of (row_number, [columns_with_blanks]) for any row that has blank cells.
-    For certain file types, only checks specific columns.
+    Yield (file_name, (DataFrame, file_type)) for the DataFrames staged under names_key.
+    Edits recorded as a row-level delta (windowed preview) are applied here, so the edited
+    frame is only materialised when it is used (dry run, save).
     """
-    blank_details = []
-    
-    # Special case for Novo file type - only check specific columns
-    if file_type == "Novo":
-        columns_to_check = [
-            "Customer Number",
-            "Qty Shipped",
-            "Unit Price", 
-            "Extension",
-            "Commission Percentage",
-            "Commission Amount",
-            "Commission Date",
-            "Commission Date YYYY",
-            "Commission Date MM"
-        ]
-        existing_columns = [col for col in columns_to_check if col in df.columns]
-        
-        for row_idx, row in df.iterrows():
-            blank_columns = row[existing_columns][row[existing_columns].isnull() | (row[existing_columns] == "")].index.tolist()
-            if blank_columns:
-                blank_details.append((row_idx, blank_columns))
-    
-    # Special case for Chemence file type - only check specific columns
-    elif file_type == "Chemence":
-        columns_to_check = [
-            "Source",
-            "Commission Date",
-            "Commission Date YYYY",
-            "Commission Date MM",
-            "Sales Group",
-            "Source ID",
-            "Sales Rep Name",
-            "Account Number",
-            "Account Name",
-            "Street",
-            "City",
-            "State",
-            "Zip",
-            "Description",
-            "Part #",
-            "Qty Shipped",
-            "UOM",
-            "Sales Price",
-            "Sales Total",
-            "Commission",
-            "Unit Price"
-        ]
-        existing_columns = [col for col in columns_to_check if col in df.columns]
-        
-        for row_idx, row in df.iterrows():
-            blank_columns = row[existing_columns][row[existing_columns].isnull() | (row[existing_columns] == "")].index.tolist()
-            if blank_columns:
-                blank_details.append((row_idx, blank_columns))
-    else:
-        # Original behavior for all other file types
-        for row_idx, row in df.iterrows():
-            blank_columns = row[row.isnull() | (row == "")].index.tolist()
-            if blank_columns:
-                blank_details.append((row_idx, blank_columns))
-                
-    return blank_details
+    store = get_upload_store()
+    deltas = st.session_state.get("edit_deltas", {})
+    for file_name, file_type in list(st.session_state.get(names_key, {}).items()):
+        df = store_get(store, f"{names_key}:{file_name}")
+        if names_key == "dataframes" and deltas.get(file_name):
+            df = apply_edit_delta(df, deltas[file_name])
+        yield file_name, (df, file_type)
 
-def check_for_amount_line_issues(df: pd.DataFrame) -> list:
+def clear_staged_dataframes(names_key: str):
+    store = get_upload_store()
+    for file_name in st.session_state.get(names_key, {}):
+        store_pop(store, f"{names_key}:{file_name}")
+        st.session_state.get("staged_parse_keys", {}).pop(f"{names_key}:{file_name}", None)
+        if names_key == "dataframes":
+            st.session_state.get("edit_deltas", {}).pop(file_name, None)
+            st.session_state.get("edited_files", set()).discard(file_name)
+    st.session_state[names_key] = {}
+    if names_key == "dataframes":
+        st.session_state.pop("preview_state", None)
+
+def windowed_editor(df: pd.DataFrame, file_name: str, file_type: str, preview_key: tuple,
+                    rep_column: str, rep_options: list, col_config: dict):
     """
-    Check for rows where 'Amount line' is ≤ 0 and return a list of problematic rows.
+    Edit a large upload through a window of rows (a page, or the rows needing attention).
+    Edits are kept as a row-level delta in st.session_state.edit_deltas and only the edited
+    rows are revalidated.
     """
-    issues = []
-    if 'Amount line' in df.columns:
-        for row_idx, row in df.iterrows():
-            try:
-                amount = float(row['Amount line'])
-                if amount <= 0:
-                    issues.append(row_idx + 1)  # Add 1 to row index to make it human-readable
-            except (ValueError, TypeError):
-                # If we can't convert to float, skip this row
-                pass
-    return issues
+    state = st.session_state.get("preview_state")
+    deltas = st.session_state.setdefault("edit_deltas", {})
+    if not state or state["key"] != preview_key:
+        # New file or new parse: validate the full frame once and start without edits.
+        state = {"key": preview_key, "issues": find_row_issues(df, file_type, rep_column, rep_options), "revision": 0}
+        st.session_state.preview_state = state
+        deltas[file_name] = {}
+    delta = deltas.setdefault(file_name, {})
+    issues = state["issues"]
+
+    st.info(
+        f"This file has {len(df):,} rows, so it is shown {PREVIEW_PAGE_ROWS} rows at a time. "
+        f"{len(issues):,} rows need attention; {len(delta):,} rows edited."
+    )
+    view = st.radio("Show:", ["Rows needing attention", "Browse all rows"], horizontal=True, key="preview_view")
+    if view == "Rows needing attention":
+        rows = df.index[df.index.isin(list(issues))][:PREVIEW_PAGE_ROWS]
+        if len(rows) == 0:
+            st.success("✅ No rows need attention.")
+            return
+        if len(issues) > PREVIEW_PAGE_ROWS:
+            st.caption(f"Showing the first {PREVIEW_PAGE_ROWS} of {len(issues):,} rows needing attention.")
+    else:
+        page_count = max(1, -(-len(df) // PREVIEW_PAGE_ROWS))
+        page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1, key="preview_page")
+        st.caption(f"Page {page} of {page_count}")
+        rows = df.index[(page - 1) * PREVIEW_PAGE_ROWS:page * PREVIEW_PAGE_ROWS]
+
+    window = apply_edit_delta(df.loc[rows], delta)
+    display = window.copy()
+    display.insert(0, "Issues", ["; ".join(issues.get(row, [])) for row in window.index])
+    edited = st.data_editor(
+        display,
+        use_container_width=True,
+        num_rows="fixed",
+        hide_index=False,
+        disabled=["Issues"],
+        # The revision changes with every recorded edit so the editor restarts from the delta.
+        key=f"preview_editor_{file_name}_{file_type}_{state['revision']}",
+        column_config=col_config
+    )
+
+    changes = diff_window(window, edited.drop(columns=["Issues"]))
+    if changes:
+        merge_edit_delta(delta, changes)
+        edited_rows = apply_edit_delta(df.loc[list(changes)], delta)
+        for row in changes:
+            issues.pop(row, None)
+        issues.update(find_row_issues(edited_rows, file_type, rep_column, rep_options))
+        state["revision"] += 1
+        st.rerun()
 
 def fetch_table_data(table_name: str) -> pd.DataFrame:
     """Fetch data from a PostgreSQL table."""
@@ -228,23 +241,12 @@ def update_table_data(table_name: str, df: pd.DataFrame):
         engine.dispose()
 
 def get_unique_sales_rep_names():
-    """Fetch distinct Sales Rep Names from the sales_rep_commission_tier table."""
-    query = """
-        SELECT DISTINCT "Sales Rep Name"
-        FROM sales_rep_commission_tier
-        ORDER BY "Sales Rep Name"
-    """
-    engine = get_db_connection()
+    """Fetch distinct Sales Rep Names from the sales_rep_commission_tier table (cached per process)."""
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text(query))
-            sales_reps = [row[0] for row in result.fetchall()]
-        return sales_reps
+        return get_reference_values("sales_rep_commission_tier", "Sales Rep Name")
     except Exception as e:
         st.error(f"Error fetching unique Sales Rep names: {e}")
         return []
-    finally:
-        engine.dispose()
 
 def check_for_valid_sales_rep(df: pd.DataFrame) -> list:
     """
@@ -270,32 +272,6 @@ def check_for_valid_sales_rep(df: pd.DataFrame) -> list:
     return missing_names
 
 
-def add_commission_date_columns(df: pd.DataFrame, year: str, month: str, month_num: int) -> pd.DataFrame:
-    """
-    Add standardized Commission Date columns to a DataFrame.
-    For Summit Medical files, preserves existing Revenue Recognition Date values.
-    
-    Returns the updated DataFrame with the following columns added or updated:
-    - Commission Date YYYY
-    - Commission Date MM
-    - Commission Date
-    """
-    # Check if this is a Summit Medical file by looking for specific columns
-    is_summit_medical = (
-        "Revenue Recognition Date" in df.columns and 
-        "Revenue Recognition Date YYYY" in df.columns and 
-        "Revenue Recognition Date MM" in df.columns
-    )
-    
-    # Format the Commission Date columns properly
-    df["Commission Date YYYY"] = str(year)
-    df["Commission Date MM"] = f"{month_num:02d}"
-    
-    # Create the Commission Date string directly with the formatted year and month
-    df["Commission Date"] = f"{year}-{month_num:02d}"
-    
-    return df
-
 def check_for_existing_data(df, file_type):
     """
     Check if there is existing data in the database for the Revenue Recognition dates in the dataframe.
@@ -304,19 +280,7 @@ def check_for_existing_data(df, file_type):
     - date_info is a string describing the dates with existing data
     """
     # Determine the table name based on file type
-    table_names = {
-        "Cygnus": "master_cygnus_sales",
-        "Logiquip": "master_logiquip_sales",
-        "Summit Medical": "master_summit_medical_sales",
-        "QuickBooks": "master_quickbooks_sales",
-        "InspeKtor": "master_inspektor_sales",
-        "Sunoptic": "master_sunoptic_sales",
-        "Ternio": "master_ternio_sales",
-        "Novo": "master_novo_sales",
-        "Chemence": "master_chemence_sales"
-    }
-    
-    table_name = table_names.get(file_type)
+    table_name = MASTER_TABLES.get(file_type)
     if not table_name:
         return False, ""
     
@@ -347,53 +311,64 @@ def check_for_existing_data(df, file_type):
     if not date_values:
         return False, ""
     
-    # Check the database for existing data with these dates
+    # Determine table column names based on what exists (schema lookup is cached per process)
+    try:
+        columns = get_table_columns(table_name)
+    except Exception as e:
+        st.error(f"Error checking for existing data: {e}")
+        return False, ""
+
+    table_year_col = None
+    table_month_col = None
+    for col in columns:
+        if col in possible_year_cols or col.lower() in [c.lower() for c in possible_year_cols]:
+            table_year_col = col
+        if col in possible_month_cols or col.lower() in [c.lower() for c in possible_month_cols]:
+            table_month_col = col
+
+    if not table_year_col or not table_month_col:
+        st.warning(f"Could not find Revenue Recognition year/month columns in {table_name} table. Skipping overwrite check.")
+        return False, ""
+
+    # Count the rows of every period in the file with one grouped query
+    period_pairs = ", ".join(f"(:yyyy_{i}, :mm_{i})" for i in range(len(date_values)))
+    params = {}
+    for i, (yyyy, mm) in enumerate(date_values):
+        params[f"yyyy_{i}"] = str(yyyy)
+        params[f"mm_{i}"] = str(mm)
+    query = text(f"""
+        SELECT "{table_year_col}" AS yyyy, "{table_month_col}" AS mm, COUNT(*) AS record_count
+        FROM {table_name}
+        WHERE ("{table_year_col}", "{table_month_col}") IN ({period_pairs})
+        GROUP BY "{table_year_col}", "{table_month_col}"
+    """)
+
     engine = get_db_connection()
     existing_periods = []
-    
+
     try:
+        # Served by the period index created by setup_database.py
         with engine.connect() as conn:
-            # First, check what column names are used in this table
-            inspector = inspect(engine)
-            columns = [c["name"] for c in inspector.get_columns(table_name)]
-            
-            # Determine table column names based on what exists
-            table_year_col = None
-            table_month_col = None
-            
-            for col in columns:
-                if col in possible_year_cols or col.lower() in [c.lower() for c in possible_year_cols]:
-                    table_year_col = col
-                if col in possible_month_cols or col.lower() in [c.lower() for c in possible_month_cols]:
-                    table_month_col = col
-            
-            if not table_year_col or not table_month_col:
-                st.warning(f"Could not find Revenue Recognition year/month columns in {table_name} table. Skipping overwrite check.")
-                return False, ""
-            
-            # Now check each date combination
-            for yyyy, mm in date_values:
-                # Convert month number to month name for user-friendly display
-                month_name = {
-                    "01": "January", "02": "February", "03": "March", "04": "April",
-                    "05": "May", "06": "June", "07": "July", "08": "August",
-                    "09": "September", "10": "October", "11": "November", "12": "December",
-                    1: "January", 2: "February", 3: "March", 4: "April",
-                    5: "May", 6: "June", 7: "July", 8: "August",
-                    9: "September", 10: "October", 11: "November", 12: "December"
-                }.get(mm, mm)
-                
-                # Check if data exists for this period
-                query = text(f"""
-                    SELECT COUNT(*) FROM {table_name}
-                    WHERE "{table_year_col}" = :yyyy
-                    AND "{table_month_col}" = :mm
-                """)
-                result = conn.execute(query, {"yyyy": str(yyyy), "mm": str(mm)})
-                count = result.scalar()
-                
-                if count > 0:
-                    existing_periods.append(f"{month_name} {yyyy} ({count} records)")
+            counts = {
+                (str(row.yyyy), str(row.mm)): row.record_count
+                for row in conn.execute(query, params)
+            }
+
+        # Report in the order the periods appear in the file
+        for yyyy, mm in date_values:
+            # Convert month number to month name for user-friendly display
+            month_name = {
+                "01": "January", "02": "February", "03": "March", "04": "April",
+                "05": "May", "06": "June", "07": "July", "08": "August",
+                "09": "September", "10": "October", "11": "November", "12": "December",
+                1: "January", 2: "February", 3: "March", 4: "April",
+                5: "May", 6: "June", 7: "July", 8: "August",
+                9: "September", 10: "October", 11: "November", 12: "December"
+            }.get(mm, mm)
+
+            count = counts.get((str(yyyy), str(mm)), 0)
+            if count > 0:
+                existing_periods.append(f"{month_name} {yyyy} ({count} records)")
     except Exception as e:
         st.error(f"Error checking for existing data: {e}")
         # Print detailed debug info to help troubleshoot
@@ -407,6 +382,195 @@ def check_for_existing_data(df, file_type):
     
     return False, ""
 
+def new_streamed_checks() -> dict:
+    """Empty results of the upload checks, filled chunk by chunk by check_streamed_chunk."""
+    return {
+        "rows": 0,
+        "missing_columns": [],
+        "missing_reps": set(),
+        "blank_count": 0,
+        "blank_details": [],
+        "amount_line_count": 0,
+        "amount_line_rows": [],
+        "periods": pd.DataFrame(),
+    }
+
+def check_streamed_chunk(checks: dict, df: pd.DataFrame, file_type: str):
+    """
+    Run the checks of an in-memory upload (format, Sales Reps, blanks, Amount line ≤ 0) on one
+    cleaned chunk of a streamed upload and add the results to checks. Rows are numbered across
+    chunks; only the first STREAM_CHECK_DETAIL_ROWS rows of each check are kept.
+    """
+    numbered = df.set_axis(range(checks["rows"], checks["rows"] + len(df)))
+    if checks["rows"] == 0:
+        checks["missing_columns"] = validate_file_format(df, file_type)[1]
+    checks["missing_reps"].update(check_for_valid_sales_rep(df))
+
+    blank_details = check_for_blanks_with_details(numbered, file_type)
+    checks["blank_count"] += len(blank_details)
+    checks["blank_details"].extend(blank_details[:STREAM_CHECK_DETAIL_ROWS - len(checks["blank_details"])])
+
+    if file_type == "QuickBooks":
+        amount_line_rows = check_for_amount_line_issues(numbered)
+        checks["amount_line_count"] += len(amount_line_rows)
+        checks["amount_line_rows"].extend(
+            amount_line_rows[:STREAM_CHECK_DETAIL_ROWS - len(checks["amount_line_rows"])]
+        )
+
+    # Distinct periods, for the overwrite check at save time
+    period_columns = [col for col in PERIOD_COLUMNS if col in df.columns]
+    if period_columns:
+        periods = pd.concat([checks["periods"], df[period_columns].drop_duplicates()], ignore_index=True)
+        checks["periods"] = periods.drop_duplicates().reset_index(drop=True)
+    checks["rows"] += len(df)
+
+def discard_streamed_upload():
+    """Forget the streamed upload of this session and drop its staging table, if any."""
+    streamed = st.session_state.pop("streamed_upload", None)
+    if streamed and streamed.get("staging_table"):
+        drop_staging_table(streamed["staging_table"])
+
+def streamed_upload_section(file_bytes: bytes, file_name: str, file_type: str, year, month, month_num):
+    """
+    Steps 3 and 4 for an export too large to preview: stream it chunk by chunk into a staging
+    table (once per file and Commission Date) while running the upload checks on each chunk,
+    show a sample, then move the staged rows once the checks pass.
+    """
+    upload_key = (file_name, make_parse_cache_key(file_bytes, file_type, year, month))
+    streamed = st.session_state.get("streamed_upload")
+    if streamed is None or streamed["key"] != upload_key:
+        discard_streamed_upload()
+        st.info(
+            f"This file is larger than {STREAM_THRESHOLD_MB} MB: it is cleaned in chunks and staged in "
+            f"the database instead of being loaded for editing."
+        )
+        progress = st.empty()
+        checks = new_streamed_checks()
+        try:
+            staging_table, rows, sample = stream_upload_to_staging(
+                file_bytes, file_name, file_type, year, month, month_num,
+                progress_callback=lambda rows: progress.caption(f"Staged {rows:,} rows..."),
+                chunk_callback=lambda df: check_streamed_chunk(checks, df, file_type),
+            )
+        except Exception as e:
+            st.error(f"Error loading {file_name} of type {file_type}: {e}")
+            return
+        progress.empty()
+        streamed = {
+            "key": upload_key, "staging_table": staging_table, "rows": rows, "sample": sample, "checks": checks
+        }
+        st.session_state.streamed_upload = streamed
+
+    if streamed.get("saved"):
+        # The staged rows were moved (and the staging table dropped) in a committed transaction.
+        if streamed.get("harmonise_failed"):
+            st.error(
+                f"'{file_name}' was saved to the '{file_type}' table, but harmonising {file_type} failed. "
+                f"Re-run harmonise once the cause in the debug log is fixed; saving again is not needed."
+            )
+            if st.button(f"Re-run Harmonise for {file_type}", key="rerun_harmonise_button"):
+                with st.spinner(f"Harmonising {file_type}..."):
+                    debug_output = harmonise_product_line(file_type)
+                if has_failed_messages(debug_output):
+                    st.error(f"Harmonising {file_type} failed again, see the debug log.")
+                else:
+                    streamed["harmonise_failed"] = False
+                    st.success(f"{file_type} harmonised.")
+                st.markdown("### Debug Log")
+                for message in debug_output:
+                    st.markdown(f"- {message}")
+        else:
+            st.success(f"Data from '{file_name}' has been saved to the '{file_type}' table.")
+        return
+
+    st.success(f"{streamed['rows']:,} cleaned rows staged. The first {len(streamed['sample'])} are shown below.")
+    st.dataframe(streamed["sample"], use_container_width=True)
+
+    checks = streamed["checks"]
+    if checks["missing_columns"]:
+        expected_list = "\n".join(f'"{col}"' for col in EXPECTED_COLUMNS.get(file_type, []))
+        st.error(
+            f"**The file uploaded does not match the expected format.**\n\n"
+            f"Please check that you have selected the correct product line and associated file.\n\n"
+            f"**Expected columns for {file_type}:**\n{expected_list}\n\n"
+            f"**Missing columns:** {', '.join(checks['missing_columns'])}"
+        )
+        return
+    if checks["missing_reps"]:
+        st.error(
+            "The following sales reps don't have any commission tier setup: "
+            + ", ".join(sorted(checks["missing_reps"]))
+        )
+        st.warning("Please set up commission tiers for these sales reps in the Portfolio Management section before proceeding.")
+        return
+    if checks["amount_line_count"]:
+        st.error(f"{checks['amount_line_count']:,} rows in the QuickBooks file have 'Amount line' ≤ 0. Please review them.")
+        st.markdown(f"**Row(s):** {', '.join(map(str, checks['amount_line_rows']))}"
+                    + (" ..." if checks["amount_line_count"] > len(checks["amount_line_rows"]) else ""))
+
+    st.markdown("---")
+    st.subheader("Step 4: Save Data to Database")
+    if checks["blank_count"]:
+        st.error(
+            f"{checks['blank_count']:,} rows contain blank values. Please fix them in the file and upload it again."
+        )
+        for row, cols in checks["blank_details"]:
+            st.markdown(f"- **File:** {file_name} | **Row:** {row} | **Columns:** {', '.join(cols)}")
+        if checks["blank_count"] > len(checks["blank_details"]):
+            st.caption(f"Showing the first {len(checks['blank_details'])} rows with blank values.")
+        return
+
+    st.caption("Existing rows for the periods and Product Lines in this file are replaced.")
+    if st.session_state.showing_overwrite_warning:
+        st.warning("⚠️ Warning: Existing data will be overwritten!")
+        st.markdown("The following data already exists in the database:")
+        for msg in st.session_state.overwrite_messages:
+            st.markdown(f"- {msg}")
+
+    save_button_label = "Yes, Overwrite Data" if st.session_state.showing_overwrite_warning else "Confirm and Save to Database"
+    if st.button(save_button_label, key="save_streamed_button"):
+        if not st.session_state.showing_overwrite_warning:
+            has_existing, date_info = check_for_existing_data(checks["periods"], file_type)
+            if has_existing:
+                st.session_state.showing_overwrite_warning = True
+                st.session_state.overwrite_messages = [f"**{file_type}**: {date_info}"]
+                st.rerun()
+                return
+        st.session_state.showing_overwrite_warning = False
+        st.session_state.overwrite_messages = []
+
+        save_staged = STREAMING_LOADERS[file_type][1]
+        with st.spinner("Saving staged rows..."):
+            debug_output = save_staged(streamed["staging_table"], MASTER_TABLES[file_type])
+        if has_failed_messages(debug_output):
+            # The move is one transaction: when it fails the rows are still staged.
+            st.error(f"Error saving '{file_name}' to the database. The staged rows were kept, so you can try again.")
+        else:
+            # The staging table was dropped with the move: only harmonising is left to do.
+            streamed = {"key": upload_key, "saved": True}
+            st.session_state.streamed_upload = streamed
+            with st.spinner(f"Harmonising {file_type}..."):
+                harmonise_messages = harmonise_product_line(file_type)
+            debug_output.extend(harmonise_messages)
+            if has_failed_messages(harmonise_messages):
+                streamed["harmonise_failed"] = True
+                st.error(
+                    f"'{file_name}' was saved to the '{file_type}' table, but harmonising {file_type} failed. "
+                    f"Re-run harmonise once the cause in the debug log is fixed; saving again is not needed."
+                )
+            else:
+                st.success(f"Data from '{file_name}' successfully saved to the '{file_type}' table.")
+        st.markdown("### Debug Log")
+        for message in debug_output:
+            st.markdown(f"- {message}")
+
+    if st.session_state.showing_overwrite_warning:
+        if st.button("Cancel", key="cancel_streamed_button"):
+            st.session_state.showing_overwrite_warning = False
+            st.session_state.overwrite_messages = []
+            st.success("Operation cancelled. No data was modified.")
+            st.rerun()
+
 def sales_data_tab():
     st.title("Sales Data Upload Hub")
     
@@ -430,9 +594,11 @@ def sales_data_tab():
         st.subheader("Step 1: Select Product Line")
         # Reset button to clear all session state related to file uploads
         if st.button("Upload a New File"):
+            clear_staged_dataframes("dataframes")
+            discard_streamed_upload()
+            store_pop(get_upload_store(), "confirmed_file_bytes")
             keys_to_clear = [
                 "selected_file_type",
-                "confirmed_file_bytes",
                 "confirmed_file_name",
                 "confirmed_file_type",
                 "dataframes",
@@ -456,7 +622,8 @@ def sales_data_tab():
         # If product line changes, clear previous file data
         if st.session_state.get("selected_file_type") != selected_file_type:
             st.session_state["selected_file_type"] = selected_file_type
-            st.session_state.pop("confirmed_file_bytes", None)
+            store_pop(get_upload_store(), "confirmed_file_bytes")
+            discard_streamed_upload()
             st.session_state.pop("confirmed_file_name", None)
             st.session_state.pop("confirmed_file_type", None)
             
@@ -509,9 +676,13 @@ def sales_data_tab():
         uploaded_file = st.file_uploader("Upload a .xlsx or .pdf file:", type=["xlsx", "pdf"])
         if uploaded_file and st.button("Confirm File Selection"):
             file_bytes = uploaded_file.read()
-            st.session_state["confirmed_file_bytes"] = file_bytes
+            store_put(get_upload_store(), "confirmed_file_bytes", file_bytes)
             st.session_state["confirmed_file_name"] = uploaded_file.name
             st.session_state["confirmed_file_type"] = uploaded_file.type
+            # A newly confirmed file starts without edits, even if it has the same name as the last one.
+            st.session_state.get("edit_deltas", {}).pop(uploaded_file.name, None)
+            st.session_state.get("staged_parse_keys", {}).pop(f"dataframes:{uploaded_file.name}", None)
+            st.session_state.pop("preview_state", None)
             st.success(f"File '{uploaded_file.name}' has been confirmed!")
 
     # Check if we should prevent processing
@@ -577,15 +748,16 @@ def sales_data_tab():
             should_stop_processing = True
 
     # Check for date selection
-    if "confirmed_file_bytes" in st.session_state and (
+    has_confirmed_file = store_contains(get_upload_store(), "confirmed_file_bytes")
+    if has_confirmed_file and (
         "selected_year" not in st.session_state or "selected_month" not in st.session_state
     ):
         st.warning("⚠️ Please select both a year and month for the Commission Date before proceeding.")
         should_stop_processing = True
     
     # Stop processing if needed
-    if should_stop_processing or "confirmed_file_bytes" not in st.session_state:
-        if "confirmed_file_bytes" not in st.session_state:
+    if should_stop_processing or not has_confirmed_file:
+        if not has_confirmed_file:
             st.warning("Please upload and confirm a file to proceed.")
         return
 
@@ -594,7 +766,7 @@ def sales_data_tab():
     file_type = st.session_state["selected_file_type"]
     file_name = st.session_state["confirmed_file_name"]
     mime_type = st.session_state["confirmed_file_type"]
-    file_bytes = st.session_state["confirmed_file_bytes"]
+    file_bytes = store_get(get_upload_store(), "confirmed_file_bytes")
     
     # Get year and month for commission date
     year = st.session_state["selected_year"]
@@ -603,39 +775,46 @@ def sales_data_tab():
 
     st.write(f"### Processing: {file_name} (Type: {file_type})")
 
-    try:
-        debug_info = []
-        # For Summit Medical PDFs
-        if file_type == "Summit Medical" and mime_type == "application/pdf":
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-                tmp_file.write(file_bytes)
-                tmp_file_path = tmp_file.name
-            try:
-                df = load_pdf_file_summit_medical(tmp_file_path)
-            finally:
-                os.remove(tmp_file_path)
-        else:
-            # For all Excel files
-            suffix = ".xlsx" if mime_type == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet" else None
-            extension = suffix if suffix else ".pdf"
-            with tempfile.NamedTemporaryFile(delete=False, suffix=extension) as tmp_file:
-                tmp_file.write(file_bytes)
-                tmp_file_path = tmp_file.name
-            try:
-                # Pass year and month to all loaders
-                df = load_file(
-                    tmp_file_path, 
-                    file_type, 
-                    debug_info, 
-                    year=str(year), 
-                    month=month
-                )
-            finally:
-                os.remove(tmp_file_path)
+    # Sample the header of Excel files first so a wrong product line is rejected before the full parse.
+    if file_name.lower().endswith((".xlsx", ".xls")):
+        is_match, vendor_message = check_file_vendor(file_bytes, file_type)
+        if not is_match:
+            st.error(
+                f"**{vendor_message}**\n\n"
+                f"Please check that you have selected the correct product line and associated file."
+            )
+            return
+        if vendor_message.startswith("⚠️"):
+            st.warning(vendor_message)
+
+    if file_type in STREAMING_LOADERS and len(file_bytes) >= STREAM_THRESHOLD_MB * 1024 * 1024:
+        streamed_upload_section(file_bytes, file_name, file_type, year, month, month_num)
+        return
 
-        # Add Commission Date columns for file types that don't already handle it
-        if not LOADERS_WITH_DATE_HANDLING.get(file_type, False):
-            df = add_commission_date_columns(df, year, month, month_num)
+    # Long Summit Medical PDFs are extracted page range by page range; show how far along it is.
+    pdf_progress = None
+    if file_type == "Summit Medical" and file_name.lower().endswith(".pdf"):
+        pdf_progress = st.empty()
+
+    def report_pdf_progress(pages_done, page_count):
+        pdf_progress.progress(pages_done / page_count, text=f"Extracted {pages_done}/{page_count} pages")
+
+    try:
+        # The parsed output is cached on disk, so reruns (e.g. every data editor change) reuse it
+        # until the file content or the selected dates change.
+        df = parse_upload(
+            file_bytes,
+            file_name,
+            file_type,
+            year,
+            month,
+            month_num,
+            rev_year=st.session_state.get("summit_rev_selected_year"),
+            rev_month=st.session_state.get("summit_rev_selected_month"),
+            progress_callback=report_pdf_progress if pdf_progress is not None else None,
+        )
+        if pdf_progress is not None:
+            pdf_progress.empty()
 
         # Validate file format
         is_valid, missing_columns = validate_file_format(df, file_type)
@@ -687,18 +866,42 @@ def sales_data_tab():
                 help="Select a Sales Rep from the list"
             )
 
-        # Render the editable data editor with column configuration
-        unique_key = f"editor_{file_name}_{file_type}"
-        edited_df = st.data_editor(
-            df,
-            use_container_width=True,
-            num_rows="dynamic",
-            hide_index=False,
-            key=unique_key,
-            column_config=col_config
+        # Each parse is staged once; reruns read the staged frame back instead of putting it again.
+        parse_key = make_parse_cache_key(
+            file_bytes, file_type, year, month,
+            st.session_state.get("summit_rev_selected_year"),
+            st.session_state.get("summit_rev_selected_month"),
         )
+        if len(df) > PREVIEW_ROW_THRESHOLD:
+            # Large files: stage the parsed frame as is and keep edits as a row-level delta.
+            # The edits belong to the file content and the selected period, so a reference table
+            # change elsewhere in the app (which bumps the parse key) does not discard them.
+            preview_key = (file_name, hashlib.sha256(file_bytes).hexdigest(), year, month)
+            if not is_staged("dataframes", file_name, parse_key):
+                stage_dataframe("dataframes", file_name, df, file_type, parse_key)
+            windowed_editor(
+                df, file_name, file_type, preview_key, rep_column,
+                rep_options if rep_column else None, col_config
+            )
+        else:
+            # Render the editable data editor with column configuration
+            unique_key = f"editor_{file_name}_{file_type}"
+            edited_df = st.data_editor(
+                df,
+                use_container_width=True,
+                num_rows="dynamic",
+                hide_index=False,
+                key=unique_key,
+                column_config=col_config,
+                on_change=mark_editor_changed,
+                args=(file_name,)
+            )
 
-        st.session_state.dataframes[file_name] = (edited_df, file_type)
+            # Only put the frame again when the editor reports an edit (or the file was re-parsed).
+            edited = file_name in st.session_state.get("edited_files", set())
+            if edited or not is_staged("dataframes", file_name, parse_key):
+                stage_dataframe("dataframes", file_name, edited_df, file_type, parse_key)
+                st.session_state.get("edited_files", set()).discard(file_name)
 
     except Exception as e:
         st.error(f"Error loading {file_name} of type {file_type}: {e}")
@@ -707,7 +910,28 @@ def sales_data_tab():
     # Create a visible separation for the action section
     st.markdown("---")
     st.subheader("Step 4: Save Data to Database")
+    memory_used, disk_used = store_usage(get_upload_store())
+    st.caption(f"Staged upload data: {memory_used / 1e6:.1f} MB in memory, {disk_used / 1e6:.1f} MB spilled to disk.")
     
+    st.checkbox(
+        "Process in the background (requires the upload worker: python upload_worker.py)",
+        key="run_in_background",
+    )
+
+    # Dry run: compare the parsed files with the live master tables without writing anything
+    if st.button("Preview Changes (Dry Run)", key="dry_run_button"):
+        for f_name, (df_data, f_type) in staged_dataframes("dataframes"):
+            try:
+                periods, reps = dry_run_diff(df_data, f_type)
+            except Exception as e:
+                st.error(f"Error running the dry run for '{f_name}': {e}")
+                continue
+            st.markdown(f"#### Dry run: {f_name} ({f_type})")
+            st.markdown("**Rows by Revenue Recognition period**")
+            st.dataframe(periods, use_container_width=True, hide_index=True)
+            st.markdown("**Net change per Sales Rep**")
+            st.dataframe(reps, use_container_width=True, hide_index=True)
+
     # Create two columns for layout
     col1, col2 = st.columns([3, 1])
     
@@ -733,7 +957,7 @@ def sales_data_tab():
 
             # Check for blank cells in required fields
             invalid_files = {}
-            for f_name, (df_data, f_type) in st.session_state.dataframes.items():
+            for f_name, (df_data, f_type) in staged_dataframes("dataframes"):
                 blank_details = check_for_blanks_with_details(df_data, f_type)
                 if blank_details:
                     invalid_files[f_name] = blank_details
@@ -750,7 +974,7 @@ def sales_data_tab():
                 overwrite_needed = False
                 overwrite_messages = []
                 
-                for f_name, (df_data, f_type) in st.session_state.dataframes.items():
+                for f_name, (df_data, f_type) in staged_dataframes("dataframes"):
                     has_existing, date_info = check_for_existing_data(df_data, f_type)
                     if has_existing:
                         overwrite_needed = True
@@ -770,38 +994,29 @@ def sales_data_tab():
             st.session_state.showing_overwrite_warning = False
             st.session_state.overwrite_messages = []
             
+            # Queue the pipeline for the background worker instead of running it in this request
+            if st.session_state.get("run_in_background"):
+                job_ids = st.session_state.setdefault("upload_job_ids", [])
+                for f_name, (df_data, f_type) in staged_dataframes("dataframes"):
+                    try:
+                        job_ids.append(enqueue_upload_job(df_data, f_name, f_type, st.session_state.get("user_name")))
+                        st.success(f"'{f_name}' queued for background processing.")
+                    except Exception as e:
+                        st.error(f"Error queueing '{f_name}': {e}")
+                return
+
             # Save all the dataframes
             debug_output = []
-            for f_name, (df_data, f_type) in st.session_state.dataframes.items():
+            for f_name, (df_data, f_type) in staged_dataframes("dataframes"):
                 try:
                     # Dispatch to appropriate save function based on file type
-                    save_functions = {
-                        "Cygnus": save_cygnus_to_db,
-                        "Logiquip": save_logiquip_to_db,
-                        "Summit Medical": save_summit_medical_to_db,
-                        "QuickBooks": save_quickbooks_to_db,
-                        "InspeKtor": save_inspektor_to_db,
-                        "Sunoptic": save_sunoptic_to_db,
-                        "Ternio": save_ternio_to_db,
-                        "Novo": save_novo_to_db,
-                        "Chemence": save_chemence_to_db
-                    }
-                    
-                    table_names = {
-                        "Cygnus": "master_cygnus_sales",
-                        "Logiquip": "master_logiquip_sales",
-                        "Summit Medical": "master_summit_medical_sales",
-                        "QuickBooks": "master_quickbooks_sales",
-                        "InspeKtor": "master_inspektor_sales",
-                        "Sunoptic": "master_sunoptic_sales",
-                        "Ternio": "master_ternio_sales",
-                        "Novo": "master_novo_sales",
-                        "Chemence": "master_chemence_sales"
-                    }
-                    
-                    if f_type in save_functions:
-                        debug_output.extend(save_functions[f_type](df_data, table_names[f_type]))
-                        st.success(f"Data from '{f_name}' successfully saved to the '{f_type}' table.")
+                    if f_type in SAVE_FUNCTIONS:
+                        messages = save_upload(f_type, df_data)
+                        debug_output.extend(messages)
+                        if has_failed_messages(messages):
+                            st.error(f"Error saving '{f_name}' to the database, see the debug log.")
+                        else:
+                            st.success(f"Data from '{f_name}' successfully saved to the '{f_type}' table.")
                     else:
                         st.error(f"No save function defined for file type: {f_type}")
                     
@@ -824,6 +1039,210 @@ def sales_data_tab():
                 st.success("Operation cancelled. No data was modified.")
                 st.rerun()  # Refresh to remove the warning
 
+@st.fragment(run_every=3)
+def upload_jobs_panel():
+    """Show the progress of the upload jobs queued in this session; refreshes itself every few seconds."""
+    job_ids = st.session_state.get("upload_job_ids", [])
+    if not job_ids:
+        return
+
+    try:
+        jobs, stages = get_jobs_status(job_ids)
+    except Exception as e:
+        st.error(f"Error fetching upload job status: {e}")
+        return
+
+    st.markdown("---")
+    st.subheader("Background Upload Jobs")
+    status_icons = {"queued": "⏳", "pending": "⏳", "running": "🔄", "succeeded": "✅", "failed": "❌"}
+    for _, job in jobs.iterrows():
+        st.markdown(
+            f"{status_icons.get(job['status'], '')} **{job['file_name']}** ({job['file_type']}) — {job['status']}"
+            + (f": {job['error']}" if job["error"] else "")
+        )
+        job_stages = stages[stages["job_id"] == job["id"]]
+        st.caption(" → ".join(
+            f"{status_icons.get(status, '')} {stage}" for stage, status in zip(job_stages["stage"], job_stages["status"])
+        ))
+        with st.expander(f"Debug Log: {job['file_name']} (job {job['id']})"):
+            for stage, log in zip(job_stages["stage"], job_stages["log"]):
+                if log:
+                    st.markdown(f"**{stage}**")
+                    for message in log.split("\n"):
+                        st.markdown(f"- {message}")
+
+    if not jobs["status"].isin(["queued", "running"]).any():
+        if st.button("Clear finished jobs", key="clear_upload_jobs"):
+            st.session_state.upload_job_ids = []
+            st.rerun()
+
+def batch_upload_tab():
+    """
+    Parse and save several vendor files at once (typically at month end). A .zip archive or many
+    files can be uploaded; each file is routed to its product line and the batch is validated
+    together, saved, and harmonised once per product line.
+    """
+    st.title("Batch Upload")
+    st.write(
+        "Upload the files of several product lines at once, or a .zip archive of them. Files are parsed "
+        "in parallel, saved concurrently across product lines and harmonised once per product line."
+    )
+
+    if "batch_dataframes" not in st.session_state:
+        st.session_state.batch_dataframes = {}
+    if "batch_report" not in st.session_state:
+        st.session_state.batch_report = None
+
+    current_year = datetime.datetime.now().year
+    year_options = [current_year - 1, current_year, current_year + 1]
+    month_options = ["January", "February", "March", "April", "May", "June",
+                     "July", "August", "September", "October", "November", "December"]
+
+    col1, col2 = st.columns(2)
+    with col1:
+        year = st.selectbox("Commission Date Year:", year_options, index=1, key="batch_year")
+    with col2:
+        month = st.selectbox("Commission Date Month:", month_options, key="batch_month")
+    month_num = month_options.index(month) + 1
+
+    uploaded_files = st.file_uploader(
+        "Upload .xlsx, .pdf or .zip files:", type=["xlsx", "pdf", "zip"], accept_multiple_files=True, key="batch_files"
+    )
+    if not uploaded_files:
+        st.info("Select the files to process.")
+        return
+
+    try:
+        files = expand_uploads([(f.name, f.getvalue()) for f in uploaded_files])
+    except Exception as e:
+        st.error(f"Error reading the uploaded archive: {e}")
+        return
+    if not files:
+        st.warning("No .xlsx or .pdf files found in the upload.")
+        return
+
+    # Product line for each file, detected from its name when possible
+    product_lines = list(FILE_TYPES.keys())
+    file_types = {}
+    st.subheader("Files in this batch")
+    for file_name, file_bytes in files:
+        detected = detect_file_type_from_name(file_name)
+        if detected is None and file_name.lower().endswith((".xlsx", ".xls")):
+            try:
+                detected = detect_file_vendor(file_bytes)[0]
+            except Exception:
+                detected = None
+        file_types[file_name] = st.selectbox(
+            f"Product line for {file_name}:" + ("" if detected else " (not detected, please check)"),
+            product_lines,
+            index=product_lines.index(detected) if detected else 0,
+            key=f"batch_type_{file_name}"
+        )
+
+    # Summit Medical Excel files also need a Revenue Recognition date
+    rev_year = rev_month = None
+    if any(
+        file_types[file_name] == "Summit Medical" and file_name.lower().endswith((".xlsx", ".xls"))
+        for file_name, _ in files
+    ):
+        col_rev1, col_rev2 = st.columns(2)
+        with col_rev1:
+            rev_year = st.selectbox("Summit Revenue Recognition Year:", year_options, index=1, key="batch_rev_year")
+        with col_rev2:
+            rev_month = st.selectbox("Summit Revenue Recognition Month:", month_options, key="batch_rev_month")
+
+    if st.button("Process Batch"):
+        jobs = {
+            file_name: {
+                "file_bytes": file_bytes,
+                "file_name": file_name,
+                "file_type": file_types[file_name],
+                "year": year,
+                "month": month,
+                "month_num": month_num,
+                "rev_year": rev_year,
+                "rev_month": rev_month,
+            }
+            for file_name, file_bytes in files
+        }
+        clear_staged_dataframes("batch_dataframes")
+        report = []
+        # Reject Excel files whose header does not match their product line before parsing them.
+        for file_name in list(jobs):
+            if file_name.lower().endswith((".xlsx", ".xls")):
+                is_match, vendor_message = check_file_vendor(jobs[file_name]["file_bytes"], file_types[file_name])
+                if not is_match:
+                    del jobs[file_name]
+                    report.append({
+                        "File": file_name,
+                        "Product Line": file_types[file_name],
+                        "Rows": 0,
+                        "Status": "❌ Rejected",
+                        "Issues": vendor_message,
+                    })
+        progress = st.progress(0.0, text=f"Parsing {len(jobs)} files with up to {INGEST_MAX_WORKERS} workers...")
+        for done, (file_name, df, error) in enumerate(parse_uploads_parallel(jobs), start=1):
+            progress.progress(done / len(jobs), text=f"Parsed {done}/{len(jobs)} files")
+            file_type = file_types[file_name]
+            issues = []
+            if error:
+                issues.append(f"Error loading file: {error}")
+            else:
+                is_valid, missing_columns = validate_file_format(df, file_type)
+                if not is_valid:
+                    issues.append(f"Missing columns: {', '.join(missing_columns)}")
+                else:
+                    missing_names = check_for_valid_sales_rep(df)
+                    if missing_names:
+                        issues.append(f"Sales reps without commission tier setup: {', '.join(missing_names)}")
+                    blank_details = check_for_blanks_with_details(df, file_type)
+                    if blank_details:
+                        issues.append(f"{len(blank_details)} rows with blank values (fix in the single file upload tab)")
+            if not issues:
+                stage_dataframe("batch_dataframes", file_name, df, file_type)
+            report.append({
+                "File": file_name,
+                "Product Line": file_type,
+                "Rows": 0 if df is None else len(df),
+                "Status": "❌ Rejected" if issues else "✅ Ready",
+                "Issues": "; ".join(issues),
+            })
+        st.session_state.batch_report = pd.DataFrame(report)
+
+    if st.session_state.batch_report is not None:
+        st.subheader("Validation report")
+        st.dataframe(st.session_state.batch_report, use_container_width=True, hide_index=True)
+
+    if not st.session_state.batch_dataframes:
+        return
+
+    st.markdown("---")
+    st.subheader("Files ready to save")
+    for file_name, (df, file_type) in staged_dataframes("batch_dataframes"):
+        has_existing, date_info = check_for_existing_data(df, file_type)
+        st.markdown(f"- **{file_name}** → {file_type} ({len(df)} rows)")
+        if has_existing:
+            st.warning(f"⚠️ {file_type}: existing data will be overwritten ({date_info})")
+
+    if st.button("Save Batch to Database"):
+        batch = dict(staged_dataframes("batch_dataframes"))
+        # One harmonisation pass per product line follows its files.
+        total = len(batch) + len({file_type for _, file_type in batch.values()})
+        progress = st.progress(0.0, text=f"Saving {len(batch)} files...")
+        for done, (file_name, file_type, messages, error) in enumerate(save_uploads_parallel(batch), start=1):
+            progress.progress(min(done / total, 1.0), text=f"Finished {done}/{total} steps")
+            if error:
+                st.error(f"Error in '{file_name}': {error}")
+            elif file_name in batch:
+                st.success(f"Data from '{file_name}' successfully saved to the '{file_type}' table.")
+            else:
+                st.success(f"{file_type} harmonised.")
+            with st.expander(f"Debug Log: {file_name}"):
+                for message in messages:
+                    st.markdown(f"- {message}")
+        clear_staged_dataframes("batch_dataframes")
+        st.session_state.batch_report = None
+
 def data_upload_status_tab():
     st.title("Data Upload Status")
     data_status = fetch_table_data("data_status")
@@ -873,11 +1292,15 @@ def data_upload_status_tab():
             update_table_data("data_status", edited_data)
             st.session_state.save_initiated = False
 
-# Create two tabs in the UI
-tab1, tab2 = st.tabs(["Sales Data Upload", "Data Upload Status"])
+# Create the tabs in the UI
+tab1, tab2, tab3 = st.tabs(["Sales Data Upload", "Batch Upload", "Data Upload Status"])
 
 with tab1:
     sales_data_tab()
+    upload_jobs_panel()
 
 with tab2:
+    batch_upload_tab()
+
+with tab3:
     data_upload_status_tab()
\ No newline at end of file
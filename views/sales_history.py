@@ -3,6 +3,14 @@ import pandas as pd
 from sqlalchemy import create_engine, text, inspect
 from dotenv import load_dotenv
 import os
+from data_loaders.search_index_utils import (
+    SEARCH_INDEX_TABLE,
+    search_invoice_index,
+    count_search_index_rows,
+    rebuild_invoice_search_index,
+)
+from data_loaders.access_utils import build_select_query, get_rep_restriction
+from data_loaders.snapshot_utils import snapshots_available, fetch_snapshot_frame, get_snapshot_values
 
 # Load environment variables
 load_dotenv()
@@ -10,6 +18,11 @@ load_dotenv()
 DATABASE_URL = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@" \
                f"{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
 
+# Rows of the Sales History table shown per page.
+HISTORY_PAGE_ROWS = 1000
+
+CURRENCY_COLUMNS = ["Invoice Total", "Sales Total", "Total Rep Due", "Comm Amt", "Commission"]
+
 def get_db_connection():
     """Create a database connection."""
     engine = create_engine(DATABASE_URL)
@@ -72,13 +85,14 @@ def get_unique_product_lines():
     finally:
         engine.dispose()
 
-def fetch_data_from_table(table_name, filters=None):
+def fetch_data_from_table(table_name, filters=None, rep_name=None):
     """
     Fetch data from a specific table with optional filters.
     
     Args:
         table_name: The name of the table to query.
         filters: Dictionary with column names as keys and lists of values to filter by.
+        rep_name: Sales Rep the session is restricted to (None for admins).
         
     Returns:
         pandas DataFrame with the query results.
@@ -90,13 +104,20 @@ def fetch_data_from_table(table_name, filters=None):
     if not table_has_data:
         st.warning(f"No data available in {table_name}. {message}")
         return pd.DataFrame()
+
+    # Read from the shared Arrow snapshot when possible: the Arrow-backed frame references the
+    # snapshot, whose rows are already in "Sales Rep Name" order, instead of copying it.
+    if snapshots_available(table_name):
+        try:
+            df = fetch_snapshot_frame(table_name, rep_name=rep_name, filters=filters)
+            engine.dispose()
+            return df
+        except Exception as e:
+            print(f"⚠️ Snapshot unavailable for {table_name}, reading from the database: {e}")
     
     try:
         with engine.connect() as conn:
-            # Start building the query
-            query = f"SELECT * FROM {table_name}"
-            
-            # Add WHERE clause if filters are provided and not empty
+            # Build the WHERE conditions from the filters
             where_conditions = []
             params = {}
             
@@ -112,12 +133,14 @@ def fetch_data_from_table(table_name, filters=None):
                             for i, value in enumerate(values):
                                 params[f'{column}_{i}'] = value
             
-            # Only add WHERE clause if there are actual conditions
-            if where_conditions:
-                query += " WHERE " + " AND ".join(where_conditions)
-            
-            # Add ORDER BY clause - ensure we're not duplicating columns
-            query += ' ORDER BY "Sales Rep Name"'
+            # The row-level restriction is added to the same WHERE clause
+            query, params = build_select_query(
+                table_name,
+                rep_name=rep_name,
+                where_conditions=where_conditions,
+                params=params,
+                order_by='"Sales Rep Name"',
+            )
             
             # Execute the query
             result = conn.execute(text(query), params)
@@ -130,19 +153,46 @@ def fetch_data_from_table(table_name, filters=None):
     finally:
         engine.dispose()
 
-def get_column_values(table_name, column_name):
-    """Get unique values from a column in a table."""
+def format_currency_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Return a copy of df with the currency columns written as text ("$1,234.50")."""
+    df = df.copy()
+    for col in CURRENCY_COLUMNS:
+        if col in df.columns:
+            try:
+                df[col] = df[col].astype(object).apply(
+                    lambda x: f"${float(x):,.2f}" if pd.notnull(x) and x != "" else ""
+                )
+            except:
+                pass
+    return df
+
+def get_column_values(table_name, column_name, rep_name=None):
+    """Get unique values from a column in a table (restricted to rep_name's rows when set)."""
     engine = get_db_connection()
     
     # Check if table exists and has data
     table_has_data, _ = check_table_exists(table_name)
     if not table_has_data:
         return []
+
+    if snapshots_available(table_name):
+        try:
+            values = get_snapshot_values(table_name, column_name, rep_name=rep_name)
+            engine.dispose()
+            return values
+        except Exception as e:
+            print(f"⚠️ Snapshot unavailable for {table_name}, reading from the database: {e}")
     
     try:
         with engine.connect() as conn:
-            query = text(f'SELECT DISTINCT "{column_name}" FROM {table_name} WHERE "{column_name}" IS NOT NULL ORDER BY "{column_name}"')
-            result = conn.execute(query)
+            query, params = build_select_query(
+                table_name,
+                rep_name=rep_name,
+                columns=f'DISTINCT "{column_name}"',
+                where_conditions=[f'"{column_name}" IS NOT NULL'],
+                order_by=f'"{column_name}"',
+            )
+            result = conn.execute(text(query), params)
             values = [row[0] for row in result.fetchall()]
             return values
     except Exception as e:
@@ -151,6 +201,64 @@ def get_column_values(table_name, column_name):
     finally:
         engine.dispose()
 
+def all_sources_search(rep_name=None):
+    """Search every product line at once through the unified invoice search index."""
+    if count_search_index_rows() == 0:
+        st.info("The cross-vendor search index is empty. It is filled automatically when sales data is uploaded.")
+        if (st.session_state.get("user_permission") or "").lower() == "admin":
+            if st.button("Build Search Index Now"):
+                with st.spinner("Building the search index from all master tables..."):
+                    messages = rebuild_invoice_search_index()
+                for message in messages:
+                    st.markdown(f"- {message}")
+        return
+
+    with st.expander("Search", expanded=True):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            invoice = st.text_input("Invoice Number (exact or prefix):")
+        with col2:
+            customer = st.text_input("Customer contains:")
+        with col3:
+            period = st.text_input("Revenue Recognition Period (YYYY-MM):")
+        sales_rep_names = get_column_values(SEARCH_INDEX_TABLE, "Sales Rep", rep_name=rep_name)
+        selected_sales_reps = st.multiselect("Sales Rep Name:", sales_rep_names) if sales_rep_names else []
+
+    if not (invoice or customer or period or selected_sales_reps or rep_name):
+        st.info("Enter at least one search criterion to search across all product lines.")
+        return
+
+    # Restricted sessions can only ever search their own rows
+    if rep_name is not None:
+        selected_sales_reps = [rep_name]
+
+    try:
+        data = search_invoice_index(
+            invoice=invoice,
+            customer=customer,
+            sales_reps=selected_sales_reps,
+            period=period.strip() or None,
+        )
+    except Exception as e:
+        st.error(f"Error searching the invoice index: {e}")
+        return
+
+    if data.empty:
+        st.info("No invoice lines found for the current search.")
+        return
+
+    st.subheader(f"Search Results ({len(data)} records)")
+    data["Amount"] = data["Amount"].apply(lambda x: f"${float(x):,.2f}" if pd.notnull(x) else "")
+    st.dataframe(data, use_container_width=True)
+
+    csv = data.to_csv(index=False).encode('utf-8')
+    st.download_button(
+        label="Download Results as CSV",
+        data=csv,
+        file_name="all_sources_invoice_search.csv",
+        mime="text/csv",
+    )
+
 def sales_history_page():
     st.title("Sales History")
     
@@ -161,12 +269,19 @@ def sales_history_page():
         st.info("No sales data available yet. Please upload data through the Sales Data Upload section first.")
         return
     
-    # Select product line
-    selected_product_line = st.selectbox("Select Product Line:", product_lines)
+    # Select product line ("All Sources" searches every vendor through the unified index)
+    selected_product_line = st.selectbox("Select Product Line:", product_lines + ["All Sources"])
     
     if not selected_product_line:
         st.warning("Please select a product line to view sales history.")
         return
+
+    # Simple "user" accounts only see their own rows
+    rep_name = get_rep_restriction(st.session_state)
+
+    if selected_product_line == "All Sources":
+        all_sources_search(rep_name)
+        return
     
     # Map product line to table name
     table_name = f"master_{selected_product_line.lower()}_sales"
@@ -177,7 +292,7 @@ def sales_history_page():
     # Apply different filter options based on product line
     with st.expander("Filters", expanded=True):
         # Common filter for Sales Rep Name
-        sales_rep_names = get_column_values(table_name, "Sales Rep Name")
+        sales_rep_names = get_column_values(table_name, "Sales Rep Name", rep_name=rep_name)
         if sales_rep_names:
             selected_sales_reps = st.multiselect("Sales Rep Name:", sales_rep_names)
             if selected_sales_reps:
@@ -185,7 +300,7 @@ def sales_history_page():
         
         # Different filters for different product lines
         if selected_product_line == "Cygnus":
-            states = get_column_values(table_name, "State")
+            states = get_column_values(table_name, "State", rep_name=rep_name)
             if states:
                 selected_states = st.multiselect("State:", states)
                 if selected_states:
@@ -194,7 +309,7 @@ def sales_history_page():
             # Add more Cygnus-specific filters as needed
             
         elif selected_product_line == "Logiquip":
-            contracts = get_column_values(table_name, "Contract")
+            contracts = get_column_values(table_name, "Contract", rep_name=rep_name)
             if contracts:
                 selected_contracts = st.multiselect("Contract:", contracts)
                 if selected_contracts:
@@ -206,34 +321,30 @@ def sales_history_page():
         # Add more conditions for other product lines
     
     # Fetch data with filters
-    data = fetch_data_from_table(table_name, filters)
+    data = fetch_data_from_table(table_name, filters, rep_name=rep_name)
     
     if not data.empty:
         # Display data summary
         st.subheader(f"Data Summary ({len(data)} records)")
-        
-        # Format currency columns if they exist
-        currency_columns = ["Invoice Total", "Sales Total", "Total Rep Due", "Comm Amt", "Commission"]
-        for col in currency_columns:
-            if col in data.columns:
-                try:
-                    data[col] = data[col].apply(
-                        lambda x: f"${float(x):,.2f}" if pd.notnull(x) and x != "" else ""
-                    )
-                except:
-                    pass
-        
+
+        # Only the page shown is copied out of the (Arrow-backed) result and formatted.
+        page_count = max(1, -(-len(data) // HISTORY_PAGE_ROWS))
+        page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1, key="history_page")
+        st.caption(f"Page {page} of {page_count}")
+        page_df = format_currency_columns(data.iloc[(page - 1) * HISTORY_PAGE_ROWS:page * HISTORY_PAGE_ROWS])
+
         # Display as an interactive table
-        st.dataframe(data, use_container_width=True)
-        
-        # CSV Download option
-        csv = data.to_csv(index=False).encode('utf-8')
-        st.download_button(
-            label="Download Data as CSV",
-            data=csv,
-            file_name=f"{selected_product_line}_sales_history.csv",
-            mime="text/csv",
-        )
+        st.dataframe(page_df, use_container_width=True)
+
+        # CSV Download option (the whole result is only formatted when a download is asked for)
+        if st.button("Prepare CSV Download", key="history_csv_button"):
+            csv = format_currency_columns(data).to_csv(index=False).encode('utf-8')
+            st.download_button(
+                label="Download Data as CSV",
+                data=csv,
+                file_name=f"{selected_product_line}_sales_history.csv",
+                mime="text/csv",
+            )
     else:
         st.info(f"No data found for {selected_product_line} with the current filters.")
 
@@ -3,6 +3,7 @@ import pandas as pd
 from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 import os
+from decimal import Decimal
 import matplotlib.pyplot as plt
 
 # Load environment variables
@@ -621,15 +622,11 @@ if monthly_data is None or monthly_data.empty:
 
 with col2:
     if not monthly_data.empty:
-        def parse_currency(value):
-            try:
-                return float(str(value).replace("$", "").replace(",", "").replace("%", ""))
-            except ValueError:
-                return 0.0
+        # The monthly figures are numbers; "$" formatting is only applied when the table is rendered
         numeric_columns = ["Sales Actual", "Revenue Actual", "SHS Margin", "Commission Payout"]
         for col in numeric_columns:
             if col in monthly_data.columns:
-                monthly_data[col] = monthly_data[col].apply(parse_currency)
+                monthly_data[col] = pd.to_numeric(monthly_data[col], errors="coerce").fillna(0.0)
         ytd_sales_actual = monthly_data["Sales Actual"].sum() if "Sales Actual" in monthly_data.columns else 0.0
         ytd_revenue_actual = monthly_data["Revenue Actual"].sum() if "Revenue Actual" in monthly_data.columns else 0.0
         ytd_shs_margin = monthly_data["SHS Margin"].sum() if "SHS Margin" in monthly_data.columns else 0.0
@@ -661,9 +658,9 @@ if not monthly_data.empty:
         "January", "February", "March", "April", "May", "June",
         "July", "August", "September", "October", "November", "December"
     ]
-    sales_actual = [float(str(monthly_data.loc["Sales Actual", m]).replace("$", "").replace(",", ""))
+    sales_actual = [float(monthly_data.loc["Sales Actual", m])
                     if m in monthly_data.columns else 0 for m in all_months]
-    sales_objective = [float(str(monthly_data.loc["Sales Objective", m]).replace("$", "").replace(",", ""))
+    sales_objective = [float(monthly_data.loc["Sales Objective", m])
                     if m in monthly_data.columns else 0 for m in all_months]
     sales_actual = [x if x > 0 else 0 for x in sales_actual]
     fig, ax = plt.subplots(figsize=(12, 3))
@@ -680,7 +677,7 @@ if not monthly_data.empty:
 
     for col in monthly_data.columns:
         monthly_data[col] = monthly_data[col].apply(
-            lambda x: f"${x:,.2f}" if isinstance(x, (int, float)) and not str(x).endswith('%') else x
+            lambda x: f"${x:,.2f}" if isinstance(x, (int, float, Decimal)) and not str(x).endswith('%') else x
         )
 
     st.subheader("Monthly Performance Summary")